@@ -51,6 +51,7 @@ from gramps.gen.db.dbconst import DBBACKEND
 from gramps.gen.plug import BasePluginManager
 from gramps.gen.plug.report import CATEGORY_BOOK, CATEGORY_CODE, BookList
 from .plug import cl_report, cl_book
+from .jobserver import JobServer
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 from gramps.gen.config import config
@@ -603,6 +604,8 @@ class ArgHandler:
     def cl_action(self, action, options_str):
         """
         Command-line action routine. Try to perform specified action.
+
+        :returns: False if the action could not be performed.
         """
         pmgr = BasePluginManager.get_instance()
         if action == "report":
@@ -621,18 +624,19 @@ class ArgHandler:
                         mod = pmgr.load_plugin(pdata)
                         if not mod:
                             #import of plugin failed
-                            return
+                            return False
                         category = pdata.category
                         report_class = getattr(mod, pdata.reportclass)
                         options_class = getattr(mod, pdata.optionclass)
                         if category in (CATEGORY_BOOK, CATEGORY_CODE):
                             options_class(self.dbstate.db, name, category,
                                           options_str_dict)
-                        else:
-                            cl_report(self.dbstate.db, name, category,
-                                      report_class, options_class,
-                                      options_str_dict)
-                        return
+                            return True
+                        # no report is returned if it failed
+                        clr = cl_report(self.dbstate.db, name, category,
+                                        report_class, options_class,
+                                        options_str_dict)
+                        return clr is not None or 'show' in options_str_dict
                 # name exists, but is not in the list of valid report names
                 msg = _("Unknown report name.")
             else:
@@ -651,6 +655,7 @@ class ArgHandler:
                 else:
                     print("   %s\t- %s" % (pdata.id, pdata.name),
                           file=sys.stderr)
+            return False
 
         elif action == "tool":
             from gramps.gui.plug import tool
@@ -670,7 +675,7 @@ class ArgHandler:
                         mod = pmgr.load_plugin(pdata)
                         if not mod:
                             #import of plugin failed
-                            return
+                            return False
                         category = pdata.category
                         tool_class = getattr(mod, pdata.toolclass)
                         options_class = getattr(mod, pdata.optionclass)
@@ -681,7 +686,7 @@ class ArgHandler:
                                       options_class=options_class,
                                       options_str_dict=options_str_dict,
                                       user=self.user)
-                        return
+                        return True
                 msg = _("Unknown tool name.")
             else:
                 msg = _("Tool name not given. "
@@ -700,6 +705,7 @@ class ArgHandler:
                 else:
                     print("   %s\t- %s" % (pdata.id, pdata.name),
                           file=sys.stderr)
+            return False
 
         elif action == "book":
             try:
@@ -715,7 +721,7 @@ class ArgHandler:
                 if name in book_list.get_book_names():
                     cl_book(self.dbstate.db, name, book_list.get_book(name),
                             options_str_dict)
-                    return
+                    return True
                 msg = _("Unknown book name.")
             else:
                 msg = _("Book name not given. "
@@ -725,6 +731,23 @@ class ArgHandler:
             print(_("%s\n Available names are:") % msg, file=sys.stderr)
             for name in sorted(book_list.get_book_names()):
                 print("   %s" % name, file=sys.stderr)
+            return False
+
+        elif action == "jobs":
+            try:
+                options_str_dict = _split_options(options_str)
+            except:
+                options_str_dict = {}
+                print(_("Ignoring invalid options string."),
+                      file=sys.stderr)
+
+            server = JobServer(self)
+            path = options_str_dict.get('socket')
+            if path:
+                server.serve(path)
+            else:
+                server.run(sys.stdin, sys.stdout)
+            return True
 
         else:
             print(_("Unknown action: %s.") % action, file=sys.stderr)
@@ -131,7 +131,13 @@ gramps -O 'Family Tree 1' -e output.gramps -f gramps-xml
 10. To generate a web site into an other locale (in german):
 LANGUAGE=de_DE; LANG=de_DE.UTF-8 gramps -O 'Family Tree 1' -a report -p name=navwebpage,target=/../de
 
-11. Finally, to start normal interactive session type:
+11. To run the report, book, tool and export jobs sent as JSON lines to a Unix socket,
+keeping the Family Tree open between them:
+gramps -y -O 'Family Tree 1' -a jobs -p socket=/tmp/gramps.sock
+The Family Tree is opened for writing, so tool jobs may change it. There is no filter job:
+reports use their own filter option, and exports write the whole Family Tree.
+
+12. Finally, to start normal interactive session type:
 gramps
 
 Note: These examples are for bash shell.
@@ -189,7 +195,11 @@ class ArgParser:
     When using import or export options (-i or -e), the -f option may be
     specified to indicate the family tree format.
 
-    Possible values for ``ACTION`` are:  'report', 'book' and 'tool'.
+    Possible values for ``ACTION`` are:  'report', 'book', 'tool' and
+    'jobs'.  The 'jobs' action runs the jobs read from the standard input,
+    or from a Unix socket given as ``socket=PATH`` option, on the open Family
+    Tree (see :mod:`.jobserver`).  The Family Tree is opened for writing, and
+    there is no filter job.
 
     Configuration ``SETTINGS`` may be specified using the -c option.  The
     settings are of the form config.setting[:value].  If used without a value,
@@ -318,7 +328,7 @@ class ArgParser:
                 self.exports.append((value, family_tree_format))
             elif option in ['-a', '--action']:
                 action = value
-                if action not in ('report', 'tool', 'book'):
+                if action not in ('report', 'tool', 'book', 'jobs'):
                     print(_("Unknown action: %s. Ignoring."
                            ) % action,
                           file=sys.stderr)
@@ -49,7 +49,8 @@ from gramps.gen.plug import BasePluginManager
 from gramps.gen.config import config
 from gramps.gen.constfunc import win
 from gramps.gen.db.dbconst import DBLOGNAME, DBBACKEND
-from gramps.gen.db.utils import make_database, get_dbid_from_path
+from gramps.gen.db.utils import (make_database, get_dbid_from_path,
+                                 read_summary_file, summary_from_counts)
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
@@ -156,7 +157,15 @@ class CLIDbManager:
         _("Schema version")
         """
         dbid = get_dbid_from_path(dirpath)
-        if not self.is_locked(dirpath):
+        counts = read_summary_file(dirpath)
+        if counts is not None:
+            # the summary written when the tree was last closed
+            retval = summary_from_counts(counts)
+            try:
+                retval.update(make_database(dbid).get_backend_summary())
+            except Exception:
+                pass
+        elif not self.is_locked(dirpath):
             try:
                 database = make_database(dbid)
                 database.load(dirpath, None, update=False)
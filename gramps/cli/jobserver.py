@@ -0,0 +1,225 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Run a stream of report, book, tool and export jobs on the open Family Tree.
+
+This is the "jobs" action of the command line::
+
+    gramps -y -O 'Family Tree 1' -a jobs
+    gramps -y -O 'Family Tree 1' -a jobs -p socket=/tmp/gramps.sock
+
+Each job is a JSON object on a line of its own, read from the standard input
+or from the connections to a local Unix socket, such as::
+
+    {"id": 1, "action": "report", "options": "name=summary,of=summary.txt"}
+    {"id": 2, "action": "export", "file": "tree.ged"}
+    {"action": "quit"}
+
+The "options" of a "report", "book" or "tool" job are the options string of
+the -p option.  An "export" job may give the "format" of the file, which is
+otherwise guessed from its extension.  The reply to each job is a JSON line,
+with the "id" of the job, a "status" of "ok" or "error", an error "message"
+and the "time" taken, in seconds.
+
+The Family Tree, the plugins and the caches of the database stay loaded
+between the jobs, which are run one at a time.  The -y option keeps the
+prompts of the actions from reading the standard input.
+
+The Family Tree is opened by -O as for the other actions, so it can be
+written: a "tool" job may change it, as -a tool does.  There is no job
+selecting the people to work on; a report uses the filter of its own
+options, and an export writes the whole Family Tree.  The socket is only
+accessible to its owner.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import sys
+import time
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from gramps.gen.plug import BasePluginManager
+from gramps.gen.const import GRAMPS_LOCALE as glocale
+_ = glocale.translation.gettext
+
+LOG = logging.getLogger(".cli.jobserver")
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+ACTIONS = ('report', 'book', 'tool', 'export', 'quit')
+
+#-------------------------------------------------------------------------
+#
+# JobServer
+#
+#-------------------------------------------------------------------------
+class JobServer:
+    """
+    Run the jobs read from a stream or a Unix socket with the actions of an
+    :class:`.ArgHandler`, on the Family Tree it opened.
+    """
+
+    def __init__(self, handler):
+        """
+        :param handler: the handler of the command line, with the Family Tree
+                        open.
+        :type handler: :class:`.ArgHandler`
+        """
+        self.handler = handler
+        self.done = False
+
+    def run(self, infile, outfile):
+        """
+        Run the jobs read from a text stream, writing the replies to another,
+        until the end of the input or a "quit" job.
+        """
+        for line in infile:
+            if not line.strip():
+                continue
+            outfile.write(json.dumps(self.run_job(line)) + "\n")
+            outfile.flush()
+            if self.done:
+                break
+
+    def serve(self, path):
+        """
+        Run the jobs sent to a Unix socket created at the given path, until a
+        "quit" job.  The connections are served one at a time.
+        """
+        if not hasattr(socket, 'AF_UNIX'):
+            print(_("Unix sockets are not available on this system."),
+                  file=sys.stderr)
+            return
+        server = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                stream = self.rfile
+                for line in stream:
+                    line = line.decode('utf-8')
+                    if not line.strip():
+                        continue
+                    reply = json.dumps(server.run_job(line)) + "\n"
+                    self.wfile.write(reply.encode('utf-8'))
+                    if server.done:
+                        break
+
+        # only a socket left by a previous server is replaced
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                print(_("%s exists and is not a socket.") % path,
+                      file=sys.stderr)
+                return
+            os.unlink(path)
+        # the jobs can write files and change the Family Tree, so only the
+        # owner may connect, from the creation of the socket on
+        umask = os.umask(0o177)
+        try:
+            unix_server = socketserver.UnixStreamServer(path, _Handler)
+        finally:
+            os.umask(umask)
+        with unix_server:
+            try:
+                os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+                print(_("Waiting for jobs on %s") % path, file=sys.stderr)
+                while not self.done:
+                    unix_server.handle_request()
+            finally:
+                os.unlink(path)
+
+    def run_job(self, line):
+        """
+        Run the job of a JSON line, and return the reply.
+        """
+        start = time.perf_counter()
+        reply = {}
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError(_("A job must be a JSON object."))
+            reply['id'] = job.get('id')
+            action = job.get('action')
+            if action not in ACTIONS:
+                raise ValueError(_("Unknown action: %s.") % action)
+            if action == 'quit':
+                self.done = True
+            elif action == 'export':
+                self.__export(job.get('file'), job.get('format'))
+            else:
+                options_str = job.get('options', '')
+                if not isinstance(options_str, str):
+                    raise ValueError(_("The options of a job must be a "
+                                       "string."))
+                print(_("Performing action: %s.") % action, file=sys.stderr)
+                if self.handler.cl_action(action, options_str) is False:
+                    raise ValueError(_("The %s failed.") % action)
+            reply['status'] = 'ok'
+        except SystemExit as err:
+            # the actions exit on some errors
+            reply['status'] = 'error'
+            reply['message'] = _("The job exited with status %s.") % err.code
+        except Exception as err:
+            LOG.warning("Job failed: %s", line.strip(), exc_info=True)
+            reply['status'] = 'error'
+            reply['message'] = str(err)
+        reply['time'] = round(time.perf_counter() - start, 3)
+        return reply
+
+    def __export(self, filename, family_tree_format):
+        """
+        Export the Family Tree to a file, in the format given or guessed from
+        the extension of the file.
+        """
+        if not filename or not isinstance(filename, str):
+            raise ValueError(_("No file given for the export."))
+        if family_tree_format is None:
+            family_tree_format = os.path.splitext(filename)[-1][1:].lower()
+        pmgr = BasePluginManager.get_instance()
+        if not any(plugin.get_extension() == family_tree_format
+                   for plugin in pmgr.get_export_plugins()):
+            raise ValueError(_("ERROR: Unrecognized format for export file %s"
+                              ) % filename)
+        fullpath = os.path.abspath(os.path.expanduser(filename))
+        print(_("Exporting: file %(filename)s, format %(format)s."
+               ) % {'filename' : fullpath,
+                    'format'   : family_tree_format},
+              file=sys.stderr)
+        self.handler.cl_export(fullpath, family_tree_format)
@@ -0,0 +1,118 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for jobserver.py """
+
+import io
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from ..jobserver import JobServer
+
+class JobServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = Mock()
+        self.server = JobServer(self.handler)
+
+    def run_jobs(self, *jobs):
+        infile = io.StringIO("".join(job + "\n" for job in jobs))
+        outfile = io.StringIO()
+        self.server.run(infile, outfile)
+        return [json.loads(line) for line in outfile.getvalue().splitlines()]
+
+    def test_report(self):
+        replies = self.run_jobs(
+            '{"id": 1, "action": "report", "options": "name=summary"}',
+            '',
+            '{"id": 2, "action": "tool", "options": "name=check"}')
+        self.assertEqual([(reply['id'], reply['status'])
+                          for reply in replies], [(1, 'ok'), (2, 'ok')])
+        self.assertEqual([call[0] for call
+                          in self.handler.cl_action.call_args_list],
+                         [('report', 'name=summary'), ('tool', 'name=check')])
+
+    def test_errors(self):
+        self.handler.cl_action.side_effect = SystemExit(1)
+        replies = self.run_jobs('not json',
+                                '{"id": 1, "action": "remove"}',
+                                '{"id": 2, "action": "report"}',
+                                '{"id": 3, "action": "export", "file": ""}')
+        self.assertEqual([reply['status'] for reply in replies],
+                         ['error'] * 4)
+        self.assertEqual([reply.get('id') for reply in replies],
+                         [None, 1, 2, 3])
+        self.handler.cl_export.assert_not_called()
+
+    def test_failed(self):
+        self.handler.cl_action.return_value = False
+        replies = self.run_jobs('{"action": "report", "options": "name=x"}')
+        self.assertEqual(replies[0]['status'], 'error')
+
+    def test_quit(self):
+        replies = self.run_jobs('{"action": "quit"}',
+                                '{"action": "report", "options": ""}')
+        self.assertEqual(len(replies), 1)
+        self.handler.cl_action.assert_not_called()
+
+    def test_not_a_socket(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "jobs")
+            with open(path, "w") as fh:
+                fh.write("keep")
+            self.server.serve(path)
+            with open(path) as fh:
+                self.assertEqual(fh.read(), "keep")
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "needs Unix sockets")
+    def test_socket(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "jobs")
+            thread = threading.Thread(target=self.server.serve, args=(path,))
+            thread.daemon = True
+            thread.start()
+            for dummy in range(500):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.01)
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+            with socket.socket(socket.AF_UNIX) as client:
+                client.connect(path)
+                client.sendall(b'{"id": 1, "action": "report", '
+                               b'"options": "name=summary"}\n'
+                               b'{"id": 2, "action": "quit"}\n')
+                replies = client.makefile().read().splitlines()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(mode, 0o600)
+            self.assertEqual([json.loads(reply)['status']
+                              for reply in replies], ['ok', 'ok'])
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -170,7 +170,10 @@ register('database.autobackup', 0)
 register('database.path', os.path.join(USER_DATA, 'grampsdb'))
 register('database.host', '')
 register('database.port', '')
+register('database.undo-depth', 1000)
 
+register('export.compress-level', 6)
+register('export.compress-threads', 1)
 register('export.proxy-order',
          [["privacy", 0],
           ["living", 0],
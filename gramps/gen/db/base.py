@@ -1433,6 +1433,71 @@ class DbReadBase:
         """
         return False
 
+    def select_handles(self, class_name, where, values):
+        """
+        Return a list of the handles of the class_name objects whose
+        secondary columns satisfy the SQL where clause, or None if the
+        database cannot evaluate SQL.
+
+        This is used to evaluate filter rules in the database. Proxies which
+        hide or alter objects must not pass it on to the underlying database.
+
+        :param class_name: primary object class name, e.g. "Person".
+        :type class_name: str
+        :param where: SQL predicate using "?" placeholders.
+        :type where: str
+        :param values: values for the placeholders.
+        :type values: list
+        """
+        return None
+
+    def get_change_serial(self):
+        """
+        Return a number identifying the state of the data of the database,
+        which changes whenever the data changes, even in another session, or
+        None if the database does not keep one.
+        """
+        return None
+
+    def get_pedigree_index(self):
+        """
+        Return a :class:`.PedigreeIndex` of the parent/child links between
+        the people in the database, or None if the database does not
+        maintain one.
+
+        Proxies which hide people or families must not pass it on to the
+        underlying database.
+        """
+        return None
+
+    def get_tree_statistics(self):
+        """
+        Return the :class:`.TreeStatistics` of the people and media of the
+        database, or None if the database does not maintain them.
+
+        Proxies which hide objects must not pass them on to the underlying
+        database.
+        """
+        return None
+
+    def get_vital_index(self):
+        """
+        Return the :class:`.VitalIndex` of the dates, families and children of
+        the people of the database, or None if the database does not maintain
+        it.
+
+        Proxies which hide objects must not pass them on to the underlying
+        database.
+        """
+        return None
+
+    def get_place_cache(self):
+        """
+        Return a :class:`.PlaceCache` of the places of the database, or None
+        if the database does not maintain one.
+        """
+        return None
+
     def method(self, fmt, *args):
         """
         Convenience function to return database methods.
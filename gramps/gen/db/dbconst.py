@@ -31,7 +31,7 @@ Declare constants used by database modules
 __all__ = ( 'DBPAGE', 'DBMODE', 'DBCACHE', 'DBLOCKS', 'DBOBJECTS', 'DBUNDO',
             'DBEXT', 'DBMODE_R', 'DBMODE_W', 'DBUNDOFN', 'DBLOCKFN',
             'DBRECOVFN','BDBVERSFN', 'DBLOGNAME', 'SCHVERSFN', 'PCKVERSFN',
-            'DBBACKEND',
+            'DBBACKEND', 'DBSUMMARYFN',
             'PERSON_KEY', 'FAMILY_KEY', 'SOURCE_KEY', 'CITATION_KEY',
             'EVENT_KEY', 'MEDIA_KEY', 'PLACE_KEY', 'REPOSITORY_KEY',
             'NOTE_KEY', 'REFERENCE_KEY', 'TAG_KEY',
@@ -45,6 +45,7 @@ DBLOCKFN = "lock"          # File name of lock file
 DBRECOVFN = "need_recover"  # File name of recovery file
 BDBVERSFN = "bdbversion.txt"# File name of Berkeley DB version file
 DBBACKEND = "database.txt"  # File name of Database backend file
+DBSUMMARYFN = "summary.json" # File name of the summary of the tree
 SCHVERSFN = "schemaversion.txt"# File name of schema version file
 PCKVERSFN = "pickleupgrade.txt" # Indicator that pickle has been upgrade t Python3
 DBLOGNAME = ".Db"           # Name of logger
@@ -57,6 +58,8 @@ DBLOCKS = 100000          # Maximum number of locks supported
 DBOBJECTS = 100000          # Maximum number of simultaneously locked objects
 DBUNDO = 1000            # Maximum size of undo buffer
 ARRAYSIZE = 1000            # The arraysize for a SQL cursor
+BATCHSIZE = 10000           # Rows buffered by a batch transaction per flush
+OBJCACHE = 32767            # Objects kept by the handle lookup cache
 
 PERSON_KEY = 0
 FAMILY_KEY = 1
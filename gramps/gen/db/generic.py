@@ -35,6 +35,7 @@ import ast
 import sys
 import datetime
 import glob
+from itertools import chain
 from pathlib import Path
 
 #------------------------------------------------------------------------
@@ -42,17 +43,26 @@ from pathlib import Path
 # Gramps Modules
 #
 #------------------------------------------------------------------------
-from . import (DbReadBase, DbWriteBase, DbUndo, DBLOGNAME, DBUNDOFN,
+from . import (DbReadBase, DbWriteBase, DbUndo, DbTxn, DBLOGNAME, DBUNDOFN,
                REFERENCE_KEY, PERSON_KEY, FAMILY_KEY,
                CITATION_KEY, SOURCE_KEY, EVENT_KEY, MEDIA_KEY, PLACE_KEY,
                REPOSITORY_KEY, NOTE_KEY, TAG_KEY, TXNADD, TXNUPD, TXNDEL,
                KEY_TO_NAME_MAP, DBMODE_R, DBMODE_W)
-from .utils import write_lock_file, clear_lock_file
+from .dbconst import OBJCACHE
+from .utils import (write_lock_file, clear_lock_file, get_summary_counts,
+                    summary_from_counts, write_summary_file)
 from .exceptions import DbVersionError, DbUpgradeRequiredError
 from ..errors import HandleError
 from ..utils.callback import Callback
+from ..utils.lru import LRU
 from ..updatecallback import UpdateCallback
 from .bookmarks import DbBookmarks
+from .pedigree import PedigreeIndex
+from .treestats import TreeStatistics
+from .vitals import VitalIndex
+from .idindex import GrampsIdIndex, id_pattern
+from .placecache import PlaceCache
+from .undolog import UndoLog, COMMIT, UNDO, REDO
 
 from ..utils.id import create_id
 from ..lib.researcher import Researcher
@@ -69,48 +79,102 @@ SIGBASE = ('person', 'family', 'source', 'event', 'media',
            'place', 'repository', 'reference', 'note', 'tag', 'citation')
 
 class DbGenericUndo(DbUndo):
+    """
+    The undo/redo manager of the generic databases.  The records of the
+    transactions are compressed into an :class:`.UndoLog`, in the file given
+    or, without a path, in memory.
+    """
     def __init__(self, grampsdb, path):
         super(DbGenericUndo, self).__init__(grampsdb)
-        self.undodb = []
+        self.undodb = UndoLog(path)
+        self.depth = 0
 
     def open(self, value=None):
         """
-        Open the backing storage.  Needs to be overridden in the derived
-        class.
-        """
-        pass
+        Open the backing storage.  The transactions of a log left by a
+        session which did not close can be undone or redone again.
+        """
+        self.depth = config.get('database.undo-depth')
+        marks = self.undodb.open()
+        for kind, value in marks:
+            if kind == COMMIT:
+                first, last, msg, timestamp = value
+                txn = DbTxn(msg, self.db)
+                txn.first = first
+                txn.last = last
+                txn.timestamp = timestamp
+                self.undoq.append(txn)
+            elif kind == UNDO and self.undoq:
+                self.redoq.append(self.undoq.pop())
+            elif kind == REDO and self.redoq:
+                self.undoq.append(self.redoq.pop())
+        for queue in (self.undoq, self.redoq):
+            kept = [txn for txn in queue if txn.first >= self.undodb.first]
+            queue.clear()
+            queue.extend(kept)
+        if marks:
+            # undoing all would go back before the start of this session
+            self.db.abort_possible = False
+            self._discard()
 
     def close(self):
         """
-        Close the backing storage.  Needs to be overridden in the derived
-        class.
+        Close the backing storage, and remove the log.
         """
-        pass
+        self.undodb.close()
+
+    def clear(self):
+        """
+        Clear the undo/redo list and the backing storage.
+        """
+        super(DbGenericUndo, self).clear()
+        self.undodb.clear()
+
+    def commit(self, txn, msg):
+        """
+        Commit the transaction to the undo/redo database, and forget the
+        oldest transactions beyond the retention depth.
+        """
+        super(DbGenericUndo, self).commit(txn, msg)
+        if txn.first is not None:
+            self.undodb.mark(COMMIT, (txn.first, txn.last, msg,
+                                      txn.timestamp))
+        self._discard()
+
+    def _discard(self):
+        """
+        Forget the oldest transactions beyond the retention depth, and discard
+        the records no transaction needs.
+        """
+        if self.depth > 0:
+            while len(self.undoq) > self.depth:
+                self.undoq.popleft()
+                self.db.abort_possible = False
+        firsts = [txn.first for txn in chain(self.undoq, self.redoq)
+                  if txn.first is not None]
+        self.undodb.discard(min(firsts, default=len(self.undodb)))
 
     def append(self, value):
         """
-        Add a new entry on the end.  Needs to be overridden in the derived
-        class.
+        Add a new entry on the end, and return its record number.
         """
-        self.undodb.append(value)
+        return self.undodb.append(value)
 
     def __getitem__(self, index):
         """
-        Returns an entry by index number.  Needs to be overridden in the
-        derived class.
+        Returns an entry by index number.
         """
         return self.undodb[index]
 
     def __setitem__(self, index, value):
         """
-        Set an entry to a value.  Needs to be overridden in the derived class.
+        The entries of the log cannot be changed.
         """
-        self.undodb[index] = value
+        raise TypeError("undo records cannot be changed")
 
     def __len__(self):
         """
-        Returns the number of entries.  Needs to be overridden in the derived
-        class.
+        Returns the number of entries.
         """
         return len(self.undodb)
 
@@ -128,6 +192,7 @@ class DbGenericUndo(DbUndo):
         sigs = [[[] for trans_type in range(3)] for key in range(11)]
 
         # Process all records in the transaction
+        self.db._update_change_serial()
         try:
             self.db._txn_begin()
             for record_id in subitems:
@@ -145,7 +210,9 @@ class DbGenericUndo(DbUndo):
             self.db._txn_commit()
         except:
             self.db._txn_abort()
+            self.db.clear_cache()
             raise
+        self.undodb.mark(REDO)
 
         # Notify listeners
         if db.undo_callback:
@@ -177,6 +244,7 @@ class DbGenericUndo(DbUndo):
         sigs = [[[] for trans_type in range(3)] for key in range(11)]
 
         # Process all records in the transaction
+        self.db._update_change_serial()
         try:
             self.db._txn_begin()
             for record_id in subitems:
@@ -194,7 +262,9 @@ class DbGenericUndo(DbUndo):
             self.db._txn_commit()
         except:
             self.db._txn_abort()
+            self.db.clear_cache()
             raise
+        self.undodb.mark(UNDO)
 
         # Notify listeners
         if db.undo_callback:
@@ -274,6 +344,64 @@ class Cursor:
     def close(self):
         pass
 
+class Metadata:
+    """
+    An attribute of the database stored in the metadata table under a key.
+    It is read on first use, and written back on close only if it changed.
+    """
+    def __init__(self, key, default):
+        """
+        :param key: the setting of the metadata table.
+        :type key: str
+        :param default: a function returning the value of a setting not in
+                        the table.
+        """
+        self.key = key
+        self.default = default
+
+    def to_value(self, data):
+        """
+        Return the value of the attribute for the data stored.
+        """
+        return data
+
+    def to_data(self, value):
+        """
+        Return the data stored for the value of the attribute.
+        """
+        return value
+
+    def __get__(self, db, owner=None):
+        if db is None:
+            return self
+        try:
+            return db._metadata[self.key][1]
+        except KeyError:
+            pass
+        data = self.default()
+        if db._metadata_open:
+            data = db._get_metadata(self.key, data)
+            db._metadata_saved[self.key] = pickle.dumps(data)
+        value = self.to_value(data)
+        db._metadata[self.key] = (self, value)
+        return value
+
+    def __set__(self, db, value):
+        db._metadata[self.key] = (self, value)
+
+class BookmarksMetadata(Metadata):
+    """
+    The bookmarks of a type of objects, stored as a list of handles.
+    """
+    def __init__(self, key):
+        Metadata.__init__(self, key, list)
+
+    def to_value(self, data):
+        return DbBookmarks(data)
+
+    def to_data(self, value):
+        return value.get()
+
 class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
     """
     A Gramps Database Backend. This replicates the grampsdb functions.
@@ -304,6 +432,50 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
 
     VERSION = (20, 0, 0)
 
+    # Metadata, read on first use
+    name_formats = Metadata('name_formats', list)
+    owner = Metadata('researcher', Researcher)
+
+    bookmarks = BookmarksMetadata('bookmarks')
+    family_bookmarks = BookmarksMetadata('family_bookmarks')
+    event_bookmarks = BookmarksMetadata('event_bookmarks')
+    source_bookmarks = BookmarksMetadata('source_bookmarks')
+    citation_bookmarks = BookmarksMetadata('citation_bookmarks')
+    repo_bookmarks = BookmarksMetadata('repo_bookmarks')
+    media_bookmarks = BookmarksMetadata('media_bookmarks')
+    place_bookmarks = BookmarksMetadata('place_bookmarks')
+    note_bookmarks = BookmarksMetadata('note_bookmarks')
+
+    # Custom type values
+    event_names = Metadata('event_names', set)
+    family_attributes = Metadata('fattr_names', set)
+    individual_attributes = Metadata('pattr_names', set)
+    source_attributes = Metadata('sattr_names', set)
+    marker_names = Metadata('marker_names', set)
+    child_ref_types = Metadata('child_refs', set)
+    family_rel_types = Metadata('family_rels', set)
+    event_role_names = Metadata('event_roles', set)
+    name_types = Metadata('name_types', set)
+    origin_types = Metadata('origin_types', set)
+    repository_types = Metadata('repo_types', set)
+    note_types = Metadata('note_types', set)
+    source_media_types = Metadata('sm_types', set)
+    url_types = Metadata('url_types', set)
+    media_attributes = Metadata('mattr_names', set)
+    event_attributes = Metadata('eattr_names', set)
+    place_types = Metadata('place_types', set)
+
+    # Indexes
+    cmap_index = Metadata('cmap_index', int)
+    smap_index = Metadata('smap_index', int)
+    emap_index = Metadata('emap_index', int)
+    pmap_index = Metadata('pmap_index', int)
+    fmap_index = Metadata('fmap_index', int)
+    lmap_index = Metadata('lmap_index', int)
+    omap_index = Metadata('omap_index', int)
+    rmap_index = Metadata('rmap_index', int)
+    nmap_index = Metadata('nmap_index', int)
+
     def __init__(self, directory=None):
         DbReadBase.__init__(self)
         DbWriteBase.__init__(self)
@@ -489,17 +661,19 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         }
         self.readonly = False
         self.db_is_open = False
-        self.name_formats = []
-        # Bookmarks:
-        self.bookmarks = DbBookmarks()
-        self.family_bookmarks = DbBookmarks()
-        self.event_bookmarks = DbBookmarks()
-        self.place_bookmarks = DbBookmarks()
-        self.citation_bookmarks = DbBookmarks()
-        self.source_bookmarks = DbBookmarks()
-        self.repo_bookmarks = DbBookmarks()
-        self.media_bookmarks = DbBookmarks()
-        self.note_bookmarks = DbBookmarks()
+        # Metadata read, by key: (Metadata, value)
+        self._metadata = {}
+        self._metadata_saved = {}   # key -> data pickled when read
+        self._metadata_open = False
+        # Handle lookup cache:
+        self._cache = LRU(OBJCACHE)
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._pedigree = None
+        self._treestats = None
+        self._vitals = None
+        self._placecache = None
+        self._id_indexes = {}   # obj_key -> GrampsIdIndex
         self.set_person_id_prefix('I%04d')
         self.set_media_id_prefix('O%04d')
         self.set_family_id_prefix('F%04d')
@@ -511,15 +685,6 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         self.set_note_id_prefix('N%04d')
         # ----------------------------------
         self.undodb = None
-        self.cmap_index = 0
-        self.smap_index = 0
-        self.emap_index = 0
-        self.pmap_index = 0
-        self.fmap_index = 0
-        self.lmap_index = 0
-        self.omap_index = 0
-        self.rmap_index = 0
-        self.nmap_index = 0
         self.undo_callback = None
         self.redo_callback = None
         self.undo_history_callback = None
@@ -528,9 +693,13 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         self.abort_possible = True
         self._bm_changes = 0
         self.has_changed = 0  # Also gives commits since startup
-        self.surname_list = []
-        self.genderStats = GenderStats() # can pass in loaded stats as dict
-        self.owner = Researcher()
+        # Commits whose changes were not signalled, by batch transactions or
+        # while the signals were disabled:
+        self.unsignalled_commits = 0
+        self._change_serial = 0
+        self._serial_observed = False
+        self._surname_list = None
+        self._gender_stats = None
         if directory:
             self.load(directory)
 
@@ -587,66 +756,29 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
             self._create_schema()
             self._set_metadata('version', str(self.VERSION[0]))
 
-        # Load metadata
-        self.name_formats = self._get_metadata('name_formats')
-        self.owner = self._get_metadata('researcher', default=Researcher())
-
-        # Load bookmarks
-        self.bookmarks.set(self._get_metadata('bookmarks'))
-        self.family_bookmarks.set(self._get_metadata('family_bookmarks'))
-        self.event_bookmarks.set(self._get_metadata('event_bookmarks'))
-        self.source_bookmarks.set(self._get_metadata('source_bookmarks'))
-        self.citation_bookmarks.set(self._get_metadata('citation_bookmarks'))
-        self.repo_bookmarks.set(self._get_metadata('repo_bookmarks'))
-        self.media_bookmarks.set(self._get_metadata('media_bookmarks'))
-        self.place_bookmarks.set(self._get_metadata('place_bookmarks'))
-        self.note_bookmarks.set(self._get_metadata('note_bookmarks'))
-
-        # Custom type values
-        self.event_names = self._get_metadata('event_names', set())
-        self.family_attributes = self._get_metadata('fattr_names', set())
-        self.individual_attributes = self._get_metadata('pattr_names', set())
-        self.source_attributes = self._get_metadata('sattr_names', set())
-        self.marker_names = self._get_metadata('marker_names', set())
-        self.child_ref_types = self._get_metadata('child_refs', set())
-        self.family_rel_types = self._get_metadata('family_rels', set())
-        self.event_role_names = self._get_metadata('event_roles', set())
-        self.name_types = self._get_metadata('name_types', set())
-        self.origin_types = self._get_metadata('origin_types', set())
-        self.repository_types = self._get_metadata('repo_types', set())
-        self.note_types = self._get_metadata('note_types', set())
-        self.source_media_types = self._get_metadata('sm_types', set())
-        self.url_types = self._get_metadata('url_types', set())
-        self.media_attributes = self._get_metadata('mattr_names', set())
-        self.event_attributes = self._get_metadata('eattr_names', set())
-        self.place_types = self._get_metadata('place_types', set())
-
-        # surname list
-        self.surname_list = self.get_surname_list()
+        # The metadata, the surname list and the gender statistics are read
+        # on first use
+        self._metadata = {}
+        self._metadata_saved = {}
+        self._metadata_open = True
+        self._surname_list = None
+        self._gender_stats = None
 
         self._set_save_path(directory)
 
-        if self._directory:
+        if self._directory and self._directory != ":memory:" \
+                and not self.readonly:
             self.undolog = os.path.join(self._directory, DBUNDOFN)
         else:
             self.undolog = None
         self.undodb = DbGenericUndo(self, self.undolog)
         self.undodb.open()
 
-        # Other items to load
-        gstats = self.get_gender_stats()
-        self.genderStats = GenderStats(gstats)
-
-        # Indexes:
-        self.cmap_index = self._get_metadata('cmap_index', 0)
-        self.smap_index = self._get_metadata('smap_index', 0)
-        self.emap_index = self._get_metadata('emap_index', 0)
-        self.pmap_index = self._get_metadata('pmap_index', 0)
-        self.fmap_index = self._get_metadata('fmap_index', 0)
-        self.lmap_index = self._get_metadata('lmap_index', 0)
-        self.omap_index = self._get_metadata('omap_index', 0)
-        self.rmap_index = self._get_metadata('rmap_index', 0)
-        self.nmap_index = self._get_metadata('nmap_index', 0)
+        self._id_indexes = {}
+
+        self._change_serial = self._get_metadata('change_serial', 0)
+        # files derived from the data in other sessions may record it
+        self._serial_observed = True
 
         self.db_is_open = True
 
@@ -677,71 +809,53 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         if update is False, don't change access times, etc.
         """
         if self._directory != ":memory:":
+            counts = None
+            if not self.readonly:
+                # written once the files are closed, for gramps.cli.clidbman
+                counts = get_summary_counts(self)
             if update and not self.readonly:
                 # This is just a dummy file to indicate last modified time of
                 # the database for gramps.cli.clidbman:
                 filename = os.path.join(self._directory, "meta_data.db")
                 Path(filename).touch()
 
-                # Save metadata
-                self._set_metadata('name_formats', self.name_formats)
-                self._set_metadata('researcher', self.owner)
-
-                # Bookmarks
-                self._set_metadata('bookmarks', self.bookmarks.get())
-                self._set_metadata('family_bookmarks',
-                                  self.family_bookmarks.get())
-                self._set_metadata('event_bookmarks', self.event_bookmarks.get())
-                self._set_metadata('place_bookmarks', self.place_bookmarks.get())
-                self._set_metadata('repo_bookmarks', self.repo_bookmarks.get())
-                self._set_metadata('source_bookmarks',
-                                  self.source_bookmarks.get())
-                self._set_metadata('citation_bookmarks',
-                                  self.citation_bookmarks.get())
-                self._set_metadata('media_bookmarks', self.media_bookmarks.get())
-                self._set_metadata('note_bookmarks', self.note_bookmarks.get())
-
-                # Custom type values, sets
-                self._set_metadata('event_names', self.event_names)
-                self._set_metadata('fattr_names', self.family_attributes)
-                self._set_metadata('pattr_names', self.individual_attributes)
-                self._set_metadata('sattr_names', self.source_attributes)
-                self._set_metadata('marker_names', self.marker_names)
-                self._set_metadata('child_refs', self.child_ref_types)
-                self._set_metadata('family_rels', self.family_rel_types)
-                self._set_metadata('event_roles', self.event_role_names)
-                self._set_metadata('name_types', self.name_types)
-                self._set_metadata('origin_types', self.origin_types)
-                self._set_metadata('repo_types', self.repository_types)
-                self._set_metadata('note_types', self.note_types)
-                self._set_metadata('sm_types', self.source_media_types)
-                self._set_metadata('url_types', self.url_types)
-                self._set_metadata('mattr_names', self.media_attributes)
-                self._set_metadata('eattr_names', self.event_attributes)
-                self._set_metadata('place_types', self.place_types)
+                self._save_metadata()
 
                 # Save misc items:
-                if self.has_changed:
-                    self.save_gender_stats(self.genderStats)
-
-                # Indexes:
-                self._set_metadata('cmap_index', self.cmap_index)
-                self._set_metadata('smap_index', self.smap_index)
-                self._set_metadata('emap_index', self.emap_index)
-                self._set_metadata('pmap_index', self.pmap_index)
-                self._set_metadata('fmap_index', self.fmap_index)
-                self._set_metadata('lmap_index', self.lmap_index)
-                self._set_metadata('omap_index', self.omap_index)
-                self._set_metadata('rmap_index', self.rmap_index)
-                self._set_metadata('nmap_index', self.nmap_index)
+                if self._gender_stats is not None and self.has_changed:
+                    self.save_gender_stats(self._gender_stats)
 
             self._close()
+            if self.undodb is not None:
+                self.undodb.close()
 
             try:
                 clear_lock_file(self.get_save_path())
             except IOError:
                 pass
 
+            if counts is not None:
+                write_summary_file(self._directory, counts)
+
+        self.clear_cache()
+        if self._pedigree is not None:
+            self._pedigree.close()
+            self._pedigree = None
+        if self._treestats is not None:
+            self._treestats.close()
+            self._treestats = None
+        if self._vitals is not None:
+            self._vitals.close()
+            self._vitals = None
+        if self._placecache is not None:
+            self._placecache.close()
+            self._placecache = None
+        self._id_indexes = {}
+        self._metadata = {}
+        self._metadata_saved = {}
+        self._metadata_open = False
+        self._surname_list = None
+        self._gender_stats = None
         self.db_is_open = False
         self._directory = None
 
@@ -833,6 +947,16 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         """
         raise NotImplementedError
 
+    def _save_metadata(self):
+        """
+        Write the metadata attributes set, or read and changed, since the
+        database was opened.
+        """
+        for key, (attribute, value) in self._metadata.items():
+            data = attribute.to_data(value)
+            if pickle.dumps(data) != self._metadata_saved.get(key):
+                self._set_metadata(key, data)
+
     ################################################################
     #
     # set_*_id_prefix methods
@@ -1005,14 +1129,50 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
     def _find_next_gramps_id(self, prefix, map_index, obj_key):
         """
         Helper function for find_next_<object>_gramps_id methods
+
+        The numbers in use are skipped with the index of the IDs, so the
+        database is only asked about the ID found.
         """
+        id_index = self._get_id_index(prefix, obj_key)
+        if id_index is not None:
+            map_index = id_index.next_free(map_index)
         index = prefix % map_index
         while self._has_gramps_id(obj_key, index):
             map_index += 1
+            if id_index is not None:
+                map_index = id_index.next_free(map_index)
             index = prefix % map_index
         map_index += 1
         return (map_index, index)
 
+    def _get_id_index(self, prefix, obj_key):
+        """
+        Return the :class:`.GrampsIdIndex` of an object type for the given
+        prefix, reading the IDs of the table on first use.  Return None if
+        the prefix has no number format.
+        """
+        id_index = self._id_indexes.get(obj_key)
+        if id_index is None or id_index.prefix != prefix:
+            pattern = id_pattern(prefix)
+            if pattern is None:
+                return None
+            id_index = GrampsIdIndex(prefix, pattern)
+            id_index.load(self._get_gramps_id_pairs(obj_key))
+            self._id_indexes[obj_key] = id_index
+        return id_index
+
+    def _update_id_index(self, obj_key, handle, gramps_id=None):
+        """
+        Record the new Gramps ID of an object in the index of its type, if
+        it was read.  An ID of None removes the object.
+        """
+        id_index = self._id_indexes.get(obj_key)
+        if id_index is not None:
+            if gramps_id is None:
+                id_index.discard(handle)
+            else:
+                id_index.add(handle, gramps_id)
+
     def find_next_person_gramps_id(self):
         """
         Return the next available GRAMPS' ID for a Person object based off the
@@ -1188,6 +1348,13 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         """
         raise NotImplementedError
 
+    def _get_gramps_id_pairs(self, obj_key):
+        """
+        Return a list of (handle, gramps_id) tuples, one for each object in
+        the database.
+        """
+        raise NotImplementedError
+
     def get_person_gramps_ids(self):
         """
         Return a list of Gramps IDs, one ID for each Person in the
@@ -1646,6 +1813,115 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         """
         raise NotImplementedError
 
+    ################################################################
+    #
+    # Handle lookup cache
+    #
+    ################################################################
+
+    def _cache_get(self, obj_key, handle):
+        """
+        Return the value cached for a handle, or None if there isn't one.
+
+        Backends cache the stored form of an object, which must be
+        immutable, so that callers cannot alter a cached entry.
+        """
+        key = (obj_key, handle)
+        if key in self._cache:
+            self._cache_hits += 1
+            return self._cache[key]
+        self._cache_misses += 1
+        return None
+
+    def _cache_set(self, obj_key, handle, value):
+        """
+        Cache the stored form of an object.
+        """
+        self._cache[(obj_key, handle)] = value
+
+    def _cache_remove(self, obj_key, handle):
+        """
+        Remove a handle from the cache after its object is changed.
+        """
+        key = (obj_key, handle)
+        if key in self._cache:
+            del self._cache[key]
+
+    def clear_cache(self):
+        """
+        Empty the handle lookup cache and reset its statistics.
+        """
+        self._cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def get_cache_stats(self):
+        """
+        Return a dictionary with the number of hits and misses of the handle
+        lookup cache, and the number of objects it holds.
+        """
+        return {'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'size': len(self._cache.data)}
+
+    def get_change_serial(self):
+        """
+        Return a number identifying the state of the data of the database.
+
+        The number is changed, and saved in the database, before the data is
+        next changed, so a file derived from the data can record it, and be
+        checked against it when the database is opened again.  It must not be
+        recorded while a transaction is in progress.
+        """
+        self._serial_observed = True
+        return self._change_serial
+
+    def _update_change_serial(self):
+        """
+        Change the serial number returned by :meth:`get_change_serial`, if it
+        was returned since it last changed.  Called before the data changes.
+        """
+        if self._serial_observed:
+            self._serial_observed = False
+            self._change_serial += 1
+            self._set_metadata('change_serial', self._change_serial)
+
+    def get_pedigree_index(self):
+        """
+        Return the :class:`.PedigreeIndex` of the database, creating it on
+        first use.
+        """
+        if self._pedigree is None:
+            self._pedigree = PedigreeIndex(self)
+        return self._pedigree
+
+    def get_tree_statistics(self):
+        """
+        Return the :class:`.TreeStatistics` of the database, creating them
+        on first use.
+        """
+        if self._treestats is None:
+            self._treestats = TreeStatistics(self)
+        return self._treestats
+
+    def get_vital_index(self):
+        """
+        Return the :class:`.VitalIndex` of the database, creating it on first
+        use.
+        """
+        if self._vitals is None:
+            self._vitals = VitalIndex(self)
+        return self._vitals
+
+    def get_place_cache(self):
+        """
+        Return the :class:`.PlaceCache` of the database, creating it on first
+        use.
+        """
+        if self._placecache is None:
+            self._placecache = PlaceCache(self)
+        return self._placecache
+
     ################################################################
     #
     # get_raw_*_data methods
@@ -2300,11 +2576,31 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         """
         return self.surname_list
 
+    @property
+    def surname_list(self):
+        """
+        The list of locale-sorted surnames, read on first use.
+        """
+        if self._surname_list is None:
+            self._surname_list = self._get_surname_list()
+        return self._surname_list
+
+    @surname_list.setter
+    def surname_list(self, value):
+        self._surname_list = value
+
+    def _get_surname_list(self):
+        """
+        Read the list of locale-sorted surnames contained in the database.
+        Needs to be overridden in the derived class.
+        """
+        return []
+
     def add_to_surname_list(self, person, batch_transaction):
         """
         Add surname to surname list
         """
-        if batch_transaction:
+        if batch_transaction or self._surname_list is None:
             return
         name = None
         primary_name = person.get_primary_name()
@@ -2329,6 +2625,8 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         If not then we need to remove the name from the list.
         The function must be overridden in the derived class.
         """
+        if self._surname_list is None:
+            return
         name = None
         primary_name = person.get_primary_name()
         if primary_name:
@@ -2340,6 +2638,20 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         if name in self.surname_list:
             self.surname_list.remove(name)
 
+    @property
+    def genderStats(self):
+        """
+        The :class:`.GenderStats` of the given names, read on first use.
+        """
+        if self._gender_stats is None:
+            self._gender_stats = GenderStats(self.get_gender_stats()
+                                             if self._metadata_open else None)
+        return self._gender_stats
+
+    @genderStats.setter
+    def genderStats(self, value):
+        self._gender_stats = value
+
     def get_gender_stats(self):
         """
         Returns a dictionary of
@@ -2412,19 +2724,17 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
         _("Version")
         _("Data version")
         """
-        return {
-            _("Number of people"): self.get_number_of_people(),
-            _("Number of families"): self.get_number_of_families(),
-            _("Number of sources"): self.get_number_of_sources(),
-            _("Number of citations"): self.get_number_of_citations(),
-            _("Number of events"): self.get_number_of_events(),
-            _("Number of media"): self.get_number_of_media(),
-            _("Number of places"): self.get_number_of_places(),
-            _("Number of repositories"): self.get_number_of_repositories(),
-            _("Number of notes"): self.get_number_of_notes(),
-            _("Number of tags"): self.get_number_of_tags(),
-            _("Schema version"): ".".join([str(v) for v in self.VERSION]),
-        }
+        summary = summary_from_counts(get_summary_counts(self))
+        summary.update(self.get_backend_summary())
+        return summary
+
+    def get_backend_summary(self):
+        """
+        Return a dictionary of information about the database backend, which
+        does not depend on the data of the tree.  The database does not need
+        to be open.
+        """
+        return {}
 
     def _order_by_person_key(self, person):
         """
@@ -0,0 +1,128 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Index of the numbers of the Gramps IDs in use, for the allocation of new IDs.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import re
+from collections import Counter
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+_NUMBER_FORMAT = re.compile(r"%[-+ 0#]*\d*[diu]")
+
+#-------------------------------------------------------------------------
+#
+# GrampsIdIndex
+#
+#-------------------------------------------------------------------------
+class GrampsIdIndex:
+    """
+    The numbers n for which prefix % n is the Gramps ID of an object of a
+    type, such as 12 for "I0012" with the prefix "I%04d".
+
+    The number of each object is kept by handle, so that the number of an
+    object given a new ID, or removed, is free again.
+    """
+
+    def __init__(self, prefix, pattern):
+        """
+        :param prefix: the format of the IDs, like "I%04d".
+        :type prefix: str
+        :param pattern: the pattern returned by :func:`id_pattern` for the
+                        prefix.
+        """
+        self.prefix = prefix
+        self._pattern = pattern
+        self._numbers = {}          # handle -> number
+        self._used = Counter()      # number -> count of objects
+
+    def load(self, pairs):
+        """
+        Add the (handle, gramps_id) pairs of the objects of a table.
+        """
+        for handle, gramps_id in pairs:
+            self.add(handle, gramps_id)
+
+    def number(self, gramps_id):
+        """
+        Return the number of a Gramps ID, or None if the ID does not have the
+        format of the prefix.
+        """
+        match = self._pattern.match(gramps_id or "")
+        if match:
+            number = int(match.group(1))
+            if self.prefix % number == gramps_id:
+                return number
+        return None
+
+    def add(self, handle, gramps_id):
+        """
+        Record the Gramps ID of an object added or changed.
+        """
+        self.discard(handle)
+        number = self.number(gramps_id)
+        if number is not None:
+            self._numbers[handle] = number
+            self._used[number] += 1
+
+    def discard(self, handle):
+        """
+        Forget the Gramps ID of an object.
+        """
+        number = self._numbers.pop(handle, None)
+        if number is not None:
+            self._used[number] -= 1
+            if not self._used[number]:
+                del self._used[number]
+
+    def next_free(self, number):
+        """
+        Return the first number not in use from the given one.
+        """
+        while number in self._used:
+            number += 1
+        return number
+
+#-------------------------------------------------------------------------
+#
+# Functions
+#
+#-------------------------------------------------------------------------
+def id_pattern(prefix):
+    """
+    Return a compiled pattern matching the IDs of a prefix, with the number
+    as its group, or None if the prefix has no number format.
+    """
+    match = _NUMBER_FORMAT.search(prefix)
+    if match is None:
+        return None
+    start = prefix[:match.start()].replace("%%", "%")
+    end = prefix[match.end():].replace("%%", "%")
+    return re.compile(re.escape(start) + r"(\d+)" + re.escape(end) + "$")
@@ -0,0 +1,383 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Index of the parent/child links between the people in a database.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from .signalindex import SignalIndex
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+# Positions in the serialized data of people, families and child references
+PERSON_FAMILY_LIST = 8
+PERSON_PARENT_FAMILY_LIST = 9
+FAMILY_FATHER_HANDLE = 2
+FAMILY_MOTHER_HANDLE = 3
+FAMILY_CHILD_REF_LIST = 4
+CHILD_REF_REF = 3
+
+# Node kinds
+_UNKNOWN = 0
+_PERSON = 1
+_FAMILY = 2
+
+#-------------------------------------------------------------------------
+#
+# PedigreeIndex
+#
+#-------------------------------------------------------------------------
+class PedigreeIndex(SignalIndex):
+    """
+    Parent/child links of all the people and families in a database.
+
+    Each handle is mapped to an integer node, and the links of each node are
+    kept in tuples of nodes.  The index is built on first use and kept up to
+    date from the person and family signals of the database.  Changes made
+    while signals are disabled, or by batch transactions, which do not emit
+    signals, cause it to be rebuilt when it is next queried.
+
+    All searches are breadth-first, so they are not limited by the depth of
+    the pedigree, and are safe against loops in the data.
+    """
+
+    def __init__(self, db):
+        SignalIndex.__init__(self, db, (
+            ('person-add', self._update_people),
+            ('person-update', self._update_people),
+            ('person-delete', self._delete),
+            ('person-rebuild', self._invalidate),
+            ('family-add', self._update_families),
+            ('family-update', self._update_families),
+            ('family-delete', self._delete),
+            ('family-rebuild', self._invalidate)))
+        self._clear()
+
+    def close(self):
+        """
+        Disconnect the index from the database.
+        """
+        SignalIndex.close(self)
+        self._clear()
+
+    def _clear(self):
+        self._nodes = {}            # handle -> node
+        self._handles = []          # node -> handle
+        self._kinds = []            # node -> _UNKNOWN, _PERSON or _FAMILY
+        self._parent_families = []  # person -> families they are a child of
+        self._families = []         # person -> families they are a parent in
+        self._parents = []          # family -> father and mother
+        self._children = []         # family -> children
+        self._child_of = {}         # family -> people listing it as parents
+        self._parent_in = {}        # person -> families listing them as parent
+
+    #---------------------------------------------------------------------
+    #
+    # Maintenance
+    #
+    #---------------------------------------------------------------------
+    def _build(self):
+        self._clear()
+        with self.db.get_person_cursor() as cursor:
+            for handle, data in cursor:
+                self._set_person(handle, data)
+        with self.db.get_family_cursor() as cursor:
+            for handle, data in cursor:
+                self._set_family(handle, data)
+
+    def _update_people(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            data = self.db.get_raw_person_data(handle)
+            if data:
+                self._set_person(handle, data)
+
+    def _update_families(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            data = self.db.get_raw_family_data(handle)
+            if data:
+                self._set_family(handle, data)
+
+    def _delete(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            node = self._nodes.get(handle)
+            if node is None:
+                continue
+            if self._kinds[node] == _PERSON:
+                self._set_person_links(node, (), ())
+            elif self._kinds[node] == _FAMILY:
+                self._set_family_links(node, (), ())
+            self._kinds[node] = _UNKNOWN
+
+    def _node(self, handle):
+        """
+        Return the node of a handle, adding one if needed.
+        """
+        node = self._nodes.get(handle)
+        if node is None:
+            node = len(self._handles)
+            self._nodes[handle] = node
+            self._handles.append(handle)
+            self._kinds.append(_UNKNOWN)
+            self._parent_families.append(())
+            self._families.append(())
+            self._parents.append(())
+            self._children.append(())
+        return node
+
+    def _set_person(self, handle, data):
+        node = self._node(handle)
+        self._kinds[node] = _PERSON
+        self._set_person_links(
+            node,
+            tuple(self._node(fam) for fam in data[PERSON_PARENT_FAMILY_LIST]),
+            tuple(self._node(fam) for fam in data[PERSON_FAMILY_LIST]))
+
+    def _set_person_links(self, node, parent_families, families):
+        for family in self._parent_families[node]:
+            self._child_of[family].discard(node)
+        for family in parent_families:
+            self._child_of.setdefault(family, set()).add(node)
+        self._parent_families[node] = parent_families
+        self._families[node] = families
+
+    def _set_family(self, handle, data):
+        node = self._node(handle)
+        self._kinds[node] = _FAMILY
+        self._set_family_links(
+            node,
+            tuple(self._node(parent) for parent in
+                  (data[FAMILY_FATHER_HANDLE], data[FAMILY_MOTHER_HANDLE])
+                  if parent),
+            tuple(self._node(child_ref[CHILD_REF_REF])
+                  for child_ref in data[FAMILY_CHILD_REF_LIST]))
+
+    def _set_family_links(self, node, parents, children):
+        for person in self._parents[node]:
+            self._parent_in[person].discard(node)
+        for person in parents:
+            self._parent_in.setdefault(person, set()).add(node)
+        self._parents[node] = parents
+        self._children[node] = children
+
+    #---------------------------------------------------------------------
+    #
+    # Searches
+    #
+    #---------------------------------------------------------------------
+    def _people(self, handles):
+        """
+        Return the nodes of the handles which are people.
+        """
+        nodes = [self._nodes.get(handle) for handle in handles]
+        return [node for node in nodes
+                if node is not None and self._kinds[node] == _PERSON]
+
+    def _parents_of(self, node, all_families):
+        families = self._parent_families[node]
+        if not all_families:
+            families = families[:1]
+        for family in families:
+            if self._kinds[family] == _FAMILY:
+                for parent in self._parents[family]:
+                    if self._kinds[parent] == _PERSON:
+                        yield parent
+
+    def _children_of(self, node):
+        for family in self._families[node]:
+            if self._kinds[family] == _FAMILY:
+                for child in self._children[family]:
+                    if self._kinds[child] == _PERSON:
+                        yield child
+
+    def _walk(self, nodes, step, generations, inclusive=True):
+        """
+        Return the nodes reached from the given nodes in less than the given
+        number of generations, counting the given nodes as the first.
+        """
+        if not inclusive:
+            # Start from the next generation, so that a given node is still
+            # found if it can be reached from another one.
+            nodes = {next_node for node in nodes for next_node in step(node)}
+            if generations is not None:
+                generations -= 1
+        if generations is not None and generations < 1:
+            return set()
+        found = set(nodes)
+        todo = list(found)
+        gen = 1
+        while todo and (generations is None or gen < generations):
+            gen += 1
+            found_next = []
+            for node in todo:
+                for next_node in step(node):
+                    if next_node not in found:
+                        found.add(next_node)
+                        found_next.append(next_node)
+            todo = found_next
+        return found
+
+    def get_ancestors(self, handles, generations=None, all_families=False,
+                      inclusive=True):
+        """
+        Return the set of handles of the ancestors of the given people.
+
+        :param handles: handles of the people to start from.
+        :type handles: list
+        :param generations: the number of generations to include, counting
+                            the given people as the first, or None for all.
+        :type generations: int
+        :param all_families: if False only the main parent family of each
+                             person is followed, otherwise all of them are.
+        :type all_families: bool
+        :param inclusive: if True the given people are included.
+        :type inclusive: bool
+        """
+        self._check()
+        found = self._walk(
+            self._people(handles),
+            lambda node: self._parents_of(node, all_families),
+            generations, inclusive)
+        return {self._handles[node] for node in found}
+
+    def get_descendants(self, handles, generations=None, inclusive=True):
+        """
+        Return the set of handles of the descendants of the given people.
+
+        :param handles: handles of the people to start from.
+        :type handles: list
+        :param generations: the number of generations to include, counting
+                            the given people as the first, or None for all.
+        :type generations: int
+        :param inclusive: if True the given people are included.
+        :type inclusive: bool
+        """
+        self._check()
+        found = self._walk(self._people(handles), self._children_of,
+                           generations, inclusive)
+        return {self._handles[node] for node in found}
+
+    def has_common_ancestor(self, handle1, handle2, all_families=True):
+        """
+        Return True if two people have a common ancestor.  A person counts as
+        their own ancestor, and a parent family without a father and a
+        mother counts as a common ancestor of its children.
+        """
+        self._check()
+        ancestors1 = self._ancestors_and_families(handle1, all_families)
+        ancestors2 = self._ancestors_and_families(handle2, all_families)
+        return not ancestors1.isdisjoint(ancestors2)
+
+    def _ancestors_and_families(self, handle, all_families):
+        """
+        Return the ancestor nodes of a person, with the nodes of their parent
+        families without a father and a mother.
+        """
+        found = self._walk(
+            self._people([handle]),
+            lambda node: self._parents_of(node, all_families), None)
+        for node in list(found):
+            families = self._parent_families[node]
+            if not all_families:
+                families = families[:1]
+            found.update(family for family in families
+                         if self._kinds[family] == _FAMILY and
+                         not self._parents[family])
+        return found
+
+    def ancestors_within(self, handles, generations):
+        """
+        Return True if no line of ancestors of the given people is longer
+        than the given number of generations, counting the given people as
+        the first.  All parent families are followed, and a loop in the
+        ancestry counts as an endless line.
+        """
+        self._check()
+        lengths = {}
+        for start in self._people(handles):
+            # depth-first, with the nodes of the current line on the stack
+            stack = [(start, iter(self._parents_of(start, True)))]
+            line = {start}
+            while stack:
+                node, parents = stack[-1]
+                for parent in parents:
+                    if parent in line:
+                        return False
+                    if parent not in lengths:
+                        if len(stack) >= generations:
+                            return False
+                        stack.append(
+                            (parent, iter(self._parents_of(parent, True))))
+                        line.add(parent)
+                        break
+                else:
+                    stack.pop()
+                    line.discard(node)
+                    lengths[node] = 1 + max(
+                        (lengths[parent]
+                         for parent in self._parents_of(node, True)),
+                        default=0)
+                    if len(stack) + lengths[node] > generations:
+                        return False
+        return True
+
+    def get_common_ancestry(self, handles):
+        """
+        Return the set of handles of the people who have a common ancestor
+        with any of the given people.
+
+        A person counts as their own ancestor, and a parent family without a
+        father and a mother counts as a common ancestor of its children.
+        All parent families are followed.
+        """
+        self._check()
+        ancestors = self._walk(
+            self._people(handles),
+            lambda node: self._parents_of(node, True), None)
+        found = set(ancestors)
+        for node in ancestors:
+            for family in self._parent_families[node]:
+                if (self._kinds[family] == _FAMILY and
+                        not self._parents[family]):
+                    found.update(self._child_of.get(family, ()))
+        found = self._walk(found, self._children_by_parent_family, None)
+        return {self._handles[node] for node in found}
+
+    def _children_by_parent_family(self, node):
+        """
+        The inverse of _parents_of following all parent families.
+        """
+        for family in self._parent_in.get(node, ()):
+            for child in self._child_of.get(family, ()):
+                if self._kinds[child] == _PERSON:
+                    yield child
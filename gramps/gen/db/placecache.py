@@ -0,0 +1,151 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Cache of the place hierarchy of a database.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+from collections import defaultdict
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from .signalindex import SignalIndex
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+# The values are all dropped when there are more than this
+MAX_VALUES = 50000
+
+#-------------------------------------------------------------------------
+#
+# PlaceCache
+#
+#-------------------------------------------------------------------------
+class PlaceCache(SignalIndex):
+    """
+    The places of a database, with values computed from the hierarchy above
+    them, such as location lists and titles.
+
+    Each value is stored with the handles of the places it was computed
+    from, and dropped when one of them is updated or deleted, so the values
+    of the places enclosed by a changed place are dropped too.  The cache of
+    a database follows its place signals, and is cleared after the commits
+    it is not notified of.  A proxy database emits no signals, so its cache
+    is cleared whenever the underlying database commits anything.
+    """
+
+    def __init__(self, db, signals=True):
+        """
+        :param db: the database the places are read from.
+        :type db: :class:`.DbReadBase`
+        :param signals: True to follow the place signals of the database,
+                        False to clear the cache after each commit.
+        :type signals: bool
+        """
+        self._signals = signals
+        SignalIndex.__init__(self, db, (
+            ('place-add', self._invalidate_places),
+            ('place-update', self._invalidate_places),
+            ('place-delete', self._invalidate_places),
+            ('place-rebuild', self._invalidate)) if signals else ())
+        self.clear()
+
+    def close(self):
+        """
+        Disconnect the cache from the database.
+        """
+        SignalIndex.close(self)
+        self.clear()
+
+    def clear(self):
+        """
+        Drop all the places and values.
+        """
+        self._places = {}               # handle -> place
+        self._values = {}               # key -> value
+        self._users = defaultdict(set)  # handle -> keys of values using it
+
+    def _build(self):
+        """
+        The places and values are read on demand.
+        """
+        self.clear()
+
+    def _changes(self):
+        if self._signals:
+            return SignalIndex._changes(self)
+        return (self.db.has_changed, self.db.unsignalled_commits)
+
+    def _invalidate_places(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            self._places.pop(handle, None)
+            for key in self._users.pop(handle, ()):
+                self._values.pop(key, None)
+
+    def get_place(self, handle):
+        """
+        Return the place with the given handle.
+        """
+        self._check()
+        try:
+            return self._places[handle]
+        except KeyError:
+            place = self.db.get_place_from_handle(handle)
+            self._places[handle] = place
+            return place
+
+    def lookup(self, key):
+        """
+        Return the value stored for a key, or None.
+        """
+        self._check()
+        return self._values.get(key)
+
+    def store(self, key, value, handles):
+        """
+        Store a value computed from the places with the given handles.  It is
+        dropped when one of these places changes.
+
+        :param key: a tuple identifying the value.
+        :type key: tuple
+        :param value: the value, which must not be None.
+        :param handles: the handles of the places the value depends on.
+        :type handles: list
+        """
+        self._check()
+        if len(self._values) >= MAX_VALUES:
+            self._values.clear()
+            self._users.clear()
+        self._values[key] = value
+        for handle in handles:
+            self._users[handle].add(key)
@@ -0,0 +1,92 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Base class of the indexes kept up to date from the signals of a database.
+"""
+
+#-------------------------------------------------------------------------
+#
+# SignalIndex
+#
+#-------------------------------------------------------------------------
+class SignalIndex:
+    """
+    Data derived from the tables of a database, built on first use and then
+    kept up to date from the signals of the database.
+
+    The database counts the commits it did not signal, those of batch
+    transactions or made while its signals were disabled, in
+    unsignalled_commits.  The data is built again when it is next queried
+    after such a commit, or after one of the rebuild signals it follows.
+    Other commits leave it current.
+    """
+
+    def __init__(self, db, signals):
+        """
+        :param db: the database the data is derived from.
+        :type db: :class:`.DbGeneric`
+        :param signals: the (signal name, method) pairs of the signals
+                        followed.
+        """
+        self.db = db
+        self._synced = None
+        self._keys = [db.connect(signal, method)
+                      for signal, method in signals]
+
+    def close(self):
+        """
+        Disconnect the index from the database.
+        """
+        for key in self._keys:
+            self.db.disconnect(key)
+        self._keys = []
+        self._synced = None
+
+    def _check(self):
+        """
+        Build the index if the database was changed without notifying it.
+        """
+        if not self._is_current():
+            self._build()
+            self._synced = self._changes()
+
+    def _is_current(self):
+        """
+        Return True if the index was built, and notified of all the changes
+        of the database since.
+        """
+        return self._synced is not None and self._synced == self._changes()
+
+    def _changes(self):
+        """
+        Return the count of the changes of the database the index is not
+        notified of.
+        """
+        return self.db.unsignalled_commits
+
+    def _invalidate(self):
+        self._synced = None
+
+    def _build(self):
+        """
+        Read the whole index from the database.
+        """
+        raise NotImplementedError
@@ -0,0 +1,422 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Statistics about the people and media of a database, shared by gramplets.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import os
+from collections import Counter, defaultdict, namedtuple
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..lib import Person, ChildRefType
+from ..utils.file import media_path_full
+from .signalindex import SignalIndex
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+_GENDERS = {Person.MALE: 'males',
+            Person.FEMALE: 'females',
+            Person.OTHER: 'others'}
+
+# The contribution of a person to the statistics.  mother and father are
+# (age difference, parent handle) tuples, or None.
+_PersonStats = namedtuple('_PersonStats', (
+    'gender', 'incomplete_names', 'missing_birth', 'disconnected',
+    'media_refs', 'groups', 'surnames', 'events', 'age', 'mother',
+    'father'))
+
+#-------------------------------------------------------------------------
+#
+# TreeStatistics
+#
+#-------------------------------------------------------------------------
+class TreeStatistics(SignalIndex):
+    """
+    Statistics about the people and media of a database.
+
+    The contribution of each person is kept, so that the statistics are
+    updated from the person, family, event and media signals of the
+    database by recomputing only the people affected by a change.  They are
+    built on first use, and rebuilt when the database was changed without
+    signals, as by batch transactions.  The sizes of the media files are
+    only read when first asked for.
+    """
+
+    def __init__(self, db):
+        SignalIndex.__init__(self, db, (
+            ('person-add', self._update_people),
+            ('person-update', self._update_people),
+            ('person-delete', self._delete_people),
+            ('person-rebuild', self._invalidate),
+            ('family-add', self._update_families),
+            ('family-update', self._update_families),
+            ('family-delete', self._update_families),
+            ('family-rebuild', self._invalidate),
+            ('event-update', self._update_events),
+            ('event-delete', self._update_events),
+            ('event-rebuild', self._invalidate),
+            ('media-add', self._update_media),
+            ('media-update', self._update_media),
+            ('media-delete', self._delete_media),
+            ('media-rebuild', self._invalidate_media)))
+        self._clear()
+        self._media = None              # handle -> (path, size)
+        self._media_synced = None
+
+    def close(self):
+        """
+        Disconnect the statistics from the database.
+        """
+        SignalIndex.close(self)
+        self._clear()
+        self._media = None
+
+    def _clear(self):
+        self._people = {}                   # handle -> _PersonStats
+        self._event_people = defaultdict(set)   # event -> people using it
+        self._counts = Counter()
+        self._groups = defaultdict(set)     # group name -> people
+        self._surnames = Counter()          # surname -> number of names
+
+    #---------------------------------------------------------------------
+    #
+    # Maintenance
+    #
+    #---------------------------------------------------------------------
+    def _build(self):
+        self._clear()
+        for person in self.db.iter_people():
+            self._set_person(person.handle, self._compute(person))
+
+    def _invalidate_media(self):
+        self._media = None
+
+    def _update_people(self, handles):
+        if not self._is_current():
+            return
+        self._recompute(self._with_children(handles))
+
+    def _delete_people(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            self._set_person(handle, None)
+
+    def _update_families(self, handles):
+        if not self._is_current():
+            return
+        people = set()
+        for handle in handles:
+            family = self.db.get_family_from_handle(handle)
+            if family:
+                people.update(ref.ref for ref in family.get_child_ref_list())
+        self._recompute(people)
+
+    def _update_events(self, handles):
+        if not self._is_current():
+            return
+        people = set()
+        for handle in handles:
+            people.update(self._event_people.get(handle, ()))
+        self._recompute(self._with_children(people))
+
+    def _with_children(self, handles):
+        """
+        Return the given people and their children, whose age differences
+        with their parents depend on them.
+        """
+        people = set(handles)
+        for handle in handles:
+            person = self.db.get_person_from_handle(handle)
+            if person is None:
+                continue
+            for family_handle in person.get_family_handle_list():
+                family = self.db.get_family_from_handle(family_handle)
+                if family:
+                    people.update(ref.ref for ref in family.get_child_ref_list())
+        return people
+
+    def _recompute(self, handles):
+        for handle in handles:
+            person = self.db.get_person_from_handle(handle)
+            self._set_person(handle, person and self._compute(person))
+
+    def _set_person(self, handle, stats):
+        """
+        Replace the contribution of a person to the statistics.
+        """
+        old = self._people.pop(handle, None)
+        if old is not None:
+            self._add(handle, old, -1)
+        if stats is not None:
+            self._people[handle] = stats
+            self._add(handle, stats, 1)
+
+    def _add(self, handle, stats, sign):
+        counts = self._counts
+        counts['people'] += sign
+        counts[_GENDERS.get(stats.gender, 'unknowns')] += sign
+        counts['incomplete_names'] += sign * stats.incomplete_names
+        counts['missing_birth'] += sign * stats.missing_birth
+        counts['disconnected'] += sign * stats.disconnected
+        if stats.media_refs:
+            counts['with_media'] += sign
+            counts['media_refs'] += sign * stats.media_refs
+        for event_handle in stats.events:
+            if sign > 0:
+                self._event_people[event_handle].add(handle)
+            else:
+                self._event_people[event_handle].discard(handle)
+                if not self._event_people[event_handle]:
+                    del self._event_people[event_handle]
+        for group in stats.groups:
+            if sign > 0:
+                self._groups[group].add(handle)
+            else:
+                self._groups[group].discard(handle)
+                if not self._groups[group]:
+                    del self._groups[group]
+        for surname in stats.surnames:
+            self._surnames[surname] += sign
+            if not self._surnames[surname]:
+                del self._surnames[surname]
+
+    def _compute(self, person):
+        """
+        Return the contribution of a person to the statistics.
+        """
+        names = [person.get_primary_name()] + person.get_alternate_names()
+        incomplete = 0
+        for name in names:
+            if name.get_first_name().strip() == "":
+                incomplete += 1
+            elif name.get_surname_list():
+                for surname in name.get_surname_list():
+                    if surname.get_surname().strip() == "":
+                        incomplete += 1
+            else:
+                incomplete += 1
+
+        events = []
+        birth = self._get_event(person.get_birth_ref(), events)
+        death = self._get_event(person.get_death_ref(), events)
+
+        age = mother = father = None
+        birth_date = self._valid_date(birth)
+        if birth_date:
+            death_date = self._valid_date(death)
+            if death_date:
+                age = (death_date - birth_date).tuple()[0]
+                if age < 0:
+                    age = None
+            mother_handle, father_handle = self._birth_parents(person)
+            mother = self._parent_diff(mother_handle, birth_date, events)
+            father = self._parent_diff(father_handle, birth_date, events)
+
+        return _PersonStats(
+            gender=person.get_gender(),
+            incomplete_names=incomplete,
+            missing_birth=(birth is None or
+                           birth.get_date_object().is_empty()),
+            disconnected=(not person.get_main_parents_family_handle() and
+                          not person.get_family_handle_list()),
+            media_refs=len(person.get_media_list()),
+            groups=frozenset(name.get_group_name().strip() for name in names),
+            surnames=tuple(set(name.get_surname().strip() for name in names)
+                           - {""}),
+            events=tuple(events),
+            age=age,
+            mother=mother,
+            father=father)
+
+    def _get_event(self, ref, events):
+        if ref:
+            events.append(ref.ref)
+            return self.db.get_event_from_handle(ref.ref)
+        return None
+
+    @staticmethod
+    def _valid_date(event):
+        if event:
+            date = event.get_date_object()
+            if date.is_valid():
+                return date
+        return None
+
+    def _birth_parents(self, person):
+        """
+        Find the handles of the biological parents of a person.
+        """
+        m_handle = None
+        f_handle = None
+        for family_handle in person.get_parent_family_handle_list():
+            family = self.db.get_family_from_handle(family_handle)
+            if family:
+                childrel = [(ref.get_mother_relation(),
+                             ref.get_father_relation()) for ref in
+                            family.get_child_ref_list()
+                            if ref.ref == person.handle]
+                if not childrel:
+                    continue
+                if childrel[0][0] == ChildRefType.BIRTH:
+                    m_handle = family.get_mother_handle()
+                if childrel[0][1] == ChildRefType.BIRTH:
+                    f_handle = family.get_father_handle()
+        return m_handle, f_handle
+
+    def _parent_diff(self, handle, birth_date, events):
+        """
+        Return the age of a parent at the birth of a child, with the parent
+        handle.  The birth event of the parent is added to events.
+        """
+        if not handle:
+            return None
+        parent = self.db.get_person_from_handle(handle)
+        if parent is None:
+            return None
+        bdate = self._valid_date(self._get_event(parent.get_birth_ref(),
+                                                 events))
+        if bdate:
+            diff = (birth_date - bdate).tuple()[0]
+            if diff >= 0:
+                return (diff, handle)
+        return None
+
+    #---------------------------------------------------------------------
+    #
+    # Media
+    #
+    #---------------------------------------------------------------------
+    def _media_size(self, media):
+        """
+        Return the size of the file of a media object, or None if it is
+        missing.
+        """
+        try:
+            return os.path.getsize(media_path_full(self.db, media.get_path()))
+        except OSError:
+            return None
+
+    def _update_media(self, handles):
+        if self._media is None:
+            return
+        for handle in handles:
+            media = self.db.get_media_from_handle(handle)
+            if media:
+                self._media[handle] = (media.get_path(),
+                                       self._media_size(media))
+
+    def _delete_media(self, handles):
+        if self._media is None:
+            return
+        for handle in handles:
+            self._media.pop(handle, None)
+
+    #---------------------------------------------------------------------
+    #
+    # Queries
+    #
+    #---------------------------------------------------------------------
+    def get_person_counts(self):
+        """
+        Return a dictionary of counts about the people of the database, with
+        the keys: people, males, females, others, unknowns,
+        incomplete_names, missing_birth, disconnected, with_media and
+        media_refs.
+        """
+        self._check()
+        return {key: self._counts[key] for key in (
+            'people', 'males', 'females', 'others', 'unknowns',
+            'incomplete_names', 'missing_birth', 'disconnected',
+            'with_media', 'media_refs')}
+
+    def get_surname_groups(self):
+        """
+        Return a list of (number of people, group name, handle of one of the
+        people) tuples for the surname groups of all the names of people,
+        the largest groups first.
+        """
+        self._check()
+        return sorted(((len(handles), group, next(iter(handles)))
+                       for group, handles in self._groups.items()),
+                      reverse=True)
+
+    def get_number_of_surnames(self):
+        """
+        Return the number of distinct non-empty surnames of people.
+        """
+        self._check()
+        return len(self._surnames)
+
+    def get_media_sizes(self):
+        """
+        Return the total size in bytes of the media files, and the paths of
+        the media objects whose file is missing.
+        """
+        if (self._media is None or
+                self._media_synced != self.db.unsignalled_commits):
+            self._media = {media.handle: (media.get_path(),
+                                          self._media_size(media))
+                           for media in self.db.iter_media()}
+            self._media_synced = self.db.unsignalled_commits
+        total = 0
+        missing = []
+        for path, size in self._media.values():
+            if size is None:
+                missing.append(path)
+            else:
+                total += size
+        return total, missing
+
+    def get_age_statistics(self):
+        """
+        Return dictionaries of the lifespans of people, and of the ages of
+        mothers and fathers at the birth of their children, as
+        (counts, handles) tuples: counts maps an age to the number of
+        people, and handles maps it to a list of their handles.
+        """
+        self._check()
+        result = []
+        for field in ('age', 'mother', 'father'):
+            counts = defaultdict(int)
+            handles = defaultdict(list)
+            for handle, stats in self._people.items():
+                value = getattr(stats, field)
+                if value is None:
+                    continue
+                if field != 'age':
+                    value, handle = value
+                counts[value] += 1
+                handles[value].append(handle)
+            result.append((counts, handles))
+        return tuple(result)
@@ -0,0 +1,293 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Append-only log of the undo records of a Family Tree.
+
+The log starts with a header holding the record number of its first record.
+Each entry is a kind, the length and the CRC of its payload, and the payload
+compressed with zlib.  Record entries hold the pickled records added to the
+transactions.  Mark entries are written when a transaction is committed,
+undone or redone, so that the history of a session which did not close can
+be read back.  Only the offsets of the record entries are kept in memory.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import io
+import logging
+import os
+import pickle
+import struct
+import zlib
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from .dbconst import DBLOGNAME
+
+LOG = logging.getLogger(DBLOGNAME)
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+_MAGIC = b"GRAMPS-UNDO-1\n"
+_HEADER = struct.Struct("<Q")           # record number of the first record
+_ENTRY = struct.Struct("<BII")          # kind, length, crc32
+_START = len(_MAGIC) + _HEADER.size
+
+RECORD = 0
+COMMIT = 1      # mark with the first and last record numbers, the
+                # description and the time of a transaction committed
+UNDO = 2        # mark of the last transaction committed or redone undone
+REDO = 3        # mark of the last transaction undone redone
+
+# The log is rewritten without the records discarded once they take more
+# than this, and more than the records kept.
+COMPACT_SIZE = 1 << 20
+
+#-------------------------------------------------------------------------
+#
+# UndoLog
+#
+#-------------------------------------------------------------------------
+class UndoLog:
+    """
+    The undo records of a database, by record number, in a file or, without
+    a path, in memory.
+    """
+
+    def __init__(self, path=None, level=1):
+        """
+        :param path: the path of the log, or None to keep it in memory.
+        :type path: str
+        :param level: the zlib compression level of the records.
+        :type level: int
+        """
+        self.path = path
+        self.level = level
+        self._file = None
+        self._base = 0              # record number of self._offsets[0]
+        self._offsets = []          # offsets of the record entries
+        self._end = _START
+        self._discarded = 0         # bytes taken by the records discarded
+
+    def open(self):
+        """
+        Open the log, and return the (kind, value) marks of a log left by a
+        session which did not close.  Entries after the last mark, or which
+        cannot be read, are removed.
+        """
+        if self.path is None:
+            self._file = io.BytesIO()
+            self._reset(0)
+            return []
+        try:
+            self._file = open(self.path, "r+b")
+        except FileNotFoundError:
+            self._file = open(self.path, "w+b")
+        try:
+            return self._recover()
+        except (OSError, ValueError, struct.error):
+            LOG.warning("Undo log %s cannot be read, it is discarded",
+                        self.path, exc_info=True)
+            self._reset(0)
+            return []
+
+    def _recover(self):
+        """
+        Read the entries of an existing log.
+        """
+        if self._file.read(len(_MAGIC)) != _MAGIC:
+            self._reset(0)
+            return []
+        (self._base,) = _HEADER.unpack(self._file.read(_HEADER.size))
+        marks = []
+        offsets = []
+        good_records = 0
+        self._end = offset = _START
+        while True:
+            entry = self._read_entry(offset)
+            if entry is None:
+                break
+            kind, payload, next_offset = entry
+            if kind == RECORD:
+                offsets.append(offset)
+            else:
+                marks.append((kind, pickle.loads(payload)))
+                good_records = len(offsets)
+                self._end = next_offset
+            offset = next_offset
+        self._offsets = offsets[:good_records]
+        self._file.truncate(self._end)
+        self._file.flush()
+        return marks
+
+    def _reset(self, base):
+        """
+        Empty the log, with the given record number for its next record.
+        """
+        self._base = base
+        self._offsets = []
+        self._discarded = 0
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(_MAGIC + _HEADER.pack(base))
+        self._file.flush()
+        self._end = _START
+
+    def _read_entry(self, offset):
+        """
+        Return the kind, the uncompressed payload and the offset of the next
+        entry of the entry at an offset, or None if it is incomplete or
+        damaged.
+        """
+        self._file.seek(offset)
+        header = self._file.read(_ENTRY.size)
+        if len(header) < _ENTRY.size:
+            return None
+        kind, length, crc = _ENTRY.unpack(header)
+        data = self._file.read(length)
+        if len(data) < length or zlib.crc32(data) != crc:
+            return None
+        try:
+            payload = zlib.decompress(data)
+        except zlib.error:
+            return None
+        return kind, payload, offset + _ENTRY.size + length
+
+    def _write_entry(self, kind, payload):
+        """
+        Append an entry to the log, and return its offset.
+        """
+        data = zlib.compress(payload, self.level)
+        offset = self._end
+        self._file.seek(offset)
+        self._file.write(_ENTRY.pack(kind, len(data), zlib.crc32(data)))
+        self._file.write(data)
+        self._end = self._file.tell()
+        return offset
+
+    def append(self, data):
+        """
+        Add a pickled record, and return its record number.
+        """
+        self._offsets.append(self._write_entry(RECORD, data))
+        return len(self) - 1
+
+    def mark(self, kind, value=None):
+        """
+        Add a mark of a change of the history, and write the log out.
+        """
+        self._write_entry(kind, pickle.dumps(value, 1))
+        self._file.flush()
+
+    def __getitem__(self, recno):
+        """
+        Return the pickled record with a record number.
+        """
+        index = recno - self._base
+        if index < 0:
+            raise IndexError("undo record %d was discarded" % recno)
+        entry = self._read_entry(self._offsets[index])
+        if entry is None:
+            raise IndexError("undo record %d cannot be read" % recno)
+        return entry[1]
+
+    @property
+    def first(self):
+        """
+        The record number of the first record kept.
+        """
+        return self._base
+
+    def __len__(self):
+        """
+        Return the record number of the next record.
+        """
+        return self._base + len(self._offsets)
+
+    def discard(self, recno):
+        """
+        Discard the records before a record number.  The log is rewritten
+        once the records discarded take enough space.
+        """
+        count = min(recno - self._base, len(self._offsets))
+        if count <= 0:
+            return
+        if count == len(self._offsets):
+            self._reset(self._base + count)
+            return
+        self._discarded += self._offsets[count] - self._offsets[0]
+        self._base += count
+        del self._offsets[:count]
+        if (self._discarded > COMPACT_SIZE and
+                self._discarded > self._end - self._offsets[0]):
+            self._compact()
+
+    def _compact(self):
+        """
+        Rewrite the log without the records discarded.
+        """
+        start = self._offsets[0]
+        self._file.seek(start)
+        data = self._file.read(self._end - start)
+        header = _MAGIC + _HEADER.pack(self._base)
+        if self.path is None:
+            self._file = io.BytesIO(header + data)
+        else:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "wb") as temp_file:
+                temp_file.write(header + data)
+            self._file.close()
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, "r+b")
+        shift = start - _START
+        self._offsets = [offset - shift for offset in self._offsets]
+        self._end = _START + len(data)
+        self._discarded = 0
+
+    def clear(self):
+        """
+        Discard all the records.
+        """
+        self._reset(len(self))
+
+    def close(self):
+        """
+        Close the log, and remove its file.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self._offsets = []
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
@@ -30,6 +30,7 @@ Database utilites
 #
 #------------------------------------------------------------------------
 import os
+import json
 import logging
 
 #------------------------------------------------------------------------
@@ -41,7 +42,8 @@ from ..plug import BasePluginManager
 from ..const import PLUGINS_DIR, USER_PLUGINS
 from ..constfunc import win, get_env_var
 from ..config import config
-from .dbconst import DBLOGNAME, DBLOCKFN, DBBACKEND
+from .dbconst import (DBLOGNAME, DBLOCKFN, DBBACKEND, DBSUMMARYFN,
+                      DBUNDOFN)
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
@@ -52,6 +54,8 @@ _ = glocale.translation.gettext
 #-------------------------------------------------------------------------
 _LOG = logging.getLogger(DBLOGNAME)
 
+SUMMARY_VERSION = 1
+
 def make_database(plugin_id):
     """
     Make a database, given a plugin id.
@@ -231,3 +235,94 @@ def write_lock_file(name):
         # Save only the username and host, so the massage can be
         # printed with correct locale in DbManager.py when a lock is found
         f.write(text)
+
+#-------------------------------------------------------------------------
+#
+# Summary of a tree
+#
+#-------------------------------------------------------------------------
+def _summary_items():
+    """
+    Return the (key, label) pairs of the counts in the summary of a tree.
+    The keys are the suffixes of the get_number_of_* methods.
+    """
+    return (('people', _("Number of people")),
+            ('families', _("Number of families")),
+            ('sources', _("Number of sources")),
+            ('citations', _("Number of citations")),
+            ('events', _("Number of events")),
+            ('media', _("Number of media")),
+            ('places', _("Number of places")),
+            ('repositories', _("Number of repositories")),
+            ('notes', _("Number of notes")),
+            ('tags', _("Number of tags")))
+
+def get_summary_counts(db):
+    """
+    Return a dictionary of the numbers of objects and the schema version of
+    an open database, as written to the summary file of the tree.
+    """
+    counts = {key: db.method("get_number_of_%s", key)()
+              for key, label in _summary_items()}
+    counts['schema'] = ".".join([str(v) for v in db.VERSION])
+    return counts
+
+def summary_from_counts(counts):
+    """
+    Return the summary items of :meth:`.DbReadBase.get_summary` for the
+    counts returned by :func:`get_summary_counts`.
+    """
+    summary = {label: counts[key] for key, label in _summary_items()}
+    summary[_("Schema version")] = counts['schema']
+    return summary
+
+def _get_file_stamps(dirpath):
+    """
+    Return the modification times and sizes of the files of a tree, which
+    change with its data.
+    """
+    stamps = {}
+    with os.scandir(dirpath) as entries:
+        for entry in entries:
+            if (entry.name != DBLOCKFN and
+                    not entry.name.startswith((DBSUMMARYFN, DBUNDOFN)) and
+                    entry.is_file()):
+                stat = entry.stat()
+                stamps[entry.name] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+def write_summary_file(dirpath, counts):
+    """
+    Write the summary of a closed tree beside its data, with the state of
+    its files.
+    """
+    temp_path = os.path.join(dirpath, DBSUMMARYFN + ".tmp")
+    try:
+        data = {'version': SUMMARY_VERSION,
+                'counts': counts,
+                'files': _get_file_stamps(dirpath)}
+        with open(temp_path, "w", encoding='utf8') as summary_file:
+            json.dump(data, summary_file)
+        os.replace(temp_path, os.path.join(dirpath, DBSUMMARYFN))
+    except OSError as err:
+        _LOG.warning("cannot write the summary of %s: %s", dirpath, err)
+
+def read_summary_file(dirpath):
+    """
+    Return the counts written by :func:`write_summary_file` for a tree, or
+    None if there are none, or its files changed since.
+    """
+    try:
+        with open(os.path.join(dirpath, DBSUMMARYFN),
+                  encoding='utf8') as summary_file:
+            data = json.load(summary_file)
+        if (data.get('version') != SUMMARY_VERSION or
+                data.get('files') != _get_file_stamps(dirpath)):
+            return None
+        counts = data['counts']
+        if any(key not in counts for key in ['schema'] +
+               [key for key, label in _summary_items()]):
+            return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return counts
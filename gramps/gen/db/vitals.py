@@ -0,0 +1,329 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Index of the vital facts of the people and families in a database.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+from collections import namedtuple
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ..lib import Date, EventType, EventRoleType
+from .signalindex import SignalIndex
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+# Positions in the serialized data of people, families, events and
+# references
+PERSON_GENDER = 2
+PERSON_DEATH_REF_INDEX = 5
+PERSON_BIRTH_REF_INDEX = 6
+PERSON_EVENT_REF_LIST = 7
+PERSON_FAMILY_LIST = 8
+FAMILY_FATHER_HANDLE = 2
+FAMILY_MOTHER_HANDLE = 3
+FAMILY_CHILD_REF_LIST = 4
+FAMILY_EVENT_REF_LIST = 6
+EVENT_TYPE = 2
+EVENT_DATE = 3
+EVENT_REF_REF = 3
+EVENT_REF_ROLE = 4
+CHILD_REF_REF = 3
+CHILD_REF_FATHER_RELATION = 4
+CHILD_REF_MOTHER_RELATION = 5
+
+_BIRTH_FALLBACKS = frozenset((EventType.STILLBIRTH, EventType.BAPTISM,
+                              EventType.CHRISTEN))
+_DEATH_FALLBACKS = frozenset((EventType.STILLBIRTH, EventType.BURIAL,
+                              EventType.CREMATION, EventType.CAUSE_DEATH))
+_FAMILY_ROLES = frozenset((EventRoleType.FAMILY, EventRoleType.PRIMARY))
+
+# The date of an event without a date, which is serialized as None
+EMPTY_DATE = ()
+
+# The vital facts of a person.  The dates are serialized dates, EMPTY_DATE
+# for an event without a date, or None if there is no such event: birth and
+# death are the dates of the birth and death events of the person,
+# birth_fallback and death_fallback the dates of the first primary events of
+# a fallback type, like a baptism or a burial.
+PersonVitals = namedtuple('PersonVitals', (
+    'gender', 'birth', 'death', 'birth_fallback', 'death_fallback',
+    'families'))
+
+# The vital facts of a family.  marriage and divorce are the dates of the
+# last marriage and divorce events with a family or primary role, or None.
+# children are (child handle, father relation, mother relation) tuples, the
+# relations being ChildRefType values.
+FamilyVitals = namedtuple('FamilyVitals', (
+    'father', 'mother', 'marriage', 'divorce', 'children'))
+
+#-------------------------------------------------------------------------
+#
+# VitalIndex
+#
+#-------------------------------------------------------------------------
+class VitalIndex(SignalIndex):
+    """
+    The vital facts of all the people and families in a database, for the
+    reports and tools which look at the dates of every person.
+
+    The facts are read from the serialized data, so no objects are created.
+    The index is built on first use and kept up to date from the person,
+    family and event signals of the database.  Changes made while signals
+    are disabled, or by batch transactions, which do not emit signals,
+    cause it to be rebuilt when it is next queried.
+    """
+
+    def __init__(self, db):
+        SignalIndex.__init__(self, db, (
+            ('person-add', self._update_people),
+            ('person-update', self._update_people),
+            ('person-delete', self._delete_people),
+            ('person-rebuild', self._invalidate),
+            ('family-add', self._update_families),
+            ('family-update', self._update_families),
+            ('family-delete', self._delete_families),
+            ('family-rebuild', self._invalidate),
+            ('event-update', self._update_events),
+            ('event-delete', self._update_events),
+            ('event-rebuild', self._invalidate)))
+        self._clear()
+
+    def close(self):
+        """
+        Disconnect the index from the database.
+        """
+        SignalIndex.close(self)
+        self._clear()
+
+    def _clear(self):
+        self._people = {}           # handle -> PersonVitals
+        self._families = {}         # handle -> FamilyVitals
+
+    #---------------------------------------------------------------------
+    #
+    # Maintenance
+    #
+    #---------------------------------------------------------------------
+    def _build(self):
+        """
+        Read the people and families, and then the events they need in one
+        pass over the events.
+        """
+        self._clear()
+        people = []
+        families = []
+        needed = set()
+        with self.db.get_person_cursor() as cursor:
+            for handle, data in cursor:
+                people.append((handle, data))
+                needed.update(ref[EVENT_REF_REF]
+                              for ref in data[PERSON_EVENT_REF_LIST])
+        with self.db.get_family_cursor() as cursor:
+            for handle, data in cursor:
+                families.append((handle, data))
+                needed.update(ref[EVENT_REF_REF]
+                              for ref in data[FAMILY_EVENT_REF_LIST])
+        events = {}
+        with self.db.get_event_cursor() as cursor:
+            for handle, data in cursor:
+                if handle in needed:
+                    events[handle] = (data[EVENT_TYPE][0],
+                                      data[EVENT_DATE] or EMPTY_DATE)
+        for handle, data in people:
+            self._people[handle] = self._compute_person(data, events.get)
+        for handle, data in families:
+            self._families[handle] = self._compute_family(data, events.get)
+
+    def _get_event(self, handle):
+        """
+        Return the type and the serialized date of an event, or None.
+        """
+        data = self.db.get_raw_event_data(handle)
+        if data:
+            return (data[EVENT_TYPE][0], data[EVENT_DATE] or EMPTY_DATE)
+        return None
+
+    def _update_people(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            self._update_person(handle)
+
+    def _update_person(self, handle):
+        data = self.db.get_raw_person_data(handle)
+        if data:
+            self._people[handle] = self._compute_person(data, self._get_event)
+        else:
+            self._people.pop(handle, None)
+
+    def _delete_people(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            self._people.pop(handle, None)
+
+    def _update_families(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            self._update_family(handle)
+
+    def _update_family(self, handle):
+        data = self.db.get_raw_family_data(handle)
+        if data:
+            self._families[handle] = self._compute_family(data,
+                                                          self._get_event)
+        else:
+            self._families.pop(handle, None)
+
+    def _delete_families(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            self._families.pop(handle, None)
+
+    def _update_events(self, handles):
+        if not self._is_current():
+            return
+        for handle in handles:
+            for class_name, ref_handle in self.db.find_backlink_handles(
+                    handle, ['Person', 'Family']):
+                if class_name == 'Person':
+                    self._update_person(ref_handle)
+                else:
+                    self._update_family(ref_handle)
+
+    @staticmethod
+    def _compute_person(data, get_event):
+        """
+        Return the vital facts of a person from its serialized data.
+
+        :param get_event: a function returning the type and the serialized
+                          date of an event from its handle, or None.
+        """
+        refs = data[PERSON_EVENT_REF_LIST]
+        dates = []
+        for index in (data[PERSON_BIRTH_REF_INDEX],
+                      data[PERSON_DEATH_REF_INDEX]):
+            event = None
+            if 0 <= index < len(refs):
+                event = get_event(refs[index][EVENT_REF_REF])
+            dates.append(event and event[1])
+        birth_fallback = death_fallback = None
+        for ref in refs:
+            if ref[EVENT_REF_ROLE][0] != EventRoleType.PRIMARY:
+                continue
+            event = get_event(ref[EVENT_REF_REF])
+            if event is None:
+                continue
+            if birth_fallback is None and event[0] in _BIRTH_FALLBACKS:
+                birth_fallback = event[1]
+            if death_fallback is None and event[0] in _DEATH_FALLBACKS:
+                death_fallback = event[1]
+        return PersonVitals(gender=data[PERSON_GENDER],
+                            birth=dates[0],
+                            death=dates[1],
+                            birth_fallback=birth_fallback,
+                            death_fallback=death_fallback,
+                            families=tuple(data[PERSON_FAMILY_LIST]))
+
+    @staticmethod
+    def _compute_family(data, get_event):
+        """
+        Return the vital facts of a family from its serialized data.
+        """
+        marriage = divorce = None
+        for ref in data[FAMILY_EVENT_REF_LIST]:
+            if ref[EVENT_REF_ROLE][0] not in _FAMILY_ROLES:
+                continue
+            event = get_event(ref[EVENT_REF_REF])
+            if event is None:
+                continue
+            if event[0] == EventType.MARRIAGE:
+                marriage = event[1]
+            elif event[0] == EventType.DIVORCE:
+                divorce = event[1]
+        return FamilyVitals(
+            father=data[FAMILY_FATHER_HANDLE],
+            mother=data[FAMILY_MOTHER_HANDLE],
+            marriage=marriage,
+            divorce=divorce,
+            children=tuple((ref[CHILD_REF_REF],
+                            ref[CHILD_REF_FATHER_RELATION][0],
+                            ref[CHILD_REF_MOTHER_RELATION][0])
+                           for ref in data[FAMILY_CHILD_REF_LIST]))
+
+    #---------------------------------------------------------------------
+    #
+    # Queries
+    #
+    #---------------------------------------------------------------------
+    def get_person(self, handle):
+        """
+        Return the :class:`PersonVitals` of a person, or None if there is no
+        such person.
+        """
+        self._check()
+        return self._people.get(handle)
+
+    def get_family(self, handle):
+        """
+        Return the :class:`FamilyVitals` of a family, or None if there is no
+        such family.
+        """
+        self._check()
+        return self._families.get(handle)
+
+    def get_family_handles(self):
+        """
+        Return the handles of the families, in the order they were read from
+        the database.
+        """
+        self._check()
+        return list(self._families)
+
+#-------------------------------------------------------------------------
+#
+# Functions
+#
+#-------------------------------------------------------------------------
+def make_date(data):
+    """
+    Return the :class:`.Date` of a date of the index, or None.
+    """
+    if data is None:
+        return None
+    date = Date()
+    if data:
+        date.unserialize(data)
+    return date
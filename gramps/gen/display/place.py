@@ -38,7 +38,7 @@ import xml.dom.minidom
 from ..const import PLACE_FORMATS, GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 from ..config import config
-from ..utils.location import get_location_list
+from ..utils.location import get_location_chain, get_location_list
 from ..lib import PlaceType
 
 #-------------------------------------------------------------------------
@@ -79,6 +79,10 @@ class PlaceDisplay:
             return ""
         place_handle = event.get_place_handle()
         if place_handle:
+            cache = db.get_place_cache()
+            if cache is not None:
+                return self._display_cached(db, cache, place_handle,
+                                            event.get_date_object(), fmt)
             place = db.get_place_from_handle(place_handle)
             return self.display(db, place, event.get_date_object(), fmt)
         else:
@@ -95,50 +99,81 @@ class PlaceDisplay:
             pf = self.place_formats[fmt]
             lang = pf.language
             all_places = get_location_list(db, place, date, lang)
-
-            # Apply format string to place list
-            index = _find_populated_place(all_places)
-            places = []
-            for slice in pf.levels.split(','):
-                parts = slice.split(':')
-                if len(parts) == 1:
-                    offset = _get_offset(parts[0], index)
-                    if offset is not None:
-                        try:
-                            places.append(all_places[offset])
-                        except IndexError:
-                            pass
-                elif len(parts) == 2:
-                    start = _get_offset(parts[0], index)
-                    end = _get_offset(parts[1], index)
-                    if start is None:
-                        places.extend(all_places[:end])
-                    elif end is None:
-                        places.extend(all_places[start:])
-                    else:
-                        places.extend(all_places[start:end])
-
-            if pf.street:
-                types = [item[1] for item in places]
-                try:
-                    idx = types.index(PlaceType.NUMBER)
-                except ValueError:
-                    idx = None
-                if idx is not None and len(places) > idx+1:
-                    if pf.street == 1:
-                        combined = (places[idx][0] + ' ' + places[idx+1][0],
-                                    places[idx+1][1])
-                    else:
-                        combined = (places[idx+1][0] + ' ' + places[idx][0],
-                                    places[idx+1][1])
-                    places = places[:idx] + [combined] + places[idx+2:]
-
-            names = [item[0] for item in places]
-            if pf.reverse:
-                names.reverse()
-
-            # TODO for Arabic, should the next line's comma be translated?
-            return ", ".join(names)
+            return self._format(pf, all_places)
+
+    def _display_cached(self, db, cache, handle, date, fmt):
+        """
+        Return the title of the place with the given handle, which is kept in
+        the place cache of the database until the place or one of the places
+        enclosing it changes.
+        """
+        if not config.get('preferences.place-auto'):
+            place = cache.get_place(handle)
+            return place.title if place else ""
+        if fmt == -1:
+            fmt = config.get('preferences.place-format')
+        pf = self.place_formats[fmt]
+        key = ('title', handle, None if date is None else date.serialize(),
+               pf.levels, pf.language, pf.street, pf.reverse)
+        title = cache.lookup(key)
+        if title is None:
+            place = cache.get_place(handle)
+            if not place:
+                return ""
+            handles, all_places = get_location_chain(db, place, date,
+                                                     pf.language)
+            title = self._format(pf, all_places)
+            cache.store(key, title, handles)
+        return title
+
+    def _format(self, pf, all_places):
+        """
+        Return the title of a place in the given format, from the list of
+        names returned by get_location_list.
+        """
+        # Apply format string to place list
+        index = _find_populated_place(all_places)
+        places = []
+        for slice in pf.levels.split(','):
+            parts = slice.split(':')
+            if len(parts) == 1:
+                offset = _get_offset(parts[0], index)
+                if offset is not None:
+                    try:
+                        places.append(all_places[offset])
+                    except IndexError:
+                        pass
+            elif len(parts) == 2:
+                start = _get_offset(parts[0], index)
+                end = _get_offset(parts[1], index)
+                if start is None:
+                    places.extend(all_places[:end])
+                elif end is None:
+                    places.extend(all_places[start:])
+                else:
+                    places.extend(all_places[start:end])
+
+        if pf.street:
+            types = [item[1] for item in places]
+            try:
+                idx = types.index(PlaceType.NUMBER)
+            except ValueError:
+                idx = None
+            if idx is not None and len(places) > idx+1:
+                if pf.street == 1:
+                    combined = (places[idx][0] + ' ' + places[idx+1][0],
+                                places[idx+1][1])
+                else:
+                    combined = (places[idx+1][0] + ' ' + places[idx][0],
+                                places[idx+1][1])
+                places = places[:idx] + [combined] + places[idx+2:]
+
+        names = [item[0] for item in places]
+        if pf.reverse:
+            names.reverse()
+
+        # TODO for Arabic, should the next line's comma be translated?
+        return ", ".join(names)
 
     def get_formats(self):
         return self.place_formats
@@ -24,6 +24,13 @@
 Package providing filtering framework for Gramps.
 """
 
+#------------------------------------------------------------------------
+#
+# Standard Python modules
+#
+#------------------------------------------------------------------------
+from collections.abc import Sized
+
 #------------------------------------------------------------------------
 #
 # Gramps imports
@@ -42,6 +49,10 @@ from ..lib.tag import Tag
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 
+# Below this number of handles it is cheaper to apply the rules to the
+# objects than to ask the database.
+SQL_MIN_HANDLES = 1000
+
 #-------------------------------------------------------------------------
 #
 # GenericFilter
@@ -230,6 +241,89 @@ class GenericFilter:
     def or_test(self, db, person):
         return any(rule.apply(db, person) for rule in self.flist)
 
+    def check_sql(self, db, id_list, user=None, tupleind=None, tree=False):
+        """
+        Apply the filter with the help of the database.
+
+        The rules which can be expressed in SQL are combined into one query,
+        the others are only applied to the objects whose outcome is not
+        already decided by it. Return None if the database cannot help.
+        """
+        if tree or self.logical_op not in ('and', 'or'):
+            return None
+        if id_list is not None and (not isinstance(id_list, Sized) or
+                                    len(id_list) < SQL_MIN_HANDLES):
+            # an iterator can only be read once, by the rules
+            return None
+        clauses = []
+        values = []
+        flist = []
+        for rule in self.flist:
+            sql = rule.to_sql()
+            if sql is None:
+                flist.append(rule)
+            else:
+                clauses.append('(%s)' % sql[0])
+                values.extend(sql[1])
+        if not clauses:
+            return None
+        check_and = self.logical_op == 'and'
+        class_name = self.make_obj().__class__.__name__
+        sql_handles = db.select_handles(
+            class_name, (' AND ' if check_and else ' OR ').join(clauses),
+            values)
+        if sql_handles is None:
+            return None
+
+        if id_list is None and check_and and not self.invert:
+            # Only the objects selected by the database can match.
+            if not flist:
+                return sql_handles
+            id_list = sql_handles
+            tupleind = None
+
+        sql_handles = set(sql_handles)
+        final_list = []
+        if user:
+            user.begin_progress(_('Filter'), _('Applying ...'),
+                                self.get_number(db) if id_list is None
+                                else len(id_list))
+
+        def test(handle, get_obj):
+            # For 'and' the database rejects, for 'or' it accepts objects.
+            if (handle in sql_handles) != check_and:
+                return not check_and
+            if not flist:
+                return check_and
+            obj = get_obj()
+            if check_and:
+                return all(rule.apply(db, obj) for rule in flist if obj)
+            return any(rule.apply(db, obj) for rule in flist)
+
+        if id_list is None:
+            with self.get_cursor(db) as cursor:
+                for handle, data in cursor:
+                    if user:
+                        user.step_progress()
+                    obj = self.make_obj()
+                    if test(handle,
+                            lambda: obj.unserialize(data)) != self.invert:
+                        final_list.append(handle)
+        else:
+            for data in id_list:
+                if tupleind is None:
+                    handle = data
+                else:
+                    handle = data[tupleind]
+                if user:
+                    user.step_progress()
+                if test(handle, lambda: self.find_from_handle(
+                        db, handle)) != self.invert:
+                    final_list.append(data)
+        if user:
+            user.end_progress()
+        return final_list
+
     def get_check_func(self):
         try:
             m = getattr(self, 'check_' + self.logical_op)
@@ -260,9 +354,13 @@ class GenericFilter:
         m = self.get_check_func()
         for rule in self.flist:
             rule.requestprepare(db, user)
-        res = m(db, id_list, user, tupleind, tree)
-        for rule in self.flist:
-            rule.requestreset()
+        try:
+            res = self.check_sql(db, id_list, user, tupleind, tree)
+            if res is None:
+                res = m(db, id_list, user, tupleind, tree)
+        finally:
+            for rule in self.flist:
+                rule.requestreset()
         return res
 
 class GenericFamilyFilter(GenericFilter):
@@ -53,3 +53,8 @@ class HasGrampsId(Rule):
         return true if the rule passes, false otherwise.
         """
         return obj.gramps_id == self.list[0]
+
+    def to_sql(self):
+        if type(self).apply is not HasGrampsId.apply:
+            return None
+        return ("gramps_id = ?", [self.list[0]])
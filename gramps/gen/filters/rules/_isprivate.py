@@ -43,3 +43,6 @@ class IsPrivate(Rule):
 
     def apply(self, db, obj):
         return obj.get_privacy()
+
+    def to_sql(self):
+        return ("private = ?", [1])
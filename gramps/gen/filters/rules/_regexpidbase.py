@@ -54,3 +54,15 @@ class RegExpIdBase(Rule):
 
     def apply(self, db, obj):
         return self.match_substring(0, obj.gramps_id)
+
+    def to_sql(self):
+        if type(self).apply is not RegExpIdBase.apply or not self.list[0]:
+            return None
+        if self.use_regex:
+            pattern = self.regex[0].pattern
+            if not self.use_case:
+                pattern = '(?i)' + pattern
+        else:
+            # substrings are always matched regardless of case
+            pattern = '(?i)' + re.escape(self.list[0])
+        return ("gramps_id REGEXP ?", [pattern])
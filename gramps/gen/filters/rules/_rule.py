@@ -143,6 +143,16 @@ class Rule:
         """Apply the rule to some database entry; must be overwritten."""
         return True
 
+    def to_sql(self):
+        """
+        Return an SQL predicate equivalent to the rule as a (clause, values)
+        tuple, or None if the rule can only be applied to objects.
+
+        The clause may only refer to the secondary columns of the table of
+        the filtered objects. It is called after prepare.
+        """
+        return None
+
     def display_values(self):
         """Return the labels and values of this rule."""
         l_v = ('%s="%s"' % (_(self.labels[index][0] if
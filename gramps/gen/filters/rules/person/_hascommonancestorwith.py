@@ -55,12 +55,18 @@ class HasCommonAncestorWith(Rule):
         # ancestor list once.
         # Start with filling the cache for root person (gramps_id in self.list[0])
         self.ancestor_cache = {}
+        self.common = None
         root_person = db.get_person_from_gramps_id(self.list[0])
         if root_person:
-            self.add_ancs(db, root_person)
             self.with_people = [root_person.handle]
         else:
             self.with_people = []
+        # The pedigree index finds everybody with a common ancestor at once.
+        index = db.get_pedigree_index()
+        if index is not None:
+            self.common = index.get_common_ancestry(self.with_people)
+        elif root_person:
+            self.add_ancs(db, root_person)
 
     def add_ancs(self, db, person):
         if person and person.handle not in self.ancestor_cache:
@@ -90,6 +96,7 @@ class HasCommonAncestorWith(Rule):
 
     def reset(self):
         self.ancestor_cache = {}
+        self.common = None
 
     def has_common_ancestor(self, other):
         for handle in self.with_people:
@@ -101,6 +108,8 @@ class HasCommonAncestorWith(Rule):
         return False
 
     def apply(self, db, person):
+        if self.common is not None:
+            return person.handle in self.common
         if person and person.handle not in self.ancestor_cache:
             self.add_ancs(db, person)
 
@@ -61,7 +61,9 @@ class HasCommonAncestorWithFilterMatch(HasCommonAncestorWith):
         # ancestor list once.
         # Start with filling the cache for root person (gramps_id in self.list[0])
         self.ancestor_cache = {}
+        self.common = None
         self.with_people = []
+        index = db.get_pedigree_index()
         self.filt = MatchesFilter(self.list)
         self.filt.requestprepare(db, user)
         if user:
@@ -76,11 +78,14 @@ class HasCommonAncestorWithFilterMatch(HasCommonAncestorWith):
                 #store all people in the filter so as to compare later
                 self.with_people.append(person.handle)
                 #fill list of ancestor of person if not present yet
-                if handle not in self.ancestor_cache:
+                if index is None and handle not in self.ancestor_cache:
                     self.add_ancs(db, person)
         if user:
             user.end_progress()
+        if index is not None:
+            self.common = index.get_common_ancestry(self.with_people)
 
     def reset(self):
         self.filt.requestreset()
         self.ancestor_cache = {}
+        self.common = None
@@ -48,3 +48,6 @@ class HasOtherGender(Rule):
 
     def apply(self, db, person):
         return person.gender == Person.OTHER
+
+    def to_sql(self):
+        return ("gender = ?", [Person.OTHER])
@@ -66,21 +66,29 @@ class IsAncestorOf(Rule):
     def apply(self, db, person):
         return person.handle in self.map
 
-    def init_ancestor_list(self, db, person,first):
+    def init_ancestor_list(self, db, person, first):
         if not person:
             return
-        if person.handle in self.map:
+        index = db.get_pedigree_index()
+        if index is not None:
+            self.map.update(index.get_ancestors([person.handle],
+                                                inclusive=not first))
             return
-        if not first:
-            self.map.add(person.handle)
-        fam_id = person.get_main_parents_family_handle()
-        if fam_id:
-            fam = db.get_family_from_handle(fam_id)
-            if fam:
-                f_id = fam.get_father_handle()
-                m_id = fam.get_mother_handle()
+        todo = [(person, first)]
+        while todo:
+            person, first = todo.pop()
+            if not person or person.handle in self.map:
+                continue
+            if not first:
+                self.map.add(person.handle)
+            fam_id = person.get_main_parents_family_handle()
+            if fam_id:
+                fam = db.get_family_from_handle(fam_id)
+                if fam:
+                    f_id = fam.get_father_handle()
+                    m_id = fam.get_mother_handle()
 
-                if f_id:
-                    self.init_ancestor_list(db,db.get_person_from_handle(f_id),0)
-                if m_id:
-                    self.init_ancestor_list(db,db.get_person_from_handle(m_id),0)
+                    if m_id:
+                        todo.append((db.get_person_from_handle(m_id), 0))
+                    if f_id:
+                        todo.append((db.get_person_from_handle(f_id), 0))
@@ -67,15 +67,25 @@ class IsDescendantOf(Rule):
         return person.handle in self.map
 
     def init_list(self, person, first):
-        if not person or person.handle in self.map:
-            # if we have been here before, skip
+        if not person:
             return
-        if not first:
-            self.map.add(person.handle)
+        index = self.db.get_pedigree_index()
+        if index is not None:
+            self.map.update(index.get_descendants([person.handle],
+                                                  inclusive=not first))
+            return
+        todo = [(person, first)]
+        while todo:
+            person, first = todo.pop()
+            if not person or person.handle in self.map:
+                # if we have been here before, skip
+                continue
+            if not first:
+                self.map.add(person.handle)
 
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), 0)
+            for fam_id in reversed(person.get_family_handle_list()):
+                fam = self.db.get_family_from_handle(fam_id)
+                if fam:
+                    for child_ref in reversed(fam.get_child_ref_list()):
+                        todo.append(
+                            (self.db.get_person_from_handle(child_ref.ref), 0))
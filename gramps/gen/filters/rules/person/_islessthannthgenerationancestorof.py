@@ -58,6 +58,11 @@ class IsLessThanNthGenerationAncestorOf(Rule):
                 self.init_ancestor_list(root_handle)
 
     def init_ancestor_list(self, root_handle):
+        index = self.db.get_pedigree_index()
+        if index is not None:
+            self.map = index.get_ancestors([root_handle],
+                                           generations=int(self.list[1]))
+            return
         queue = [(root_handle, 1)] # generation 1 is root
         while queue:
             handle, gen = queue.pop(0) # pop off front of queue
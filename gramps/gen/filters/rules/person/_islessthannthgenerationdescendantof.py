@@ -54,7 +54,13 @@ class IsLessThanNthGenerationDescendantOf(Rule):
         self.map = set()
         try:
             root_person = db.get_person_from_gramps_id(self.list[0])
-            self.init_list(root_person, 0)
+            index = db.get_pedigree_index()
+            if index is not None and root_person:
+                self.map = index.get_descendants(
+                    [root_person.handle],
+                    generations=int(self.list[1]) + 1, inclusive=False)
+            else:
+                self.init_list(root_person, 0)
         except:
             pass
 
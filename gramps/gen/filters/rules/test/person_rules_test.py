@@ -33,6 +33,7 @@ from ....filters import GenericFilter, CustomFilters
 from ....const import DATA_DIR
 from ....user import User
 from ....utils.unittest import localize_date
+from ....lib import Person
 
 from ..person import (
     Disconnected, Everyone, FamilyWithIncompleteEvent, HasAddress,
@@ -361,6 +362,36 @@ class BaseTest(unittest.TestCase):
         res = self.filter_with_rule(rule)
         self.assertEqual(len(res), 3)
 
+    def test_sql_pushdown(self):
+        """
+        Test rules evaluated by the database combined with other rules.
+        """
+        everyone = set(self.db.iter_person_handles())
+        males = set(person.handle for person in self.db.iter_people()
+                    if person.gender == Person.MALE)
+        named = self.filter_with_rule(
+            RegExpName(['.*(Garc|Amy).*'], use_regex=True))
+        rules = [IsMale([]),
+                 RegExpName(['.*(Garc|Amy).*'], use_regex=True)]
+        self.assertEqual(self.filter_with_rule(rules), males & named)
+        self.assertEqual(self.filter_with_rule(rules, l_op='or'),
+                         males | named)
+        self.assertEqual(self.filter_with_rule(rules, invert=True),
+                         everyone - (males & named))
+        self.assertEqual(self.filter_with_rule(rules, l_op='or',
+                                               invert=True),
+                         everyone - (males | named))
+
+    def test_sql_iterator(self):
+        """
+        Test a filter applied to an iterator over the handles.
+        """
+        filter_ = GenericFilter()
+        filter_.set_rules([IsMale([]), HasIdOf(['I0044'])])
+        handles = list(self.db.iter_person_handles()) * 2
+        self.assertEqual(filter_.apply(self.db, iter(handles)),
+                         filter_.apply(self.db, handles))
+
 
     def test_disconnected(self):
         """
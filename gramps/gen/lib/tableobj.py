@@ -46,6 +46,10 @@ from ..errors import HandleError
 #-------------------------------------------------------------------------
 from ..const import GRAMPS_LOCALE as glocale
 CODESET = glocale.encoding
+
+# class -> secondary fields, which do not change
+_SECONDARY_FIELDS = {}
+
 #-------------------------------------------------------------------------
 #
 # Table Object class
@@ -160,6 +164,8 @@ class TableObject(BaseObject):
         """
         Return all secondary fields and their types
         """
+        if cls in _SECONDARY_FIELDS:
+            return _SECONDARY_FIELDS[cls]
         result = []
         for (key, value) in cls.get_schema()["properties"].items():
             schema_type = value.get("type")
@@ -172,4 +178,6 @@ class TableObject(BaseObject):
                 result.append((key.lower(),
                                schema_type,
                                value.get("maxLength")))
+        result = tuple(result)
+        _SECONDARY_FIELDS[cls] = result
         return result
@@ -40,6 +40,7 @@ import sys
 import re
 import logging
 import importlib
+from collections import defaultdict, deque
 LOG = logging.getLogger('._manager')
 LOG.progagate = True
 from ..const import GRAMPS_LOCALE as glocale
@@ -61,6 +62,46 @@ from ..constfunc import win
 #-------------------------------------------------------------------------
 _UNAVAILABLE = _("No description was provided")
 
+#-------------------------------------------------------------------------
+#
+# Functions
+#
+#-------------------------------------------------------------------------
+def sort_dependencies(plugins):
+    """
+    Sort plugins so that each one comes after the plugins it depends on.
+
+    Plugins which do not depend on each other keep their order.
+
+    :param plugins: the :class:`.PluginData` of the plugins to sort
+    :type plugins: list
+    :returns: the sorted plugins, and the plugins which depend on plugins
+              that are missing or part of a dependency cycle
+    :rtype: tuple
+    """
+    waiting = {}
+    dependents = defaultdict(list)
+    ready = deque()
+    for plugin in plugins:
+        depends = set(plugin.depends_on)
+        waiting[plugin.id] = len(depends)
+        for depend in depends:
+            dependents[depend].append(plugin)
+        if not depends:
+            ready.append(plugin)
+
+    plugins_sorted = []
+    while ready:
+        plugin = ready.popleft()
+        plugins_sorted.append(plugin)
+        for dependent in dependents[plugin.id]:
+            waiting[dependent.id] -= 1
+            if waiting[dependent.id] == 0:
+                ready.append(dependent)
+
+    unresolved = [plugin for plugin in plugins if waiting[plugin.id]]
+    return plugins_sorted, unresolved
+
 #-------------------------------------------------------------------------
 #
 # BasePluginManager
@@ -139,6 +180,7 @@ class BasePluginManager:
                         dirnames.remove(dirname)
                 # LOG.warning("Plugin dir scanned: %s", dirpath)
                 self.__pgr.scan_dir(dirpath, filenames, uistate=uistate)
+            self.__pgr.save_cache()
 
         if load_on_reg:
             # Run plugins that request to be loaded on startup and
@@ -151,33 +193,12 @@ class BasePluginManager:
                     continue
                 plugins_to_load.append(plugin)
             # next, sort on dependencies
-            # Probably a more efficient method to get dependency graph:
-            plugins_sorted = []
-            count = 0
-            max_count = len(plugins_to_load)
-            while plugins_to_load:
-                for plugin in plugins_to_load[:]: # copy of list
-                    # LOG.warning("\nDependencies for %s at registration",
-                    #             plugin.id)
-                    delay = False
-                    for depend in plugin.depends_on:
-                        if depend not in [p.id for p in plugins_sorted]:
-                            delay = True
-                            break
-                    if delay:
-                        pass # wait till next loop
-                    else:
-                        if plugin not in plugins_sorted:
-                            plugins_sorted.append(plugin)
-                        if plugin in plugins_to_load:
-                            plugins_to_load.remove(plugin)
-                count += 1
-                if count > max_count:
-                    print("Cannot resolve the following plugin dependencies:")
-                    for plugin in plugins_to_load:
-                        print("   Plugin '%s' requires: %s" % (
-                            plugin.id, plugin.depends_on))
-                    break
+            plugins_sorted, unresolved = sort_dependencies(plugins_to_load)
+            if unresolved:
+                print("Cannot resolve the following plugin dependencies:")
+                for plugin in unresolved:
+                    print("   Plugin '%s' requires: %s" % (
+                        plugin.id, plugin.depends_on))
             # now load them:
             for plugin in plugins_sorted:
                 # next line shouldn't be necessary, but this gets called a lot
@@ -32,6 +32,7 @@ and a register for the data of all plugins .
 import os
 import sys
 import re
+import pickle
 import traceback
 
 #-------------------------------------------------------------------------
@@ -40,12 +41,20 @@ import traceback
 #
 #-------------------------------------------------------------------------
 from ...version import VERSION as GRAMPSVERSION, VERSION_TUPLE
-from ..const import IMAGE_DIR
+from ..const import IMAGE_DIR, USER_CACHE
 from ..const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.gettext
 import logging
 LOG = logging.getLogger('._manager')
 
+# Cache of the plugins registered by each registration file
+REGISTRY_CACHE = os.path.join(USER_CACHE, "plugin-registry.pickle")
+# Registration files importing only these modules give the same plugins
+# whatever the environment, so their results can be cached
+_CACHEABLE_IMPORTS = ("gramps.gen.plug._pluginreg", "gramps.gen.const",
+                      "gramps.version")
+_IMPORT_RE = re.compile(r"^\s*(?:from|import)\s+([\w.]+)", re.MULTILINE)
+
 #-------------------------------------------------------------------------
 #
 # PluginData
@@ -1271,6 +1280,9 @@ class PluginRegister:
             self.stable_only = False
         self.__plugindata = []
         self.__id_to_pdata = {}
+        self.__cache = None
+        self.__cache_env = None
+        self.__cache_changed = False
 
     def add_plugindata(self, plugindata):
         """ This is used to add an entry to the registration list.  The way it
@@ -1299,45 +1311,8 @@ class PluginRegister:
                 continue
             lenpd = len(self.__plugindata)
             full_filename = os.path.join(dir, filename)
-            try:
-                with open(full_filename, "r", encoding='utf-8') as fd:
-                    stream = fd.read()
-            except Exception as msg:
-                print(_('ERROR: Failed reading plugin registration %(filename)s') % \
-                            {'filename' : filename})
-                print(msg)
-                continue
-            if os.path.exists(os.path.join(os.path.dirname(full_filename),
-                                           'locale')):
-                try:
-                    local_gettext = glocale.get_addon_translator(full_filename).gettext
-                except ValueError:
-                    print(_('WARNING: Plugin %(plugin_name)s has no translation'
-                            ' for any of your configured languages, using US'
-                            ' English instead') %
-                          {'plugin_name' : filename.split('.')[0] })
-                    local_gettext = glocale.translation.gettext
-            else:
-                local_gettext = glocale.translation.gettext
-            try:
-                exec (compile(stream, filename, 'exec'),
-                      make_environment(_=local_gettext), {'uistate': uistate})
-                for pdata in self.__plugindata[lenpd:]:
-                    # should not be duplicate IDs in different plugins
-                    assert pdata.id not in self.__id_to_pdata
-                    # if pdata.id in self.__id_to_pdata:
-                    #     print("Error: %s is duplicated!" % pdata.id)
-                    self.__id_to_pdata[pdata.id] = pdata
-            except ValueError as msg:
-                print(_('ERROR: Failed reading plugin registration %(filename)s') % \
-                            {'filename' : filename})
-                print(msg)
-                self.__plugindata = self.__plugindata[:lenpd]
-            except:
-                print(_('ERROR: Failed reading plugin registration %(filename)s') % \
-                            {'filename' : filename})
-                print("".join(traceback.format_exception(*sys.exc_info())))
-                self.__plugindata = self.__plugindata[:lenpd]
+            if not self.__load_cached(full_filename, uistate):
+                self.__exec_registration(full_filename, filename, uistate)
             #check if:
             #  1. plugin exists, if not remove, otherwise set module name
             #  2. plugin not stable, if stable_only=True, remove
@@ -1393,6 +1368,123 @@ class PluginRegister:
                 del self.__id_to_pdata[self.__plugindata[ind].id]
                 del self.__plugindata[ind]
 
+    def __exec_registration(self, full_filename, filename, uistate):
+        """
+        Run a registration file, and cache the plugins it registers if its
+        result does not depend on the environment.
+        """
+        lenpd = len(self.__plugindata)
+        try:
+            with open(full_filename, "r", encoding='utf-8') as fd:
+                stream = fd.read()
+        except Exception as msg:
+            print(_('ERROR: Failed reading plugin registration %(filename)s') % \
+                        {'filename' : filename})
+            print(msg)
+            return
+        if os.path.exists(os.path.join(os.path.dirname(full_filename),
+                                       'locale')):
+            try:
+                local_gettext = glocale.get_addon_translator(full_filename).gettext
+            except ValueError:
+                print(_('WARNING: Plugin %(plugin_name)s has no translation'
+                        ' for any of your configured languages, using US'
+                        ' English instead') %
+                      {'plugin_name' : filename.split('.')[0] })
+                local_gettext = glocale.translation.gettext
+        else:
+            local_gettext = glocale.translation.gettext
+        try:
+            exec (compile(stream, filename, 'exec'),
+                  make_environment(_=local_gettext), {'uistate': uistate})
+            for pdata in self.__plugindata[lenpd:]:
+                # should not be duplicate IDs in different plugins
+                assert pdata.id not in self.__id_to_pdata
+                # if pdata.id in self.__id_to_pdata:
+                #     print("Error: %s is duplicated!" % pdata.id)
+                self.__id_to_pdata[pdata.id] = pdata
+        except ValueError as msg:
+            print(_('ERROR: Failed reading plugin registration %(filename)s') % \
+                        {'filename' : filename})
+            print(msg)
+            self.__plugindata = self.__plugindata[:lenpd]
+            return
+        except:
+            print(_('ERROR: Failed reading plugin registration %(filename)s') % \
+                        {'filename' : filename})
+            print("".join(traceback.format_exception(*sys.exc_info())))
+            self.__plugindata = self.__plugindata[:lenpd]
+            return
+
+        if 'uistate' in stream or any(
+                not module.startswith(_CACHEABLE_IMPORTS)
+                for module in _IMPORT_RE.findall(stream)):
+            self.__cache.pop(full_filename, None)
+            return
+        try:
+            stat = os.stat(full_filename)
+            data = pickle.dumps(self.__plugindata[lenpd:])
+        except Exception:
+            self.__cache.pop(full_filename, None)
+            return
+        self.__cache[full_filename] = (stat.st_mtime_ns, stat.st_size, data)
+        self.__cache_changed = True
+
+    def __load_cached(self, full_filename, uistate):
+        """
+        Register the cached plugins of a registration file, if it did not
+        change since they were cached.
+
+        :returns: True if the plugins were registered from the cache
+        """
+        env = (GRAMPSVERSION, sys.version_info[:2], tuple(glocale.language),
+               uistate is None)
+        if self.__cache is None or self.__cache_env != env:
+            self.__cache_env = env
+            self.__cache = {}
+            try:
+                with open(REGISTRY_CACHE, 'rb') as cache_file:
+                    cache_env, cache = pickle.load(cache_file)
+                if cache_env == env:
+                    self.__cache = cache
+            except Exception:
+                pass
+        entry = self.__cache.get(full_filename)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(full_filename)
+            if (stat.st_mtime_ns, stat.st_size) != entry[:2]:
+                return False
+            plugins = pickle.loads(entry[2])
+        except Exception:
+            return False
+        if any(pdata.id in self.__id_to_pdata for pdata in plugins):
+            return False
+        for pdata in plugins:
+            self.__plugindata.append(pdata)
+            self.__id_to_pdata[pdata.id] = pdata
+        return True
+
+    def save_cache(self):
+        """
+        Write the cache of registration files if it changed.
+        """
+        if not self.__cache_changed:
+            return
+        for path in [path for path in self.__cache
+                     if not os.path.exists(path)]:
+            del self.__cache[path]
+        temp_name = "%s.%d" % (REGISTRY_CACHE, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(REGISTRY_CACHE), exist_ok=True)
+            with open(temp_name, 'wb') as cache_file:
+                pickle.dump((self.__cache_env, self.__cache), cache_file)
+            os.replace(temp_name, REGISTRY_CACHE)
+            self.__cache_changed = False
+        except OSError as msg:
+            LOG.warning("Cannot write the plugin registry cache: %s", msg)
+
     def get_plugin(self, id):
         """
         Return the :class:`PluginData` for the plugin with id
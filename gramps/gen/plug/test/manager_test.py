@@ -0,0 +1,124 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Plugin manager tests.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import unittest
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from .._manager import sort_dependencies
+from .._pluginreg import PluginData
+
+def make_plugins(*depends):
+    """
+    Return plugins with the ids "a", "b", ... depending on the plugins
+    given for each of them.
+    """
+    plugins = []
+    for index, depends_on in enumerate(depends):
+        plugin = PluginData()
+        plugin.id = chr(ord("a") + index)
+        plugin.depends_on = list(depends_on)
+        plugins.append(plugin)
+    return plugins
+
+def ids(plugins):
+    """
+    Return the ids of plugins, as a string.
+    """
+    return "".join(plugin.id for plugin in plugins)
+
+#-------------------------------------------------------------------------
+#
+# SortDependenciesTest class
+#
+#-------------------------------------------------------------------------
+class SortDependenciesTest(unittest.TestCase):
+    """
+    Tests of the order of the plugins loaded on registration.
+    """
+
+    def test_independent(self):
+        """
+        Plugins which do not depend on each other keep their order.
+        """
+        plugins, unresolved = sort_dependencies(make_plugins("", "", ""))
+        self.assertEqual(ids(plugins), "abc")
+        self.assertEqual(unresolved, [])
+
+    def test_order(self):
+        """
+        Each plugin comes after the plugins it depends on.
+        """
+        plugins, unresolved = sort_dependencies(
+            make_plugins("bd", "c", "", "", "a"))
+        self.assertEqual(ids(plugins), "cdbae")
+        self.assertEqual(unresolved, [])
+
+    def test_shared(self):
+        """
+        A plugin is loaded once, even if several plugins depend on it.
+        """
+        plugins, unresolved = sort_dependencies(make_plugins("c", "c", ""))
+        self.assertEqual(ids(plugins), "cab")
+        self.assertEqual(unresolved, [])
+
+    def test_missing(self):
+        """
+        The plugins depending on a missing plugin are not loaded, nor the
+        plugins depending on them.
+        """
+        plugins, unresolved = sort_dependencies(
+            make_plugins("z", "a", "", "c"))
+        self.assertEqual(ids(plugins), "cd")
+        self.assertEqual(ids(unresolved), "ab")
+
+    def test_cycle(self):
+        """
+        The plugins of a dependency cycle are not loaded, nor the plugins
+        depending on them.
+        """
+        plugins, unresolved = sort_dependencies(
+            make_plugins("b", "c", "a", "", "a", "d"))
+        self.assertEqual(ids(plugins), "df")
+        self.assertEqual(ids(unresolved), "abce")
+
+    def test_self(self):
+        """
+        A plugin depending on itself is not loaded.
+        """
+        plugins, unresolved = sort_dependencies(make_plugins("a", ""))
+        self.assertEqual(ids(plugins), "b")
+        self.assertEqual(ids(unresolved), "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Plugin registration tests.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ...const import GRAMPS_LOCALE as glocale
+from ....version import VERSION_TUPLE
+from .. import _pluginreg
+from .._pluginreg import PluginRegister
+
+REGISTRATION = """%s
+register(GENERAL,
+         id = 'cache_test',
+         name = %r,
+         gramps_target_version = '%d.%d',
+         status = STABLE,
+         fname = 'cache_test.py',
+        )
+"""
+
+#-------------------------------------------------------------------------
+#
+# RegistryCacheTest class
+#
+#-------------------------------------------------------------------------
+class RegistryCacheTest(unittest.TestCase):
+    """
+    Tests of the cache of the plugins registered by each registration file.
+    """
+
+    def setUp(self):
+        self.plugin_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.plugin_dir, "cache_test.py"), "w"):
+            pass
+        self.write_registration("Cache test")
+        cache = patch.object(_pluginreg, "REGISTRY_CACHE",
+                             os.path.join(self.plugin_dir, "cache.pickle"))
+        cache.start()
+        self.addCleanup(cache.stop)
+        self.assertEqual(self.scan(), (1, "Cache test"))
+
+    def tearDown(self):
+        shutil.rmtree(self.plugin_dir)
+
+    def write_registration(self, name, code=""):
+        """
+        Write the registration file of the test plugin.
+        """
+        with open(os.path.join(self.plugin_dir, "cache_test.gpr.py"),
+                  "w") as gpr_file:
+            gpr_file.write(REGISTRATION % ((code, name) + VERSION_TUPLE[:2]))
+
+    def scan(self, uistate=None):
+        """
+        Register the test plugin, as a new Gramps session would.
+
+        :returns: the number of registration files run, and the name of the
+                  plugin
+        """
+        with patch.object(PluginRegister, "_PluginRegister__instance",
+                          None), \
+                patch.object(_pluginreg, "compile", create=True,
+                             wraps=compile) as compiled:
+            register = PluginRegister.get_instance()
+            register.scan_dir(self.plugin_dir,
+                              sorted(os.listdir(self.plugin_dir)), uistate)
+            register.save_cache()
+            plugin = register.get_plugin("cache_test")
+        return compiled.call_count, plugin.name
+
+    def test_cached(self):
+        self.assertEqual(self.scan(), (0, "Cache test"))
+        self.assertEqual(self.scan(), (0, "Cache test"))
+
+    def test_changed(self):
+        self.write_registration("Changed test")
+        self.assertEqual(self.scan(), (1, "Changed test"))
+        self.assertEqual(self.scan(), (0, "Changed test"))
+
+    def test_touched(self):
+        stat = os.stat(os.path.join(self.plugin_dir, "cache_test.gpr.py"))
+        os.utime(os.path.join(self.plugin_dir, "cache_test.gpr.py"),
+                 ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        self.assertEqual(self.scan(), (1, "Cache test"))
+
+    def test_version(self):
+        with patch.object(_pluginreg, "GRAMPSVERSION", "0.0.0"):
+            self.assertEqual(self.scan(), (1, "Cache test"))
+            self.assertEqual(self.scan(), (0, "Cache test"))
+        self.assertEqual(self.scan(), (1, "Cache test"))
+
+    def test_locale(self):
+        with patch.object(glocale, "language", ["xx"] + glocale.language):
+            self.assertEqual(self.scan(), (1, "Cache test"))
+        self.assertEqual(self.scan(), (1, "Cache test"))
+
+    def test_gui(self):
+        self.assertEqual(self.scan(uistate=object()), (1, "Cache test"))
+
+    def test_not_cacheable(self):
+        """
+        Registration files which import other modules or use uistate are
+        run each time.
+        """
+        for code in ("import os", "if uistate:\n    pass"):
+            self.write_registration("Cache test", code)
+            self.assertEqual(self.scan(), (1, "Cache test"))
+            self.assertEqual(self.scan(), (1, "Cache test"))
+        self.write_registration("Cache test")
+        self.assertEqual(self.scan(), (1, "Cache test"))
+        self.assertEqual(self.scan(), (0, "Cache test"))
+
+
+if __name__ == "__main__":
+    unittest.main()
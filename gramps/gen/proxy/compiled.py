@@ -0,0 +1,436 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Proxy class for the Gramps databases. Flattens a stack of proxies.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Gramps libraries
+#
+#-------------------------------------------------------------------------
+from .proxybase import ProxyDbBase
+from ..utils.lru import LRU
+from ..const import GRAMPS_LOCALE as glocale
+
+class CompiledProxyDb(ProxyDbBase):
+    """
+    A proxy to a stack of other proxies, like the ones applied by an export.
+
+    Each proxy of a stack checks every object the proxies below it return,
+    and the handle lists and counts of a proxy are computed again on every
+    call by asking the whole stack about each object.  This proxy asks the
+    stack once for the handles of each object type, the first time they are
+    needed, and keeps the sets of handles included.  The data of the objects
+    returned by the stack are kept too, so an object is only read and
+    sanitized once while it stays in the cache; a new object is made from
+    them for each call.
+
+    The proxy does not follow changes to the database; it should be used
+    only for the duration of a read-only task, like an export.
+    """
+
+    def __init__(self, db, cache_size=131071):
+        """
+        Create a new CompiledProxyDb instance.
+
+        :param db: the database or proxy to flatten.
+        :param cache_size: the number of objects whose data are kept.
+        :type cache_size: int
+        """
+        ProxyDbBase.__init__(self, db)
+        self.__included = {}
+        self.__cache = LRU(cache_size)
+
+    def __get_included(self, obj_type):
+        """
+        Return the set of the handles of the objects of a type included by
+        the proxied database.
+        """
+        included = self.__included.get(obj_type)
+        if included is None:
+            if (self.db is not None) and self.db.is_open():
+                included = set(getattr(self.db,
+                                       'iter_%s_handles' % obj_type)())
+            else:
+                included = set()
+            self.__included[obj_type] = included
+        return included
+
+    def __get_object(self, obj_type, handle):
+        """
+        Return the object of a type with the given handle, as returned by the
+        proxied database, or None if it is not included.
+        """
+        if handle not in self.__get_included(obj_type):
+            return None
+        key = (obj_type, handle)
+        if key in self.__cache:
+            cached = self.__cache[key]
+        else:
+            obj = getattr(self.db, 'get_%s_from_handle' % obj_type)(handle)
+            cached = ((obj.__class__, obj.serialize()) if obj is not None
+                      else None)
+            self.__cache[key] = cached
+        if cached is None:
+            return None
+        # each caller gets its own object, which it may change
+        obj_class, data = cached
+        return obj_class.create(data)
+
+    def __iter_handles(self, obj_type):
+        """
+        Return an iterator over the handles included, in the order of the
+        base database.
+        """
+        included = self.__get_included(obj_type)
+        return (handle for handle in
+                getattr(self.basedb, 'iter_%s_handles' % obj_type)()
+                if handle in included)
+
+    def __iter_objects(self, obj_type):
+        """
+        Return an iterator over the objects included.
+        """
+        get_object = getattr(self, 'get_%s_from_handle' % obj_type)
+        return filter(None, map(get_object, self.__iter_handles(obj_type)))
+
+    # Predicates used by the ProxyDbBase methods
+
+    def include_person(self, handle):
+        return handle in self.__get_included('person')
+
+    def include_family(self, handle):
+        return handle in self.__get_included('family')
+
+    def include_event(self, handle):
+        return handle in self.__get_included('event')
+
+    def include_source(self, handle):
+        return handle in self.__get_included('source')
+
+    def include_citation(self, handle):
+        return handle in self.__get_included('citation')
+
+    def include_place(self, handle):
+        return handle in self.__get_included('place')
+
+    def include_media(self, handle):
+        return handle in self.__get_included('media')
+
+    def include_repository(self, handle):
+        return handle in self.__get_included('repository')
+
+    def include_note(self, handle):
+        return handle in self.__get_included('note')
+
+    def include_tag(self, handle):
+        return handle in self.__get_included('tag')
+
+    # Object access
+
+    def get_person_from_handle(self, handle):
+        """
+        Finds a Person in the database from the passed handle.
+        If no such Person exists, None is returned.
+        """
+        return self.__get_object('person', handle)
+
+    def get_family_from_handle(self, handle):
+        """
+        Finds a Family in the database from the passed handle.
+        If no such Family exists, None is returned.
+        """
+        return self.__get_object('family', handle)
+
+    def get_event_from_handle(self, handle):
+        """
+        Finds a Event in the database from the passed handle.
+        If no such Event exists, None is returned.
+        """
+        return self.__get_object('event', handle)
+
+    def get_source_from_handle(self, handle):
+        """
+        Finds a Source in the database from the passed handle.
+        If no such Source exists, None is returned.
+        """
+        return self.__get_object('source', handle)
+
+    def get_citation_from_handle(self, handle):
+        """
+        Finds a Citation in the database from the passed handle.
+        If no such Citation exists, None is returned.
+        """
+        return self.__get_object('citation', handle)
+
+    def get_place_from_handle(self, handle):
+        """
+        Finds a Place in the database from the passed handle.
+        If no such Place exists, None is returned.
+        """
+        return self.__get_object('place', handle)
+
+    def get_media_from_handle(self, handle):
+        """
+        Finds a Media in the database from the passed handle.
+        If no such Media exists, None is returned.
+        """
+        return self.__get_object('media', handle)
+
+    def get_repository_from_handle(self, handle):
+        """
+        Finds a Repository in the database from the passed handle.
+        If no such Repository exists, None is returned.
+        """
+        return self.__get_object('repository', handle)
+
+    def get_note_from_handle(self, handle):
+        """
+        Finds a Note in the database from the passed handle.
+        If no such Note exists, None is returned.
+        """
+        return self.__get_object('note', handle)
+
+    def get_tag_from_handle(self, handle):
+        """
+        Finds a Tag in the database from the passed handle.
+        If no such Tag exists, None is returned.
+        """
+        return self.__get_object('tag', handle)
+
+    # Handle lists, computed from the sets of included handles
+
+    def get_person_handles(self, sort_handles=False, locale=glocale):
+        """
+        Return a list of database handles, one handle for each Person in
+        the database. If sort_handles is True, the list is sorted by surnames
+        """
+        included = self.__get_included('person')
+        if sort_handles:
+            return [handle for handle in self.basedb.get_person_handles(
+                sort_handles=True, locale=locale) if handle in included]
+        return list(self.__iter_handles('person'))
+
+    def get_family_handles(self, sort_handles=False, locale=glocale):
+        """
+        Return a list of database handles, one handle for each Family in
+        the database. If sort_handles is True, the list is sorted by surnames
+        """
+        included = self.__get_included('family')
+        if sort_handles:
+            return [handle for handle in self.basedb.get_family_handles(
+                sort_handles=True, locale=locale) if handle in included]
+        return list(self.__iter_handles('family'))
+
+    def iter_person_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Person in
+        the database.
+        """
+        return self.__iter_handles('person')
+
+    def iter_family_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Family in
+        the database.
+        """
+        return self.__iter_handles('family')
+
+    def iter_event_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Event in
+        the database.
+        """
+        return self.__iter_handles('event')
+
+    def iter_source_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Source in
+        the database.
+        """
+        return self.__iter_handles('source')
+
+    def iter_citation_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Citation
+        in the database.
+        """
+        return self.__iter_handles('citation')
+
+    def iter_place_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Place in
+        the database.
+        """
+        return self.__iter_handles('place')
+
+    def iter_media_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Media
+        Object in the database.
+        """
+        return self.__iter_handles('media')
+
+    def iter_repository_handles(self):
+        """
+        Return an iterator over database handles, one handle for each
+        Repository in the database.
+        """
+        return self.__iter_handles('repository')
+
+    def iter_note_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Note in
+        the database.
+        """
+        return self.__iter_handles('note')
+
+    def iter_tag_handles(self):
+        """
+        Return an iterator over database handles, one handle for each Tag in
+        the database.
+        """
+        return self.__iter_handles('tag')
+
+    # Objects, as returned by the proxied database
+
+    def iter_people(self):
+        """
+        Return an iterator over Person objects in the database
+        """
+        return self.__iter_objects('person')
+
+    def iter_families(self):
+        """
+        Return an iterator over Family objects in the database
+        """
+        return self.__iter_objects('family')
+
+    def iter_events(self):
+        """
+        Return an iterator over Event objects in the database
+        """
+        return self.__iter_objects('event')
+
+    def iter_places(self):
+        """
+        Return an iterator over Place objects in the database
+        """
+        return self.__iter_objects('place')
+
+    def iter_sources(self):
+        """
+        Return an iterator over Source objects in the database
+        """
+        return self.__iter_objects('source')
+
+    def iter_citations(self):
+        """
+        Return an iterator over Citation objects in the database
+        """
+        return self.__iter_objects('citation')
+
+    def iter_media(self):
+        """
+        Return an iterator over Media objects in the database
+        """
+        return self.__iter_objects('media')
+
+    def iter_repositories(self):
+        """
+        Return an iterator over Repositories objects in the database
+        """
+        return self.__iter_objects('repository')
+
+    def iter_notes(self):
+        """
+        Return an iterator over Note objects in the database
+        """
+        return self.__iter_objects('note')
+
+    def iter_tags(self):
+        """
+        Return an iterator over Tag objects in the database
+        """
+        return self.__iter_objects('tag')
+
+    # Counts
+
+    def get_number_of_people(self):
+        """
+        Return the number of people currently in the database.
+        """
+        return len(self.__get_included('person'))
+
+    def get_number_of_families(self):
+        """
+        Return the number of families currently in the database.
+        """
+        return len(self.__get_included('family'))
+
+    def get_number_of_events(self):
+        """
+        Return the number of events currently in the database.
+        """
+        return len(self.__get_included('event'))
+
+    def get_number_of_places(self):
+        """
+        Return the number of places currently in the database.
+        """
+        return len(self.__get_included('place'))
+
+    def get_number_of_sources(self):
+        """
+        Return the number of sources currently in the database.
+        """
+        return len(self.__get_included('source'))
+
+    def get_number_of_citations(self):
+        """
+        Return the number of citations currently in the database.
+        """
+        return len(self.__get_included('citation'))
+
+    def get_number_of_media(self):
+        """
+        Return the number of media objects currently in the database.
+        """
+        return len(self.__get_included('media'))
+
+    def get_number_of_repositories(self):
+        """
+        Return the number of source repositories currently in the database.
+        """
+        return len(self.__get_included('repository'))
+
+    def get_number_of_notes(self):
+        """
+        Return the number of notes currently in the database.
+        """
+        return len(self.__get_included('note'))
+
+    def get_number_of_tags(self):
+        """
+        Return the number of tags currently in the database.
+        """
+        return len(self.__get_included('tag'))
@@ -36,6 +36,7 @@ import types
 #
 #-------------------------------------------------------------------------
 from ..db.base import DbReadBase, DbWriteBase
+from ..db.placecache import PlaceCache
 from ..lib import (Citation, Event, Family, Media, Note, Person, Place,
                    Repository, Source, Tag)
 from ..const import GRAMPS_LOCALE as glocale
@@ -106,6 +107,7 @@ class ProxyDbBase(DbReadBase):
         self.repo_bookmarks = db.repo_bookmarks
         self.media_bookmarks = db.media_bookmarks
         self.note_bookmarks = db.note_bookmarks
+        self._placecache = None
 
         self.person_map = ProxyMap(self, self.get_raw_person_data,
                                    self.get_person_handles)
@@ -995,3 +997,12 @@ class ProxyDbBase(DbReadBase):
         """
         return self.basedb.get_dbid()
 
+    def get_place_cache(self):
+        """
+        Return a :class:`.PlaceCache` of the places seen through the proxy,
+        creating it on first use.
+        """
+        if self._placecache is None:
+            self._placecache = PlaceCache(self, signals=False)
+        return self._placecache
+
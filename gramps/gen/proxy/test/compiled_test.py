@@ -0,0 +1,172 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest of the proxy flattening the proxy stack of exports.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import os
+import unittest
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ...const import DATA_DIR
+from ...db import DbTxn
+from ...db.utils import import_as_dict, make_database
+from ...filters import GenericFilterFactory
+from ...filters.rules.person import HasNameOf
+from ...lib import Note, Person
+from ...user import User
+from .. import (CompiledProxyDb, FilterProxyDb, LivingProxyDb,
+                PrivateProxyDb, ReferencedBySelectionProxyDb)
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+EXAMPLE = os.path.join(TEST_DIR, "example.gramps")
+OBJECTS = (('person', 'people'), ('family', 'families'),
+           ('event', 'events'), ('place', 'places'),
+           ('source', 'sources'), ('citation', 'citations'),
+           ('media', 'media'), ('repository', 'repositories'),
+           ('note', 'notes'), ('tag', 'tags'))
+
+#-------------------------------------------------------------------------
+#
+# CompiledProxyTest class
+#
+#-------------------------------------------------------------------------
+class CompiledProxyTest(unittest.TestCase):
+    """
+    Tests of CompiledProxyDb over the proxies applied by an export.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = import_as_dict(EXAMPLE, User())
+
+    def make_stack(self):
+        """
+        Return the proxies an export applies with a person filter, the
+        private data and the living people removed, and only the records
+        referenced by the people kept.
+        """
+        person_filter = GenericFilterFactory('Person')()
+        person_filter.add_rule(HasNameOf(['', 'Garner'] + [''] * 9))
+        dbase = FilterProxyDb(self.db, person_filter)
+        dbase = PrivateProxyDb(dbase)
+        dbase = LivingProxyDb(dbase,
+                              LivingProxyDb.MODE_INCLUDE_LAST_NAME_ONLY)
+        return ReferencedBySelectionProxyDb(dbase, all_people=True)
+
+    def assert_same(self, dbase, compiled):
+        """
+        Check that both databases return the same records.
+        """
+        for obj_type, plural in OBJECTS:
+            handles = sorted(getattr(dbase, 'iter_%s_handles' % obj_type)())
+            self.assertEqual(
+                sorted(getattr(compiled, 'iter_%s_handles' % obj_type)()),
+                handles)
+            self.assertEqual(
+                getattr(compiled, 'get_number_of_%s' % plural)(),
+                len(handles))
+            get_object = getattr(dbase, 'get_%s_from_handle' % obj_type)
+            get_compiled = getattr(compiled,
+                                   'get_%s_from_handle' % obj_type)
+            objects = {handle: get_object(handle).serialize()
+                       for handle in handles}
+            for handle in handles:
+                self.assertEqual(get_compiled(handle).serialize(),
+                                 objects[handle])
+            # the objects are those sanitized by get_<object>_from_handle,
+            # which the iter_<objects> methods of the proxies skip
+            self.assertEqual(
+                {obj.handle: obj.serialize() for obj in
+                 getattr(compiled, 'iter_%s' % plural)()},
+                objects)
+        self.assertEqual(compiled.get_person_handles(sort_handles=True),
+                         dbase.get_person_handles(sort_handles=True))
+        self.assertEqual(compiled.get_family_handles(sort_handles=True),
+                         dbase.get_family_handles(sort_handles=True))
+
+    def test_export_stack(self):
+        dbase = self.make_stack()
+        compiled = CompiledProxyDb(dbase)
+        self.assertLess(compiled.get_number_of_people(),
+                        self.db.get_number_of_people())
+        self.assertGreater(compiled.get_number_of_people(), 0)
+        self.assertIsNone(compiled.get_person_from_handle(
+            next(handle for handle in self.db.iter_person_handles()
+                 if handle not in set(dbase.iter_person_handles()))))
+        self.assert_same(dbase, compiled)
+        # the objects are served from the cache the second time
+        self.assert_same(dbase, compiled)
+
+    def test_no_proxy(self):
+        dbase = PrivateProxyDb(self.db)
+        self.assert_same(dbase, CompiledProxyDb(dbase))
+
+    def test_changed_objects(self):
+        """
+        Changing an object returned does not change the objects returned
+        later.
+        """
+        dbase = self.make_stack()
+        compiled = CompiledProxyDb(dbase)
+        for person in compiled.iter_people():
+            person.set_gramps_id('X')
+            person.get_primary_name().set_first_name('Changed')
+            person.set_event_ref_list([])
+        for handle in compiled.iter_person_handles():
+            person = compiled.get_person_from_handle(handle)
+            person.set_gramps_id('X')
+            person.get_primary_name().get_surname_list().clear()
+        for family in compiled.iter_families():
+            family.set_child_ref_list([])
+        self.assert_same(dbase, compiled)
+
+    def test_shared_handles(self):
+        """
+        Objects of different types may have the same handle.
+        """
+        dbase = make_database("sqlite")
+        dbase.load(":memory:")
+        with DbTxn('Add test objects', dbase) as trans:
+            person = Person()
+            person.set_handle('A')
+            dbase.add_person(person, trans)
+            note = Note('Note A')
+            note.set_handle('A')
+            dbase.add_note(note, trans)
+        compiled = CompiledProxyDb(PrivateProxyDb(dbase))
+        self.assertIsInstance(compiled.get_person_from_handle('A'), Person)
+        self.assertEqual(compiled.get_note_from_handle('A').get(), 'Note A')
+        self.assertIsInstance(compiled.get_person_from_handle('A'), Person)
+        dbase.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
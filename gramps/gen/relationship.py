@@ -1249,6 +1249,18 @@ class RelationshipCalculator:
         second_map = {}
         rank = 9999999
 
+        # people without a common ancestor at all need no further search,
+        # unless it would reach the maximum depth and report it
+        index = db.get_pedigree_index()
+        handles = [orig_person.handle, other_person.handle]
+        if (index is not None and
+                not index.has_common_ancestor(*handles) and
+                index.ancestors_within(handles, self.__max_depth)):
+            if not self.__all_dist:
+                return (-1, None, '', [], '', []), self.__msg
+            else:
+                return [(-1, None, '', [], '', [])], self.__msg
+
         try:
             if (self.storemap and self.stored_map is not None
                     and self.map_handle == orig_person.handle
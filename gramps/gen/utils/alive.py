@@ -31,6 +31,7 @@ privacy in reports and exports.
 #
 #-------------------------------------------------------------------------
 import logging
+import weakref
 LOG = logging.getLogger(".gen.utils.alive")
 
 #-------------------------------------------------------------------------
@@ -61,6 +62,9 @@ except ImportError:
     _MAX_SIB_AGE_DIFF = 20
     _AVG_GENERATION_GAP = 20
 
+# database -> ProbablyAlive shared by the calls of probably_alive_range
+_ENGINES = weakref.WeakKeyDictionary()
+
 #-------------------------------------------------------------------------
 #
 # ProbablyAlive class
@@ -69,6 +73,11 @@ except ImportError:
 class ProbablyAlive:
     """
     An object to hold the parameters for considering someone alive.
+
+    The results found for the siblings, spouses and descendants of a person
+    are kept, so that they are only computed once when many people of the
+    database are considered.  They must be cleared with clear() when the
+    database changes.
     """
 
     def __init__(self,
@@ -87,6 +96,7 @@ class ProbablyAlive:
         self.MAX_AGE_PROB_ALIVE = max_age_prob_alive
         self.AVG_GENERATION_GAP = avg_generation_gap
         self.pset = set()
+        self.clear()
 
     def probably_alive_range(self, person, is_spouse=False):
         # FIXME: some of these computed dates need to be a span. For
@@ -160,67 +170,10 @@ class ProbablyAlive:
         # not alive. If the sibling died more than X years
         # past, or more than X years future, then probably not alive.
 
-        family_list = person.get_parent_family_handle_list()
-        for family_handle in family_list:
-            family = self.db.get_family_from_handle(family_handle)
-            if family is None:
-                continue
-            for child_ref in family.get_child_ref_list():
-                child_handle = child_ref.ref
-                child = self.db.get_person_from_handle(child_handle)
-                if child is None:
-                    continue
-                # Go through once looking for direct evidence:
-                for ev_ref in child.get_primary_event_ref_list():
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
-                    if ev and ev.type.is_birth():
-                        dobj = ev.get_date_object()
-                        if dobj.get_start_date() != Date.EMPTY:
-                            # if sibling birth date too far away, then not alive:
-                            year = dobj.get_year()
-                            if year != 0:
-                                # sibling birth date
-                                return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF),
-                                        Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF + self.MAX_AGE_PROB_ALIVE),
-                                        _("sibling birth date"),
-                                        child)
-                    elif ev and ev.type.is_death():
-                        dobj = ev.get_date_object()
-                        if dobj.get_start_date() != Date.EMPTY:
-                            # if sibling death date too far away, then not alive:
-                            year = dobj.get_year()
-                            if year != 0:
-                                # sibling death date
-                                return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE),
-                                        Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE
-                                                                + self.MAX_AGE_PROB_ALIVE),
-                                        _("sibling death date"),
-                                        child)
-                # Go through again looking for fallback:
-                for ev_ref in child.get_primary_event_ref_list():
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
-                    if ev and ev.type.is_birth_fallback():
-                        dobj = ev.get_date_object()
-                        if dobj.get_start_date() != Date.EMPTY:
-                            # if sibling birth date too far away, then not alive:
-                            year = dobj.get_year()
-                            if year != 0:
-                                # sibling birth date
-                                return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF),
-                                        Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF + self.MAX_AGE_PROB_ALIVE),
-                                        _("sibling birth-related date"),
-                                        child)
-                    elif ev and ev.type.is_death_fallback():
-                        dobj = ev.get_date_object()
-                        if dobj.get_start_date() != Date.EMPTY:
-                            # if sibling death date too far away, then not alive:
-                            year = dobj.get_year()
-                            if year != 0:
-                                # sibling death date
-                                return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE),
-                                        Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE + self.MAX_AGE_PROB_ALIVE),
-                                        _("sibling death-related date"),
-                                        child)
+        for family_handle in person.get_parent_family_handle_list():
+            sibling_range = self._sibling_range(family_handle)
+            if sibling_range:
+                return sibling_range
 
         if not is_spouse: # if you are not in recursion, let's recurse:
             for family_handle in person.get_family_handle_list():
@@ -230,7 +183,7 @@ class ProbablyAlive:
                     father_handle = family.get_father_handle()
                     if mother_handle == person.handle and father_handle:
                         father = self.db.get_person_from_handle(father_handle)
-                        date1, date2, explain, other = self.probably_alive_range(father, is_spouse=True)
+                        date1, date2, explain, other = self._spouse_range(father)
                         if date1 and date1.get_year() != 0:
                             return (Date().copy_ymd(date1.get_year() - self.AVG_GENERATION_GAP),
                                     Date().copy_ymd(date1.get_year() - self.AVG_GENERATION_GAP + self.MAX_AGE_PROB_ALIVE),
@@ -241,7 +194,7 @@ class ProbablyAlive:
                                     _("a spouse's death-related date, ") + explain, other)
                     elif father_handle == person.handle and mother_handle:
                         mother = self.db.get_person_from_handle(mother_handle)
-                        date1, date2, explain, other = self.probably_alive_range(mother, is_spouse=True)
+                        date1, date2, explain, other = self._spouse_range(mother)
                         if date1 and date1.get_year() != 0:
                             return (Date().copy_ymd(date1.get_year() - self.AVG_GENERATION_GAP),
                                     Date().copy_ymd(date1.get_year() - self.AVG_GENERATION_GAP + self.MAX_AGE_PROB_ALIVE),
@@ -271,80 +224,20 @@ class ProbablyAlive:
 
         # Try looking for descendants that were born more than a lifespan
         # ago.
-
-        def descendants_too_old (person, years):
-            if person.handle in self.pset:
-                return (None, None, "", None)
-            self.pset.add(person.handle)
-            for family_handle in person.get_family_handle_list():
-                family = self.db.get_family_from_handle(family_handle)
-                if not family:
-                    # can happen with LivingProxyDb(PrivateProxyDb(db))
-                    continue
-                for child_ref in family.get_child_ref_list():
-                    child_handle = child_ref.ref
-                    child = self.db.get_person_from_handle(child_handle)
-                    child_birth_ref = child.get_birth_ref()
-                    if child_birth_ref:
-                        child_birth = self.db.get_event_from_handle(child_birth_ref.ref)
-                        dobj = child_birth.get_date_object()
-                        if dobj.get_start_date() != Date.EMPTY:
-                            d = Date(dobj)
-                            val = d.get_start_date()
-                            val = d.get_year() - years
-                            d.set_year(val)
-                            return (d, d.copy_offset_ymd(self.MAX_AGE_PROB_ALIVE),
-                                    _("descendant birth date"),
-                                    child)
-                    child_death_ref = child.get_death_ref()
-                    if child_death_ref:
-                        child_death = self.db.get_event_from_handle(child_death_ref.ref)
-                        dobj = child_death.get_date_object()
-                        if dobj.get_start_date() != Date.EMPTY:
-                            return (dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP),
-                                    dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP + self.MAX_AGE_PROB_ALIVE),
-                                    _("descendant death date"),
-                                    child)
-                    date1, date2, explain, other = descendants_too_old (child, years + self.AVG_GENERATION_GAP)
-                    if date1 and date2:
-                        return date1, date2, explain, other
-                    # Check fallback data:
-                    for ev_ref in child.get_primary_event_ref_list():
-                        ev = self.db.get_event_from_handle(ev_ref.ref)
-                        if ev and ev.type.is_birth_fallback():
-                            dobj = ev.get_date_object()
-                            if dobj.get_start_date() != Date.EMPTY:
-                                d = Date(dobj)
-                                val = d.get_start_date()
-                                val = d.get_year() - years
-                                d.set_year(val)
-                                return (d, d.copy_offset_ymd(self.MAX_AGE_PROB_ALIVE),
-                                        _("descendant birth-related date"),
-                                        child)
-
-                        elif ev and ev.type.is_death_fallback():
-                            dobj = ev.get_date_object()
-                            if dobj.get_start_date() != Date.EMPTY:
-                                return (dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP),
-                                        dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP + self.MAX_AGE_PROB_ALIVE),
-                                        _("descendant death-related date"),
-                                        child)
-
-            return (None, None, "", None)
-
         # If there are descendants that are too old for the person to have
         # been alive in the current year then they must be dead.
 
-        date1, date2, explain, other = None, None, "", None
+        self.pset.add(person.handle)
         try:
-            date1, date2, explain, other = descendants_too_old(person, self.AVG_GENERATION_GAP)
+            evidence = self._descendant_evidence(person)
         except RuntimeError:
+            self._descendants = {}
             raise DatabaseError(
                 _("Database error: loop in %s's descendants") %
                 name_displayer.display(person))
 
-        if date1 and date2:
-            return (date1, date2, explain, other)
+        if evidence:
+            return self._descendant_range(evidence)
 
         def ancestors_too_old(person, year):
             if person.handle in self.pset:
@@ -469,6 +362,186 @@ class ProbablyAlive:
 
         return (None, None, "", None)
 
+    def clear(self):
+        """
+        Forget the results kept for the people and families of the database.
+        Needed once the database changed.
+        """
+        self._siblings = {}
+        self._spouses = {}
+        self._descendants = {}
+
+    def _sibling_range(self, family_handle):
+        """
+        Return the range estimated from the first child of a family with a
+        birth or death date, or None.  The result is the same for all the
+        children of the family, so it is kept.
+        """
+        try:
+            result = self._siblings[family_handle]
+        except KeyError:
+            result = None
+            family = self.db.get_family_from_handle(family_handle)
+            if family is not None:
+                result = self._find_sibling_range(family)
+            self._siblings[family_handle] = result
+        if result is None:
+            return None
+        return (Date(result[0]), Date(result[1]), result[2], result[3])
+
+    def _find_sibling_range(self, family):
+        """
+        Look at the events of the children of a family.
+        """
+        for child_ref in family.get_child_ref_list():
+            child_handle = child_ref.ref
+            child = self.db.get_person_from_handle(child_handle)
+            if child is None:
+                continue
+            # Go through once looking for direct evidence:
+            for ev_ref in child.get_primary_event_ref_list():
+                ev = self.db.get_event_from_handle(ev_ref.ref)
+                if ev and ev.type.is_birth():
+                    dobj = ev.get_date_object()
+                    if dobj.get_start_date() != Date.EMPTY:
+                        # if sibling birth date too far away, then not alive:
+                        year = dobj.get_year()
+                        if year != 0:
+                            # sibling birth date
+                            return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF),
+                                    Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF + self.MAX_AGE_PROB_ALIVE),
+                                    _("sibling birth date"),
+                                    child)
+                elif ev and ev.type.is_death():
+                    dobj = ev.get_date_object()
+                    if dobj.get_start_date() != Date.EMPTY:
+                        # if sibling death date too far away, then not alive:
+                        year = dobj.get_year()
+                        if year != 0:
+                            # sibling death date
+                            return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE),
+                                    Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE
+                                                            + self.MAX_AGE_PROB_ALIVE),
+                                    _("sibling death date"),
+                                    child)
+            # Go through again looking for fallback:
+            for ev_ref in child.get_primary_event_ref_list():
+                ev = self.db.get_event_from_handle(ev_ref.ref)
+                if ev and ev.type.is_birth_fallback():
+                    dobj = ev.get_date_object()
+                    if dobj.get_start_date() != Date.EMPTY:
+                        # if sibling birth date too far away, then not alive:
+                        year = dobj.get_year()
+                        if year != 0:
+                            # sibling birth date
+                            return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF),
+                                    Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF + self.MAX_AGE_PROB_ALIVE),
+                                    _("sibling birth-related date"),
+                                    child)
+                elif ev and ev.type.is_death_fallback():
+                    dobj = ev.get_date_object()
+                    if dobj.get_start_date() != Date.EMPTY:
+                        # if sibling death date too far away, then not alive:
+                        year = dobj.get_year()
+                        if year != 0:
+                            # sibling death date
+                            return (Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE),
+                                    Date().copy_ymd(year - self.MAX_SIB_AGE_DIFF - self.MAX_AGE_PROB_ALIVE + self.MAX_AGE_PROB_ALIVE),
+                                    _("sibling death-related date"),
+                                    child)
+        return None
+
+    def _spouse_range(self, spouse):
+        """
+        Return the range of a spouse, computed without looking at the
+        spouses of the spouse.
+        """
+        try:
+            return self._spouses[spouse.handle]
+        except KeyError:
+            result = self.probably_alive_range(spouse, is_spouse=True)
+            self._spouses[spouse.handle] = result
+            return result
+
+    def _descendant_evidence(self, person):
+        """
+        Return the first evidence found among the descendants of a person,
+        as an (is_birth, explain, date, descendant, generation) tuple, or
+        None.  The generation is 0 for the children of the person.  The
+        evidence of each person is only searched once; a person being
+        searched counts as having none, which stops loops.
+        """
+        handle = person.handle
+        if handle in self._descendants:
+            return self._descendants[handle]
+        self._descendants[handle] = None
+        evidence = None
+        for family_handle in person.get_family_handle_list():
+            family = self.db.get_family_from_handle(family_handle)
+            if not family:
+                # can happen with LivingProxyDb(PrivateProxyDb(db))
+                continue
+            for child_ref in family.get_child_ref_list():
+                child = self.db.get_person_from_handle(child_ref.ref)
+                evidence = self._child_evidence(child)
+                if evidence:
+                    break
+            if evidence:
+                break
+        self._descendants[handle] = evidence
+        return evidence
+
+    def _child_evidence(self, child):
+        """
+        Return the first evidence found for a child or its descendants.
+        """
+        child_birth_ref = child.get_birth_ref()
+        if child_birth_ref:
+            child_birth = self.db.get_event_from_handle(child_birth_ref.ref)
+            dobj = child_birth.get_date_object()
+            if dobj.get_start_date() != Date.EMPTY:
+                return (True, _("descendant birth date"), dobj, child, 0)
+        child_death_ref = child.get_death_ref()
+        if child_death_ref:
+            child_death = self.db.get_event_from_handle(child_death_ref.ref)
+            dobj = child_death.get_date_object()
+            if dobj.get_start_date() != Date.EMPTY:
+                return (False, _("descendant death date"), dobj, child, 0)
+        evidence = self._descendant_evidence(child)
+        if evidence:
+            return evidence[:4] + (evidence[4] + 1,)
+        # Check fallback data:
+        for ev_ref in child.get_primary_event_ref_list():
+            ev = self.db.get_event_from_handle(ev_ref.ref)
+            if ev and ev.type.is_birth_fallback():
+                dobj = ev.get_date_object()
+                if dobj.get_start_date() != Date.EMPTY:
+                    return (True, _("descendant birth-related date"), dobj,
+                            child, 0)
+            elif ev and ev.type.is_death_fallback():
+                dobj = ev.get_date_object()
+                if dobj.get_start_date() != Date.EMPTY:
+                    return (False, _("descendant death-related date"), dobj,
+                            child, 0)
+        return None
+
+    def _descendant_range(self, evidence):
+        """
+        Return the range of a person estimated from the evidence found among
+        the descendants.
+        """
+        is_birth, explain, dobj, child, generation = evidence
+        if is_birth:
+            d = Date(dobj)
+            d.set_year(d.get_year() -
+                       self.AVG_GENERATION_GAP * (generation + 1))
+            return (d, d.copy_offset_ymd(self.MAX_AGE_PROB_ALIVE),
+                    explain, child)
+        return (dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP),
+                dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP +
+                                     self.MAX_AGE_PROB_ALIVE),
+                explain, child)
+
 #-------------------------------------------------------------------------
 #
 # probably_alive
@@ -501,9 +574,10 @@ def probably_alive(person, db,
             max_sib_age_diff, max_age_prob_alive, avg_generation_gap)
     if current_date is None:
         current_date = Today()
-    LOG.debug("%s: b.%s, d.%s - %s".format(
-        " ".join(person.get_primary_name().get_text_data_list()),
-        birth, death, explain))
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug("%s: b.%s, d.%s - %s",
+                  " ".join(person.get_primary_name().get_text_data_list()),
+                  birth, death, explain)
     if not birth or not death:
         # no evidence, must consider alive
         return ((True, None, None, _("no evidence"), None) if return_range
@@ -533,11 +607,41 @@ def probably_alive_range(person, db,
     basedb = db
     while isinstance(basedb, ProxyDbBase):
         basedb = basedb.db
-    # Now, we create a wrapper for doing work:
-    pb = ProbablyAlive(basedb, max_sib_age_diff,
-                       max_age_prob_alive, avg_generation_gap)
+    # Now, we get a wrapper for doing work:
+    pb = get_probably_alive(basedb, max_sib_age_diff,
+                            max_age_prob_alive, avg_generation_gap)
     return pb.probably_alive_range(person)
 
+def get_probably_alive(db,
+                       max_sib_age_diff=None,
+                       max_age_prob_alive=None,
+                       avg_generation_gap=None):
+    """
+    Return a ProbablyAlive for the database and parameters.
+
+    The same object is returned while the database, the parameters and the
+    current date do not change, so the results it keeps are shared by the
+    calls made for all the people of a database, like those of a
+    LivingProxyDb or a filter.
+    """
+    pb = ProbablyAlive(db, max_sib_age_diff,
+                       max_age_prob_alive, avg_generation_gap)
+    changed = getattr(db, 'has_changed', None)
+    if changed is None:
+        return pb
+    # commits change has_changed, undo and redo the change serial
+    key = (pb.MAX_SIB_AGE_DIFF, pb.MAX_AGE_PROB_ALIVE, pb.AVG_GENERATION_GAP,
+           Today().get_ymd(), changed, db.get_change_serial())
+    try:
+        shared = _ENGINES.get(db)
+    except TypeError:
+        # not weakly referenceable
+        return pb
+    if shared is not None and shared[0] == key:
+        return shared[1]
+    _ENGINES[db] = (key, pb)
+    return pb
+
 def update_constants():
     """
     Used to update the constants that are cached in this module.
@@ -426,6 +426,13 @@ class Callback:
     def enable_signals(self):
         self.__block_instance_signals = False
 
+    def signals_enabled(self):
+        """
+        Return True if the signals of this instance are emitted.
+        """
+        return not (self.__BLOCK_ALL_SIGNALS or
+                    self.__block_instance_signals)
+
     # logging methods
 
     def disable_logging(self):
@@ -32,25 +32,57 @@ def get_location_list(db, place, date=None, lang=''):
     """
     Return a list of place names for display.
     """
+    return get_location_chain(db, place, date, lang)[1]
+
+def get_location_chain(db, place, date=None, lang=''):
+    """
+    Return the handles of the places in the hierarchy above the given place,
+    starting with the place itself, and the list of their names for display.
+
+    The hierarchy above the place is read from the place cache of the
+    database, if it has one, so the given place may be an edited copy of a
+    place in the database.
+    """
     if date is None:
         date = __get_latest_date(place)
-    visited = [place.handle]
+    handles = [place.handle]
     lines = [(__get_name(place, date, lang), place.get_type())]
-    while True:
-        handle = None
-        for placeref in place.get_placeref_list():
-            ref_date = placeref.get_date_object()
-            if ref_date.is_empty() or date.match_exact(ref_date):
-                handle = placeref.ref
-                break
-        if handle is None or handle in visited:
-            break
-        place = db.get_place_from_handle(handle)
+    handle = __get_parent(place, date)
+    cache = db.get_place_cache()
+    if cache is None:
+        __add_parents(db.get_place_from_handle, handle, date, lang,
+                      handles, lines)
+    elif handle is not None and handle != place.handle:
+        key = ('location', handle, date.serialize(), lang)
+        parents = cache.lookup(key)
+        if parents is None:
+            parents = ([], [])
+            __add_parents(cache.get_place, handle, date, lang, *parents)
+            cache.store(key, parents, parents[0])
+        parent_handles, parent_lines = parents
+        if place.handle in parent_handles:
+            end = parent_handles.index(place.handle)
+        else:
+            end = len(parent_handles)
+        handles.extend(parent_handles[:end])
+        lines.extend(parent_lines[:end])
+    return handles, lines
+
+def __add_parents(get_place, handle, date, lang, handles, lines):
+    while handle is not None and handle not in handles:
+        place = get_place(handle)
         if place is None:
             break
-        visited.append(handle)
+        handles.append(handle)
         lines.append((__get_name(place, date, lang), place.get_type()))
-    return lines
+        handle = __get_parent(place, date)
+
+def __get_parent(place, date):
+    for placeref in place.get_placeref_list():
+        ref_date = placeref.get_date_object()
+        if ref_date.is_empty() or date.match_exact(ref_date):
+            return placeref.ref
+    return None
 
 def __get_name(place, date, lang):
     endonym = None
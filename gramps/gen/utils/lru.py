@@ -25,14 +25,7 @@
 Least recently used algorithm
 """
 
-class Node:
-    """
-    Node to be stored in the LRU structure
-    """
-    def __init__(self, prev, value):
-        self.prev = prev
-        self.value = value
-        self.next = None
+from collections import OrderedDict
 
 class LRU:
     """
@@ -43,9 +36,7 @@ class LRU:
         Set count to 0 or 1 to disable.
         """
         self.count = count
-        self.data = {}
-        self.first = None
-        self.last = None
+        self.data = OrderedDict()
 
     def __contains__(self, obj):
         """
@@ -53,11 +44,19 @@ class LRU:
         """
         return obj in self.data
 
+    def __len__(self):
+        """
+        Return the number of items in the LRU
+        """
+        return len(self.data)
+
     def __getitem__(self, obj):
         """
-        Return item associated with Obj
+        Return item associated with Obj, marking it as recently used
         """
-        return self.data[obj].value[1]
+        value = self.data[obj]
+        self.data.move_to_end(obj)
+        return value
 
     def __setitem__(self, obj, val):
         """
@@ -65,64 +64,28 @@ class LRU:
         """
         if self.count <= 1: # Disabled
             return
-        if obj in self.data:
-            del self[obj]
-        nobj = Node(self.last, (obj, val))
-        if self.first is None:
-            self.first = nobj
-        if self.last:
-            self.last.next = nobj
-        self.last = nobj
-        self.data[obj] = nobj
+        self.data[obj] = val
+        self.data.move_to_end(obj)
         if len(self.data) > self.count:
-            if self.first == self.last:
-                self.first = None
-                self.last = None
-                return
-            lnk = self.first
-            lnk.next.prev = None
-            self.first = lnk.next
-            lnk.next = None
-            if lnk.value[0] in self.data:
-                del self.data[lnk.value[0]]
-            del lnk
+            self.data.popitem(last=False)
 
     def __delitem__(self, obj):
         """
         Delete the object from the LRU
         """
-        nobj = self.data[obj]
-        if nobj.prev:
-            nobj.prev.next = nobj.next
-        else:
-            self.first = nobj.next
-        if nobj.next:
-            nobj.next.prev = nobj.prev
-        else:
-            self.last = nobj.prev
         del self.data[obj]
 
     def __iter__(self):
         """
-        Iterate over the LRU
+        Iterate over the LRU, from the least recently used value
         """
-        cur = self.first
-        while cur is not None:
-            cur2 = cur.next
-            yield cur.value[1]
-            cur = cur2
-        raise StopIteration
+        return iter(list(self.data.values()))
 
     def iteritems(self):
         """
         Return items in the LRU using a generator
         """
-        cur = self.first
-        while cur is not None:
-            cur2 = cur.next
-            yield cur.value
-            cur = cur2
-        raise StopIteration
+        return iter(list(self.data.items()))
 
     def iterkeys(self):
         """
@@ -134,50 +97,28 @@ class LRU:
         """
         Return items and keys in the LRU using a generator
         """
-        for data in self.items():
-            yield data[1]
+        return iter(self)
 
     def keys(self):
         """
         Return all keys
         """
-        return [data[0] for data in self.items()]
+        return list(self.data.keys())
 
     def values(self):
         """
         Return all values
         """
-        return [data[1] for data in self.items()]
+        return list(self.data.values())
 
     def items(self):
         """
         Return all items
         """
-        return [data[0] for data in self.items()]
+        return list(self.data.items())
 
     def clear(self):
         """
         Empties LRU
         """
-        # Step through the doubly linked list, setting prev and next to None.
-        # This ensures that each node is unreachable and therefore eligible for
-        # garbage collection. "del" is also called for each node, but it is
-        # unclear whether this actually has any effect, of just removes the
-        # binding to nobj
-        nobj = self.first
-        # The references first and last are removed so that the nodes are not
-        # reachable from these
-        self.first = None
-        self.last = None
-        # The references from self.data are removed
         self.data.clear()
-        while nobj is not None and nobj.next is not None:
-            # each node except the last is processed
-            nobj.next.prev = None
-            nextobj = nobj.next
-            nobj.next = None
-            del nobj
-            nobj = nextobj
-        if nobj is not None:
-            # The last node is processed
-            del nobj
@@ -0,0 +1,110 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import unittest
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from ...db import DbTxn
+from ...db.utils import make_database
+from ...lib import (ChildRef, Date, Event, EventRef, EventType, Family,
+                    Person)
+from ..alive import get_probably_alive, probably_alive
+
+#-------------------------------------------------------------------------
+#
+# ProbablyAliveTest class
+#
+#-------------------------------------------------------------------------
+class ProbablyAliveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        with DbTxn('Add test objects', self.db) as trans:
+            self.father = self.add_person(trans)
+            self.child = self.add_person(trans)
+            self.grandchild = self.add_person(trans, 1800)
+            self.add_family(self.father, self.child, trans)
+            self.family = self.add_family(self.child, self.grandchild, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def add_person(self, trans, year=None):
+        person = Person()
+        if year is not None:
+            event = Event()
+            event.set_type(EventType.BIRTH)
+            event.set_date_object(Date(year))
+            self.db.add_event(event, trans)
+            ref = EventRef()
+            ref.set_reference_handle(event.handle)
+            person.add_event_ref(ref)
+            person.set_birth_ref(ref)
+        self.db.add_person(person, trans)
+        return person
+
+    def add_family(self, father, child, trans):
+        family = Family()
+        family.set_father_handle(father.handle)
+        ref = ChildRef()
+        ref.set_reference_handle(child.handle)
+        family.add_child_ref(ref)
+        self.db.add_family(family, trans)
+        father.add_family_handle(family.handle)
+        self.db.commit_person(father, trans)
+        child.add_parent_family_handle(family.handle)
+        self.db.commit_person(child, trans)
+        return family
+
+    def test_descendants(self):
+        father = self.db.get_person_from_handle(self.father.handle)
+        child = self.db.get_person_from_handle(self.child.handle)
+        self.assertFalse(probably_alive(father, self.db))
+        self.assertFalse(probably_alive(child, self.db))
+        alive, birth, death, explain, other = probably_alive(
+            father, self.db, return_range=True)
+        self.assertEqual(birth.get_year(), 1760)
+        self.assertEqual(other.handle, self.grandchild.handle)
+
+    def test_shared(self):
+        engine = get_probably_alive(self.db)
+        self.assertIs(get_probably_alive(self.db), engine)
+        with DbTxn('Remove test objects', self.db) as trans:
+            self.db.remove_family_relationships(self.family.handle, trans)
+        self.assertIsNot(get_probably_alive(self.db), engine)
+        child = self.db.get_person_from_handle(self.child.handle)
+        self.assertTrue(probably_alive(child, self.db))
+        engine = get_probably_alive(self.db)
+        self.assertIsNot(get_probably_alive(self.db, max_age_prob_alive=90),
+                         engine)
+
+
+if __name__ == "__main__":
+    unittest.main()
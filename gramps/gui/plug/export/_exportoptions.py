@@ -44,7 +44,9 @@ from ...user import User
 from gramps.gen.proxy import (PrivateProxyDb,
                               LivingProxyDb,
                               FilterProxyDb,
-                              ReferencedBySelectionProxyDb)
+                              ReferencedBySelectionProxyDb,
+                              CompiledProxyDb)
+from gramps.gen.proxy.proxybase import ProxyDbBase
 
 #-------------------------------------------------------------------------
 #
@@ -582,6 +584,9 @@ class WriterOptionBox:
                     ngettext("{number_of} Person",
                              "{number_of} People", people_count
                             ).format(number_of=people_count) )
+        if not preview and isinstance(dbase, ProxyDbBase):
+            # check the objects through the stack of proxies only once
+            dbase = CompiledProxyDb(dbase)
         return dbase
 
     def apply_proxy(self, proxy_name, dbase, progress=None):
@@ -75,6 +75,7 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 from .basemodel import BaseModel
 from ...user import User
 from gramps.gen.proxy.cache import CacheProxyDb
+from .sortindex import get_sort_index
 
 #-------------------------------------------------------------------------
 #
@@ -104,24 +105,41 @@ class FlatNodeMap:
         * index2hndl : list of (srtkey, hndl) tuples. The index gives the
                         (srtkey, hndl) it belongs to.
                        This normally is only a part of all possible data
-        * hndl2index : dictionary of *hndl: index* values
+        * hndl2index : dictionary of *hndl: index* values, only built when
+                       the sortkeys of the handles are not known
 
     The implementation provides a list of (srtkey, hndl) of which the index is
-    the path, and a dictionary mapping hndl to index.
-    To obtain index given a path, method real_index() is available
+    the path. To obtain index given a path, method real_index() is available.
+    The index of a handle is found by bisecting the list with the sortkeys
+    given by sortkey_func, so no mapping of all handles is kept, and rows
+    can be inserted or deleted without renumbering the rows after them.
 
     ..Note: glocale.sort_key is applied to the underlying sort key,
             so as to have localized sort
     """
 
-    def __init__(self):
+    def __init__(self, sortkey_func=None, generation_func=None):
         """
         Create a new instance.
+
+        :param sortkey_func: returns the sortkeys a handle may have been
+                    stored with, the current one first. Without it, a
+                    hndl2index map is built when needed.
+        :param generation_func: returns a number which changes when
+                    sortkey_func forgets the sortkeys the handles had
+                    before. The hndl2index map is then used until the map
+                    is set again.
         """
         self._index2hndl = []
         self._fullhndl = self._index2hndl
         self._identical = True
-        self._hndl2index = {}
+        self._index_sortkeys = sortkey_func
+        self._generation_func = generation_func
+        self._sortkey_func = sortkey_func
+        self._generation = generation_func() if generation_func else None
+        self._hndl2index = None
+        # sortkeys of the handles inserted since set_path_map
+        self._inserted = {}
         self._reverse = False
         self.__corr = (0, 1)
         #We create a stamp to recognize invalid iterators. From the docs:
@@ -138,15 +156,18 @@ class FlatNodeMap:
         """
         self._index2hndl = None
         self._fullhndl = None
+        self._index_sortkeys = None
+        self._generation_func = None
+        self._sortkey_func = None
         self._hndl2index = None
+        self._inserted = None
 
     def set_path_map(self, index2hndllist, fullhndllist, identical=True,
                      reverse=False):
         """
         This is the core method to set up the FlatNodeMap
         Input is a list of (srtkey, handle), of which the index is the path
-        Calling this method sets the index2hndllist, and creates the hndl2index
-        map.
+        Calling this method sets the index2hndllist.
         fullhndllist is the entire list of (srtkey, handle) that is possible,
         normally index2hndllist is only part of this list as determined by
         filtering. To avoid memory, if both lists are the same, pass only one
@@ -168,10 +189,12 @@ class FlatNodeMap:
         """
         self.stamp += 1
         self._index2hndl = index2hndllist
-        self._hndl2index = {}
+        self._hndl2index = None
+        self._inserted = {}
+        self._reset_sortkeys()
         self._identical = identical
         self._fullhndl = self._index2hndl if identical else fullhndllist
-        self._reverse = reverse
+        self._reverse = not reverse
         self.reverse_order()
 
     def full_srtkey_hndl_map(self):
@@ -185,22 +208,49 @@ class FlatNodeMap:
     def reverse_order(self):
         """
         This method keeps the index2hndl map, but sets it up the index in
-        reverse order. If the hndl2index map does not exist yet, it is created
-        in the acending order as given in index2hndl
-        The result is always a hndl2index map wich is correct, so or ascending
-        order, or reverse order.
-        """
-        if self._hndl2index:
-            #if hndl2index is build already, invert order, otherwise keep
-            # requested order
-            self._reverse = not self._reverse
+        reverse order.
+        """
+        self._reverse = not self._reverse
         if self._reverse:
             self.__corr = (len(self._index2hndl) - 1, -1)
         else:
             self.__corr = (0, 1)
-        if not self._hndl2index:
-            self._hndl2index = dict((key[1], index)
-                for index, key in enumerate(self._index2hndl))
+
+    def _reset_sortkeys(self):
+        """
+        Find the handles with the sortkeys of sortkey_func again, as they
+        are those of the rows of a new map.
+        """
+        self._sortkey_func = self._index_sortkeys
+        if self._generation_func is not None:
+            self._generation = self._generation_func()
+
+    def _get_index(self, handle):
+        """
+        Return the index of the handle in index2hndl, or None if the handle
+        is not present.
+        """
+        if (self._sortkey_func is not None and
+                self._generation_func is not None and
+                self._generation != self._generation_func()):
+            # the rows may have sortkeys the sort index no longer knows, as
+            # when it was built again
+            self._sortkey_func = None
+            self._inserted = {}
+        if self._sortkey_func is None:
+            if self._hndl2index is None:
+                self._hndl2index = dict((key[1], index)
+                    for index, key in enumerate(self._index2hndl))
+            return self._hndl2index.get(handle)
+        keys = list(self._sortkey_func(handle))
+        if handle in self._inserted:
+            keys.insert(0, self._inserted[handle])
+        for srtkey in keys:
+            index = bisect.bisect_left(self._index2hndl, (srtkey, handle))
+            if (index < len(self._index2hndl) and
+                    self._index2hndl[index][1] == handle):
+                return index
+        return None
 
     def real_path(self, index):
         """
@@ -223,9 +273,11 @@ class FlatNodeMap:
         Clears out the index2hndl and the hndl2index
         """
         self._index2hndl = []
-        self._hndl2index = {}
+        self._hndl2index = None
+        self._inserted = {}
         self._fullhndl = self._index2hndl
         self._identical = True
+        self._reset_sortkeys()
 
     def get_path(self, iter):
         """
@@ -254,7 +306,7 @@ class FlatNodeMap:
         :type handle: an object handle
         :Returns: the path, or None if handle does not link to a path
         """
-        index = self._hndl2index.get(handle)
+        index = self._get_index(handle)
         if index is None:
             return None
 
@@ -269,20 +321,26 @@ class FlatNodeMap:
         :type handle: an object handle
         :Returns: the sortkey, or None if handle is not present
         """
-        index = self._hndl2index.get(handle)
+        index = self._get_index(handle)
         return None if index is None else self._index2hndl[index][0]
 
     def new_iter(self, handle):
         """
         Return a new iter containing the handle
         """
+        return self._new_iter_index(self._get_index(handle))
+
+    def _new_iter_index(self, index):
+        """
+        Return a new iter containing the index
+        """
         iter = Gtk.TreeIter()
         iter.stamp = self.stamp
         ##GTK3: user data may only be an integer, we store the index
         ##PROBLEM: pygobject 3.8 stores 0 as None, we need to correct
         ##        when using user_data for that!
         ##upstream bug: https://bugzilla.gnome.org/show_bug.cgi?id=698366
-        iter.user_data = self._hndl2index[handle]
+        iter.user_data = index
         return iter
 
     def get_iter(self, path):
@@ -297,8 +355,10 @@ class FlatNodeMap:
         :param path: path as it appears in the treeview
         :type path: integer
         """
-        iter = self.new_iter(self._index2hndl[self.real_index(path)][1])
-        return iter
+        index = self.real_index(path)
+        if not 0 <= index < len(self._index2hndl):
+            raise IndexError(path)
+        return self._new_iter_index(index)
 
     def get_handle(self, path):
         """
@@ -368,7 +428,7 @@ class FlatNodeMap:
     def insert(self, srtkey_hndl, allkeyonly=False):
         """
         Insert a node. Given is a tuple (sortkey, handle), and this is added
-        in the correct place, while the hndl2index map is updated.
+        in the correct place.
         Returns the path of the inserted row
 
         :param srtkey_hndl: the (sortkey, handle) tuple that must be inserted
@@ -377,7 +437,7 @@ class FlatNodeMap:
         :Returns: path of the row inserted in the treeview
         :Returns type: Gtk.TreePath or None
         """
-        if srtkey_hndl[1] in self._hndl2index:
+        if self._get_index(srtkey_hndl[1]) is not None:
             print(('WARNING: Attempt to add row twice to the model (%s)' %
                     srtkey_hndl[1]))
             return
@@ -388,10 +448,13 @@ class FlatNodeMap:
                 return None
         insert_pos = bisect.bisect_left(self._index2hndl, srtkey_hndl)
         self._index2hndl.insert(insert_pos, srtkey_hndl)
-        #make sure the index map is updated
-        for srt_key,hndl in self._index2hndl[insert_pos+1:]:
-            self._hndl2index[hndl] += 1
-        self._hndl2index[srtkey_hndl[1]] = insert_pos
+        if self._sortkey_func is not None:
+            self._inserted[srtkey_hndl[1]] = srtkey_hndl[0]
+        elif self._hndl2index is not None:
+            #make sure the index map is updated
+            for srt_key,hndl in self._index2hndl[insert_pos+1:]:
+                self._hndl2index[hndl] += 1
+            self._hndl2index[srtkey_hndl[1]] = insert_pos
         #update self.__corr so it remains correct
         if self._reverse:
             self.__corr = (len(self._index2hndl) - 1, -1)
@@ -400,7 +463,7 @@ class FlatNodeMap:
     def delete(self, handle):
         """
         Delete the row with the given (handle).
-        This then rebuilds the hndl2index, subtracting one from each item
+        If the hndl2index map is used, this subtracts one from each item
         greater than the deleted index.
         path of deleted row is returned
         If handle is not present, None is returned
@@ -410,27 +473,30 @@ class FlatNodeMap:
         :Returns: path of the row deleted from the treeview
         :Returns type: Gtk.TreePath or None
         """
+        #find it in the view before it is removed from the full list
+        index = self._get_index(handle)
         #remove it from the full list first
         if not self._identical:
             for indx, hndle in enumerate(self._fullhndl):
-                if self.hndle[1] == handle:
+                if hndle[1] == handle:
                     del self._fullhndl[indx]
                     break
         #now remove it from the index maps
-        try:
-            index = self._hndl2index[handle]
-        except KeyError:
+        if index is None:
             # key not present in the treeview
             return None
-        del self._index2hndl[index]
-        del self._hndl2index[handle]
         #update self.__corr so it remains correct
         delpath = self.real_path(index)
+        del self._index2hndl[index]
+        if self._inserted:
+            self._inserted.pop(handle, None)
+        if self._hndl2index is not None:
+            del self._hndl2index[handle]
+            #update the handle2path map so it remains correct
+            for dummy_srt_key, hndl in self._index2hndl[index:]:
+                self._hndl2index[hndl] -= 1
         if self._reverse:
             self.__corr = (len(self._index2hndl) - 1, -1)
-        #update the handle2path map so it remains correct
-        for dummy_srt_key, hndl in self._index2hndl[index:]:
-            self._hndl2index[hndl] -= 1
         return Gtk.TreePath((delpath,))
 
 
@@ -475,10 +541,24 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         # get the function that maps data to sort_keys
         self.sort_func = lambda x: glocale.sort_key(self.smap[col](x))
         self.sort_col = scol
+        self.sort_index = None
+        cursor_name = getattr(getattr(self, 'gen_cursor', None), '__name__',
+                              '')
+        if (db is not None and cursor_name.startswith('get_') and
+                cursor_name.endswith('_cursor')):
+            # the table is named after the cursor, like get_event_cursor
+            self.sort_index = get_sort_index(
+                db, '%s-%d' % (self.__class__.__name__, col),
+                cursor_name[len('get_'):-len('_cursor')],
+                self.sort_func, self.gen_cursor)
         self.skip = skip
         self._in_build = False
 
-        self.node_map = FlatNodeMap()
+        if self.sort_index:
+            self.node_map = FlatNodeMap(self.sort_index.get_sortkeys,
+                                        self.sort_index.get_generation)
+        else:
+            self.node_map = FlatNodeMap()
         self.set_search(search)
 
         self._reverse = (order == Gtk.SortType.DESCENDING)
@@ -492,6 +572,9 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         Unset all elements that prevent garbage collection
         """
         BaseModel.destroy(self)
+        if self.sort_index:
+            self.sort_index.detach(self.sort_func)
+        self.sort_index = None
         self.db = None
         self.sort_func = None
         if self.node_map:
@@ -563,6 +646,8 @@ class FlatBaseModel(GObject.GObject, Gtk.TreeModel, BaseModel):
         be shown.
         This list is sorted ascending, via localized string sort.
         """
+        if self.sort_index:
+            return self.sort_index.get_keys()
         # use cursor as a context manager
         with self.gen_cursor() as cursor:
             #loop over database and store the sort field, and the handle
@@ -0,0 +1,310 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Sorted (sortkey, handle) lists of the objects of a table, shared by the flat
+views and kept in a file beside the database between sessions.
+
+Building the list of a large table means reading and decoding every object,
+so each list is kept in memory while the database is open, and updated from
+the signals of its table.  It is saved in the "sortkeys" directory of the
+database with the change serial of the database, and only read back if the
+database did not change since.
+
+A sort key may depend on other objects than the one sorted, like the place
+of an event, so a list is not saved again once such objects changed during
+the session.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import bisect
+import logging
+import os
+import pickle
+import weakref
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from gramps.gen.config import config
+from gramps.gen.const import VERSION, GRAMPS_LOCALE as glocale
+
+_LOG = logging.getLogger(".gui.sortindex")
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+SORTKEY_DIR = "sortkeys"
+SORTKEY_VERSION = 1
+
+_TABLES = ('person', 'family', 'event', 'place', 'source', 'citation',
+           'media', 'repository', 'note', 'tag')
+
+# database -> {(name, signature): SortKeyIndex}
+_INDEXES = weakref.WeakKeyDictionary()
+
+#-------------------------------------------------------------------------
+#
+# Functions
+#
+#-------------------------------------------------------------------------
+def _signature():
+    """
+    Return the settings the sort keys of the views depend on.
+    """
+    return (VERSION, glocale.get_collation(),
+            config.get('preferences.name-format'),
+            config.get('preferences.date-format'),
+            config.get('preferences.place-format'),
+            config.get('preferences.place-auto'))
+
+def get_sort_index(db, name, table, sort_func, gen_cursor):
+    """
+    Return the sort index of the given name for a database, creating it if
+    needed.
+
+    :param db: the database
+    :param name: identifies the view and column sorted
+    :type name: str
+    :param table: the table sorted, like 'event'
+    :type table: str
+    :param sort_func: returns the sort key of the raw data of an object
+    :param gen_cursor: returns a cursor over the raw data of the table
+    """
+    indexes = _INDEXES.setdefault(db, {})
+    key = (name, _signature())
+    index = indexes.get(key)
+    if index is None:
+        index = SortKeyIndex(db, name, table, key[1])
+        indexes[key] = index
+    index.attach(sort_func, gen_cursor)
+    return index
+
+#-------------------------------------------------------------------------
+#
+# SortKeyIndex
+#
+#-------------------------------------------------------------------------
+class SortKeyIndex:
+    """
+    The sorted (sortkey, handle) list of the objects of a table.
+
+    The sort function belongs to a view model, so it is only used while the
+    model is attached.  The index is shared by all the models of a view and
+    column, like those of the view and of a selector, and uses the sort
+    function of the last one attached.  Changes to the table while no model
+    is attached drop the list, which is built again when next needed.
+    """
+
+    def __init__(self, db, name, table, signature):
+        self.db = db
+        self.table = table
+        self.signature = signature
+        self.path = None
+        directory = db.get_save_path()
+        if (directory and directory != ":memory:" and
+                db.get_change_serial() is not None):
+            self.path = os.path.join(directory, SORTKEY_DIR, name + ".pkl")
+        self.sort_func = None
+        self.gen_cursor = None
+        self._attached = []     # (sort_func, gen_cursor) of the models
+        self._keys = None       # sorted (sortkey, handle) list
+        self._handles = {}      # handle -> sortkey
+        self._old_keys = {}     # handle -> previous sortkeys
+        self._saveable = False  # the keys can be saved with the serial
+        self._saved = False
+        self._generation = 0    # changed when the old sortkeys are dropped
+        self._signal_keys = []
+        for obj in _TABLES:
+            if obj == table:
+                signals = (('-add', self._update), ('-update', self._update),
+                           ('-delete', self._delete),
+                           ('-rebuild', self._drop))
+            else:
+                signals = (('-update', self._unsaveable),
+                           ('-delete', self._unsaveable),
+                           ('-rebuild', self._unsaveable))
+            for signal, method in signals:
+                self._signal_keys.append(db.connect(obj + signal, method))
+
+    def attach(self, sort_func, gen_cursor):
+        """
+        Use the sort function of a view model, until it is detached.
+        """
+        if sort_func is not None:
+            self._attached.append((sort_func, gen_cursor))
+            self.sort_func, self.gen_cursor = sort_func, gen_cursor
+
+    def detach(self, sort_func):
+        """
+        Save the list, and stop using the sort function of a view model.
+        The sort function of another model still attached is used instead.
+        """
+        self.save()
+        self._attached = [pair for pair in self._attached
+                          if pair[0] is not sort_func]
+        if self._attached:
+            self.sort_func, self.gen_cursor = self._attached[-1]
+        else:
+            self.sort_func = None
+            self.gen_cursor = None
+
+    def get_keys(self):
+        """
+        Return a new sorted list of the (sortkey, handle) tuples of all the
+        objects of the table.
+        """
+        if self._keys is None and not self._load():
+            self._build()
+        return list(self._keys)
+
+    def get_slice(self, start, stop):
+        """
+        Return the handles of the objects from position start to stop in the
+        sorted list.
+        """
+        if self._keys is None and not self._load():
+            self._build()
+        return [handle for dummy_key, handle in self._keys[start:stop]]
+
+    def get_sortkeys(self, handle):
+        """
+        Return the sortkeys the object with the given handle has, or had
+        during the session, the current one first.  The lists returned by
+        get_keys can be searched with them after the object changed.
+        """
+        keys = []
+        if handle in self._handles:
+            keys.append(self._handles[handle])
+        keys.extend(self._old_keys.get(handle, ()))
+        return keys
+
+    def get_generation(self):
+        """
+        Return a number which changes whenever the index forgets the
+        previous sortkeys of the objects, so get_sortkeys may no longer
+        return the sortkeys of the lists returned before.
+        """
+        return self._generation
+
+    def _build(self):
+        with self.gen_cursor() as cursor:
+            self._keys = [(self.sort_func(data), handle)
+                          for handle, data in cursor]
+        self._keys.sort()
+        self._handles = {handle: key for key, handle in self._keys}
+        self._saveable = True
+        self._saved = False
+        self.save()
+
+    def _load(self):
+        """
+        Read the list saved for the current state of the database.  Return
+        True on success.
+        """
+        if self.path is None:
+            return False
+        try:
+            with open(self.path, "rb") as index_file:
+                header = pickle.load(index_file)
+                if header != (SORTKEY_VERSION, self.signature,
+                              self.db.get_change_serial()):
+                    return False
+                keys = pickle.load(index_file)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError,
+                TypeError, AttributeError) as err:
+            _LOG.debug("cannot read %s: %s", self.path, err)
+            return False
+        self._keys = keys
+        self._handles = {handle: key for key, handle in keys}
+        self._saveable = True
+        self._saved = True
+        return True
+
+    def save(self):
+        """
+        Save the list, if it matches the data of the database.
+        """
+        if (self.path is None or self._keys is None or not self._saveable or
+                self._saved or self.db.transaction is not None):
+            return
+        header = (SORTKEY_VERSION, self.signature, self.db.get_change_serial())
+        temp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, "wb") as index_file:
+                pickle.dump(header, index_file, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(self._keys, index_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+            self._saved = True
+        except OSError as err:
+            _LOG.warning("cannot save %s: %s", self.path, err)
+
+    def _update(self, handles):
+        if self._keys is None:
+            return
+        if self.sort_func is None:
+            self._drop()
+            return
+        get_raw_data = self.db.method("get_raw_%s_data", self.table)
+        for handle in handles:
+            data = get_raw_data(handle)
+            if data is None:
+                continue
+            self._remove(handle)
+            key = self.sort_func(data)
+            bisect.insort(self._keys, (key, handle))
+            self._handles[handle] = key
+        self._saved = False
+
+    def _delete(self, handles):
+        if self._keys is None:
+            return
+        for handle in handles:
+            self._remove(handle)
+        self._saved = False
+
+    def _remove(self, handle):
+        key = self._handles.pop(handle, None)
+        if key is not None:
+            old_keys = self._old_keys.setdefault(handle, [])
+            if key not in old_keys:
+                old_keys.insert(0, key)
+            index = bisect.bisect_left(self._keys, (key, handle))
+            if (index < len(self._keys) and
+                    self._keys[index] == (key, handle)):
+                del self._keys[index]
+
+    def _drop(self):
+        self._keys = None
+        self._handles = {}
+        self._old_keys = {}
+        self._generation += 1
+
+    def _unsaveable(self, *args):
+        self._saveable = False
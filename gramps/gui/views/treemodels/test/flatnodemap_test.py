@@ -0,0 +1,67 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import unittest
+
+from ..flatbasemodel import FlatNodeMap
+
+class FlatNodeMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sortkeys = {'h1': ['a'], 'h2': ['b'], 'h3': ['c']}
+        self.generation = 0
+        self.node_map = FlatNodeMap(
+            lambda handle: self.sortkeys.get(handle, []),
+            lambda: self.generation)
+        rows = [('a', 'h1'), ('b', 'h2'), ('c', 'h3')]
+        self.node_map.set_path_map(rows, rows)
+
+    def test_sortkeys(self):
+        self.assertEqual(self.node_map.get_path_from_handle('h2')[0], 1)
+        self.assertIsNone(self.node_map.get_path_from_handle('h4'))
+
+    def test_absent(self):
+        # the rows are only looked for with their sortkeys
+        self.sortkeys['h2'] = ['d']
+        self.assertIsNone(self.node_map.get_path_from_handle('h2'))
+        self.assertEqual(self.node_map.insert(('bb', 'h4'))[0], 2)
+        self.assertEqual(self.node_map.get_path_from_handle('h4')[0], 2)
+        self.assertEqual(self.node_map.get_path_from_handle('h3')[0], 3)
+
+    def test_unknown_sortkeys(self):
+        # the sort index was built again without the old sortkeys
+        self.sortkeys.clear()
+        self.generation += 1
+        self.assertEqual(self.node_map.get_path_from_handle('h2')[0], 1)
+        self.assertEqual(self.node_map.insert(('bb', 'h4'))[0], 2)
+        self.assertEqual(self.node_map.delete('h2')[0], 1)
+        self.assertIsNone(self.node_map.get_path_from_handle('h2'))
+        self.assertEqual(self.node_map.get_path_from_handle('h4')[0], 1)
+        self.assertEqual(self.node_map.get_path_from_handle('h3')[0], 2)
+        # the sortkeys are used again for a new map
+        rows = [('a', 'h1'), ('c', 'h3')]
+        self.node_map.set_path_map(rows, rows)
+        self.sortkeys.update({'h1': ['a'], 'h3': ['c']})
+        self.assertEqual(self.node_map.get_path_from_handle('h3')[0], 1)
+        self.assertIsNone(self.node_map._hndl2index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import shutil
+import tempfile
+import unittest
+
+from gramps.gen.db import DbTxn
+from gramps.gen.db.utils import make_database
+from gramps.gen.lib import Note
+from ..sortindex import get_sort_index
+
+def sort_func(data):
+    return Note.create(data).get()
+
+class SortKeyIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = self.open_database()
+        with DbTxn('Add test objects', self.db) as trans:
+            for text in ('c', 'a', 'b'):
+                self.db.add_note(Note(text), trans)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory)
+
+    def open_database(self):
+        db = make_database("sqlite")
+        db.load(self.directory)
+        return db
+
+    def get_index(self):
+        return get_sort_index(self.db, 'NoteModel-0', 'note', sort_func,
+                              self.db.get_note_cursor)
+
+    def keys(self, index):
+        return [key for key, handle in index.get_keys()]
+
+    def test_update(self):
+        index = self.get_index()
+        self.assertEqual(self.keys(index), ['a', 'b', 'c'])
+        note = Note('ab')
+        with DbTxn('Add test objects', self.db) as trans:
+            self.db.add_note(note, trans)
+        self.assertEqual(self.keys(index), ['a', 'ab', 'b', 'c'])
+        with DbTxn('Remove test objects', self.db) as trans:
+            self.db.remove_note(note.handle, trans)
+        self.assertEqual(self.keys(index), ['a', 'b', 'c'])
+        self.assertEqual(len(index.get_slice(1, 3)), 2)
+
+    def test_sortkeys(self):
+        index = self.get_index()
+        keys = index.get_keys()
+        handle = keys[0][1]
+        note = self.db.get_note_from_handle(handle)
+        note.set('d')
+        with DbTxn('Edit test objects', self.db) as trans:
+            self.db.commit_note(note, trans)
+        self.assertEqual(index.get_sortkeys(handle), ['d', 'a'])
+        self.assertEqual(self.keys(index), ['b', 'c', 'd'])
+
+    def test_shared(self):
+        index = self.get_index()
+        def other_func(data):
+            return sort_func(data)
+        self.assertIs(get_sort_index(self.db, 'NoteModel-0', 'note',
+                                     other_func, self.db.get_note_cursor),
+                      index)
+        handle = index.get_keys()[0][1]
+        index.detach(other_func)
+        note = self.db.get_note_from_handle(handle)
+        note.set('d')
+        with DbTxn('Edit test objects', self.db) as trans:
+            self.db.commit_note(note, trans)
+        self.assertEqual(index.get_sortkeys(handle), ['d', 'a'])
+        self.assertEqual(self.keys(index), ['b', 'c', 'd'])
+
+    def test_saved(self):
+        index = self.get_index()
+        self.assertEqual(self.keys(index), ['a', 'b', 'c'])
+        index.detach(sort_func)
+        self.db.close()
+        self.db = self.open_database()
+        index = get_sort_index(self.db, 'NoteModel-0', 'note', None, None)
+        self.assertEqual(self.keys(index), ['a', 'b', 'c'])
+
+    def test_changed(self):
+        index = self.get_index()
+        self.assertEqual(self.keys(index), ['a', 'b', 'c'])
+        index.detach(sort_func)
+        with DbTxn('Add test objects', self.db) as trans:
+            self.db.add_note(Note('d'), trans)
+        self.db.close()
+        self.db = self.open_database()
+        self.assertEqual(self.keys(self.get_index()), ['a', 'b', 'c', 'd'])
+
+    def test_changed_later(self):
+        """
+        The list is not used after a session which changed the database
+        without reading its serial number.
+        """
+        index = self.get_index()
+        self.assertEqual(self.keys(index), ['a', 'b', 'c'])
+        index.detach(sort_func)
+        self.db.close()
+        self.db = self.open_database()
+        with DbTxn('Add test objects', self.db) as trans:
+            self.db.add_note(Note('d'), trans)
+        self.db.close()
+        self.db = self.open_database()
+        self.assertEqual(self.keys(self.get_index()), ['a', 'b', 'c', 'd'])
+
+
+if __name__ == "__main__":
+    unittest.main()
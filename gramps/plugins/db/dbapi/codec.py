@@ -0,0 +1,103 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Codecs used to store serialized objects in the blob_data columns.
+
+Every blob starts with a byte identifying its format, so a blob can always
+be decoded whichever codec is selected for the tree.  The selected codec only
+determines how new blobs are written.  This allows a tree to be converted
+from one codec to another while it is open.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Standard python modules
+#
+#-------------------------------------------------------------------------
+import pickle
+import zlib
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+PICKLE_PROTOCOL = 4     # Supported by all Python 3 versions we run on
+COMPRESS_MIN = 512      # Smallest blob worth compressing
+ZLIB_TAG = b'Z'         # Never the first byte of a pickle
+DEFAULT_CODEC = 'pickle'
+
+#-------------------------------------------------------------------------
+#
+# Codec classes
+#
+#-------------------------------------------------------------------------
+class PickleCodec:
+    """
+    Store blobs as plain pickles.
+
+    This is the format used by all previous versions of Gramps.
+    """
+    name = 'pickle'
+
+    def encode(self, data):
+        """
+        Return the blob for the serialized data of an object.
+        """
+        return pickle.dumps(data)
+
+
+class CompactCodec:
+    """
+    Store blobs as pickles with a fixed protocol, compressing large ones.
+
+    Large objects, such as notes and people with many events, typically
+    shrink to a third of their size which reduces the size of the database
+    file and the amount of it which needs to be read during a full scan.
+    """
+    name = 'compact'
+
+    def encode(self, data):
+        """
+        Return the blob for the serialized data of an object.
+        """
+        blob = pickle.dumps(data, PICKLE_PROTOCOL)
+        if len(blob) >= COMPRESS_MIN:
+            compressed = ZLIB_TAG + zlib.compress(blob)
+            if len(compressed) < len(blob):
+                return compressed
+        return blob
+
+
+CODECS = {codec.name: codec for codec in (PickleCodec(), CompactCodec())}
+
+#-------------------------------------------------------------------------
+#
+# Functions
+#
+#-------------------------------------------------------------------------
+def decode(blob):
+    """
+    Return the serialized data stored in a blob written by any codec.
+    """
+    if blob[:1] == ZLIB_TAG:
+        return pickle.loads(zlib.decompress(blob[1:]))
+    return pickle.loads(blob)
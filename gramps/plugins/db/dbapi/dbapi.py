@@ -39,24 +39,113 @@ from gramps.gen.db.dbconst import (DBLOGNAME, DBBACKEND, KEY_TO_NAME_MAP,
                                    PERSON_KEY, FAMILY_KEY, SOURCE_KEY,
                                    EVENT_KEY, MEDIA_KEY, PLACE_KEY, NOTE_KEY,
                                    TAG_KEY, CITATION_KEY, REPOSITORY_KEY,
-                                   REFERENCE_KEY)
+                                   REFERENCE_KEY, BATCHSIZE)
 from gramps.gen.db.generic import DbGeneric
+from gramps.gen.db.exceptions import DbException
 from gramps.gen.updatecallback import UpdateCallback
 from gramps.gen.lib import (Tag, Media, Person, Family, Source,
                             Citation, Event, Place, Repository, Note)
 from gramps.gen.lib.genderstats import GenderStats
 from gramps.gen.const import GRAMPS_LOCALE as glocale
+from gramps.plugins.db.dbapi.codec import CODECS, DEFAULT_CODEC, decode
+_ = glocale.translation.gettext
 
 LOG = logging.getLogger(".dbapi")
 _LOG = logging.getLogger(DBLOGNAME)
 
+# Indexes which are only needed for sorting and backlink lookups.  A batch
+# transaction writing into an empty tree drops them and creates them again
+# when it is committed.
+DEFERRED_INDEXES = (
+    ('person_surname', 'person(surname)'),
+    ('person_given_name', 'person(given_name)'),
+    ('source_title', 'source(title)'),
+    ('citation_page', 'citation(page)'),
+    ('media_desc', 'media(desc)'),
+    ('place_title', 'place(title)'),
+    ('place_enclosed_by', 'place(enclosed_by)'),
+    ('reference_ref_handle', 'reference(ref_handle)'),
+)
+
 class DBAPI(DbGeneric):
     """
     Database backends class for DB-API 2.0 databases
     """
+    def __init__(self, directory=None):
+        # Rows buffered by a batch transaction:
+        # {obj_key: {handle: (gramps_id, blob, values, references, exists)}}
+        self._batch_pending = {}
+        self._batch_ids = {}
+        self._batch_count = 0
+        self._deferred_indexes = []
+        self._codec = CODECS[DEFAULT_CODEC]
+        super().__init__(directory)
+
     def _initialize(self, directory, username, password):
         raise NotImplementedError
 
+    def load(self, directory, *args, **kwargs):
+        """
+        Open the database and select the codec recorded for the tree.
+        """
+        super().load(directory, *args, **kwargs)
+        name = self._get_metadata('blob_codec', DEFAULT_CODEC)
+        if name not in CODECS:
+            self.close(update=False)
+            raise DbException(_("This Family Tree is stored in an unknown "
+                                "format: %s") % name)
+        self._codec = CODECS[name]
+
+    def get_blob_codec(self):
+        """
+        Return the name of the codec used to write new blobs.
+        """
+        return self._codec.name
+
+    def set_blob_codec(self, name, callback=None):
+        """
+        Select the codec used to write blobs, and convert all existing blobs.
+
+        Blobs written by any codec can be read, so the tree stays usable if
+        the conversion is interrupted.
+
+        :param name: the name of the codec, one of the keys of CODECS.
+        :type name: str
+        :param callback: a function called to report progress.
+        :type callback: function
+        """
+        codec = CODECS[name]
+        self._set_metadata('blob_codec', name)
+        self._codec = codec
+
+        total = 0
+        for tbl in ('people', 'families', 'events', 'places', 'sources',
+                    'citations', 'media', 'repositories', 'notes', 'tags'):
+            total += self.method("get_number_of_%s", tbl)()
+        UpdateCallback.__init__(self, callback)
+        self.set_total(total)
+
+        for obj_key in (PERSON_KEY, FAMILY_KEY, EVENT_KEY, PLACE_KEY,
+                        SOURCE_KEY, CITATION_KEY, MEDIA_KEY, REPOSITORY_KEY,
+                        NOTE_KEY, TAG_KEY):
+            table = KEY_TO_NAME_MAP[obj_key]
+            sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
+            with self.dbapi.cursor() as cursor:
+                cursor.execute("SELECT handle, blob_data FROM %s" % table)
+                rows = cursor.fetchmany()
+                while rows:
+                    updates = []
+                    for handle, blob in rows:
+                        new_blob = codec.encode(decode(blob))
+                        if new_blob != blob:
+                            updates.append([new_blob, handle])
+                        self.update()
+                    if updates:
+                        self._txn_begin()
+                        self.dbapi.executemany(sql, updates)
+                        self._txn_commit()
+                    rows = cursor.fetchmany()
+
     def _schema_exists(self):
         """
         Check to see if the schema exists.
@@ -246,8 +335,11 @@ class DBAPI(DbGeneric):
             # A batch transaction does not store the commits
             # Aborting the session completely will become impossible.
             self.abort_possible = False
+        self._update_change_serial()
         self.transaction = transaction
         self.dbapi.begin()
+        if transaction.batch and self._is_empty():
+            self._drop_deferred_indexes()
         return transaction
 
     def transaction_commit(self, txn):
@@ -262,6 +354,9 @@ class DBAPI(DbGeneric):
                   TXNUPD: "-update",
                   TXNDEL: "-delete",
                   None: "-delete"}
+        if txn.batch:
+            self._flush_batch()
+            self._create_deferred_indexes()
         self.dbapi.commit()
         if not txn.batch:
             # Now, emit signals:
@@ -288,18 +383,184 @@ class DBAPI(DbGeneric):
         self._after_commit(txn)
         txn.clear()
         self.has_changed += 1  # Also gives commits since startup
+        if txn.batch or not self.signals_enabled():
+            self.unsignalled_commits += 1
 
     def transaction_abort(self, txn):
         """
         Executed after a batch operation abort.
         """
+        self._clear_batch()
         self.dbapi.rollback()
+        self.clear_cache()
+        self._id_indexes = {}
+        # the indexes may have read the changes rolled back
+        self.unsignalled_commits += 1
+        if self._deferred_indexes:
+            self.dbapi.begin()
+            self._create_deferred_indexes()
+            self.dbapi.commit()
         self.transaction = None
         txn.clear()
         txn.first = None
         txn.last = None
         self._after_commit(txn)
 
+    def _is_empty(self):
+        """
+        Return True if none of the primary tables contain any rows.
+        """
+        for table in KEY_TO_NAME_MAP.values():
+            self.dbapi.execute("SELECT 1 FROM %s LIMIT 1" % table)
+            if self.dbapi.fetchone() is not None:
+                return False
+        return True
+
+    def _drop_deferred_indexes(self, tables=None):
+        """
+        Drop the indexes which are not needed while a batch transaction
+        fills an empty tree.
+
+        :param tables: if given, only the indexes on these tables are
+                       dropped.
+        :type tables: tuple of str
+        """
+        for name, columns in DEFERRED_INDEXES:
+            if tables is not None and columns.split("(")[0] not in tables:
+                continue
+            self.dbapi.execute("DROP INDEX IF EXISTS %s" % name)
+            self._deferred_indexes.append((name, columns))
+
+    def _create_deferred_indexes(self):
+        """
+        Create the indexes dropped at the start of a batch transaction.
+        """
+        for name, columns in self._deferred_indexes:
+            self.dbapi.execute("CREATE INDEX IF NOT EXISTS %s ON %s"
+                               % (name, columns))
+        self._deferred_indexes = []
+
+    def _batch_row(self, obj_key, handle):
+        """
+        Return the row buffered for a handle by the current batch
+        transaction, or None if there isn't one.
+        """
+        pending = self._batch_pending.get(obj_key)
+        if pending:
+            return pending.get(handle)
+        return None
+
+    def _batch_commit(self, obj, obj_key):
+        """
+        Buffer a primary object committed inside a batch transaction.
+
+        The object, its secondary values and its references are written
+        together with the other buffered rows of its table when the buffer
+        is flushed. The previous data is only looked up for people, which
+        need it to keep the gender statistics and surname list correct.
+        """
+        pending = self._batch_pending.setdefault(obj_key, {})
+        ids = self._batch_ids.setdefault(obj_key, {})
+        old_data = None
+        row = pending.get(obj.handle)
+        if obj_key == PERSON_KEY:
+            old_data = self._get_raw_data(obj_key, obj.handle)
+        if row is not None:
+            exists = row[4]
+            if ids.get(row[0]) == obj.handle:
+                del ids[row[0]]
+        elif obj_key == PERSON_KEY:
+            exists = old_data is not None
+        else:
+            exists = None   # determined when the buffer is flushed
+        self._cache_remove(obj_key, obj.handle)
+        # tags have no gramps_id
+        gramps_id = getattr(obj, 'gramps_id', None)
+        pending[obj.handle] = (gramps_id,
+                               self._codec.encode(obj.serialize()),
+                               self._get_secondary_values(obj),
+                               set(obj.get_referenced_handles_recursively()),
+                               exists)
+        if gramps_id:
+            ids[gramps_id] = obj.handle
+        if row is None:
+            self._batch_count += 1
+            if self._batch_count >= BATCHSIZE:
+                self._flush_batch()
+        return old_data
+
+    def _flush_batch(self):
+        """
+        Write the rows buffered by a batch transaction to the database.
+        """
+        if not self._batch_count:
+            return
+        for obj_key, pending in self._batch_pending.items():
+            if not pending:
+                continue
+            table = KEY_TO_NAME_MAP[obj_key]
+            obj_class = KEY_TO_CLASS_MAP[obj_key]
+            columns = self._get_secondary_columns(
+                self._get_table_func(obj_class, "class_func"))
+            existing = self._get_existing_handles(
+                table, [handle for handle, row in pending.items()
+                        if row[4] is None])
+            inserts = []
+            updates = []
+            references = []
+            for handle, (gramps_id, blob, values,
+                         current_references, exists) in pending.items():
+                if exists or (exists is None and handle in existing):
+                    updates.append([blob] + values + [handle])
+                else:
+                    inserts.append([handle, blob] + values)
+                for (ref_class_name, ref_handle) in current_references:
+                    references.append([handle, obj_class,
+                                       ref_handle, ref_class_name])
+            if updates:
+                self.dbapi.executemany(
+                    "UPDATE %s SET blob_data = ?, %s WHERE handle = ?"
+                    % (table, ", ".join(["%s = ?" % column
+                                         for column in columns])),
+                    updates)
+                self.dbapi.executemany(
+                    "DELETE FROM reference WHERE obj_handle = ?",
+                    [[update[-1]] for update in updates])
+            if inserts:
+                self.dbapi.executemany(
+                    "INSERT INTO %s (handle, blob_data, %s) VALUES (%s)"
+                    % (table, ", ".join(columns),
+                       ", ".join(["?"] * (len(columns) + 2))),
+                    inserts)
+            if references:
+                self.dbapi.executemany(
+                    "INSERT INTO reference "
+                    "(obj_handle, obj_class, ref_handle, ref_class) "
+                    "VALUES (?, ?, ?, ?)",
+                    references)
+        self._clear_batch()
+
+    def _clear_batch(self):
+        """
+        Discard the rows buffered by a batch transaction.
+        """
+        self._batch_pending.clear()
+        self._batch_ids.clear()
+        self._batch_count = 0
+
+    def _get_existing_handles(self, table, handles):
+        """
+        Return the subset of the given handles that exist in a table.
+        """
+        existing = set()
+        for index in range(0, len(handles), 500):
+            chunk = handles[index:index + 500]
+            self.dbapi.execute("SELECT handle FROM %s WHERE handle IN (%s)"
+                               % (table, ", ".join(["?"] * len(chunk))),
+                               chunk)
+            existing.update(row[0] for row in self.dbapi.fetchall())
+        return existing
+
     def _get_metadata(self, key, default=[]):
         """
         Get an item from the database.
@@ -371,6 +632,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             self.dbapi.execute('SELECT handle FROM person '
                                'ORDER BY surname '
@@ -390,6 +652,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             sql = ('SELECT family.handle ' +
                    'FROM family ' +
@@ -417,6 +680,7 @@ class DBAPI(DbGeneric):
         Return a list of database handles, one handle for each Event in the
         database.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT handle FROM event")
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
@@ -431,6 +695,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             self.dbapi.execute('SELECT handle FROM citation '
                                'ORDER BY page '
@@ -450,6 +715,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             self.dbapi.execute('SELECT handle FROM source '
                                'ORDER BY title '
@@ -469,6 +735,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             self.dbapi.execute('SELECT handle FROM place '
                                'ORDER BY title '
@@ -483,6 +750,7 @@ class DBAPI(DbGeneric):
         Return a list of database handles, one handle for each Repository in
         the database.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT handle FROM repository")
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
@@ -497,6 +765,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             self.dbapi.execute('SELECT handle FROM media '
                                'ORDER BY desc '
@@ -511,6 +780,7 @@ class DBAPI(DbGeneric):
         Return a list of database handles, one handle for each Note in the
         database.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT handle FROM note")
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
@@ -525,6 +795,7 @@ class DBAPI(DbGeneric):
         :param locale: The locale to use for collation.
         :type locale: A GrampsLocale object.
         """
+        self._flush_batch()
         if sort_handles:
             self.dbapi.execute('SELECT handle FROM tag '
                                'ORDER BY name '
@@ -540,13 +811,15 @@ class DBAPI(DbGeneric):
 
         If no such Tag exists, None is returned.
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT blob_data FROM tag WHERE name = ?", [name])
         row = self.dbapi.fetchone()
         if row:
-            return Tag.create(pickle.loads(row[0]))
+            return Tag.create(decode(row[0]))
         return None
 
     def _get_number_of(self, obj_key):
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT count(1) FROM %s" % table
         self.dbapi.execute(sql)
@@ -592,20 +865,23 @@ class DBAPI(DbGeneric):
         old_data = None
         obj.change = int(change_time or time.time())
         table = KEY_TO_NAME_MAP[obj_key]
+        if obj_key != TAG_KEY:
+            self._update_id_index(obj_key, obj.handle, obj.gramps_id)
+
+        if trans.batch:
+            return self._batch_commit(obj, obj_key)
 
+        blob = self._codec.encode(obj.serialize())
         if self._has_handle(obj_key, obj.handle):
             old_data = self._get_raw_data(obj_key, obj.handle)
             # update the object:
             sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-            self.dbapi.execute(sql,
-                               [pickle.dumps(obj.serialize()),
-                                obj.handle])
+            self.dbapi.execute(sql, [blob, obj.handle])
         else:
             # Insert the object:
             sql = ("INSERT INTO %s (handle, blob_data) VALUES (?, ?)") % table
-            self.dbapi.execute(sql,
-                               [obj.handle,
-                                pickle.dumps(obj.serialize())])
+            self.dbapi.execute(sql, [obj.handle, blob])
+        self._cache_set(obj_key, obj.handle, blob)
         self._update_secondary_values(obj)
         self._update_backlinks(obj, trans)
         if not trans.batch:
@@ -627,19 +903,19 @@ class DBAPI(DbGeneric):
         """
         table = KEY_TO_NAME_MAP[obj_key]
         handle = data[0]
+        if obj_key != TAG_KEY:
+            self._update_id_index(obj_key, handle, data[1])
 
+        blob = self._codec.encode(data)
         if self._has_handle(obj_key, handle):
             # update the object:
             sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-            self.dbapi.execute(sql,
-                               [pickle.dumps(data),
-                                handle])
+            self.dbapi.execute(sql, [blob, handle])
         else:
             # Insert the object:
             sql = ("INSERT INTO %s (handle, blob_data) VALUES (?, ?)") % table
-            self.dbapi.execute(sql,
-                               [handle,
-                                pickle.dumps(data)])
+            self.dbapi.execute(sql, [handle, blob])
+        self._cache_set(obj_key, handle, blob)
 
         return
 
@@ -703,6 +979,7 @@ class DBAPI(DbGeneric):
     def _do_remove(self, handle, transaction, obj_key):
         if self.readonly or not handle:
             return
+        self._flush_batch()
         if self._has_handle(obj_key, handle):
             data = self._get_raw_data(obj_key, handle)
             obj_class = KEY_TO_CLASS_MAP[obj_key]
@@ -710,6 +987,8 @@ class DBAPI(DbGeneric):
             table = KEY_TO_NAME_MAP[obj_key]
             sql = "DELETE FROM %s WHERE handle = ?" % table
             self.dbapi.execute(sql, [handle])
+            self._cache_remove(obj_key, handle)
+            self._update_id_index(obj_key, handle)
             if not transaction.batch:
                 transaction.add(obj_key, TXNDEL, handle, data, None)
 
@@ -748,6 +1027,7 @@ class DBAPI(DbGeneric):
 
             result_list = list(find_backlink_handles(handle))
         """
+        self._flush_batch()
         self.dbapi.execute("SELECT obj_class, obj_handle "
                            "FROM reference "
                            "WHERE ref_handle = ?",
@@ -757,10 +1037,22 @@ class DBAPI(DbGeneric):
             if (include_classes is None) or (row[0] in include_classes):
                 yield (row[0], row[1])
 
+    def select_handles(self, class_name, where, values):
+        """
+        Return a list of the handles of the class_name objects whose
+        secondary columns satisfy the SQL where clause.
+        """
+        self._flush_batch()
+        table = class_name.lower()
+        self.dbapi.execute("SELECT handle FROM %s WHERE %s" % (table, where),
+                           values)
+        return [row[0] for row in self.dbapi.fetchall()]
+
     def find_initial_person(self):
         """
         Returns first person in the database
         """
+        self._flush_batch()
         handle = self.get_default_handle()
         person = None
         if handle:
@@ -776,6 +1068,7 @@ class DBAPI(DbGeneric):
         """
         Return an iterator over handles in the database
         """
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT handle FROM %s" % table
         self.dbapi.execute(sql)
@@ -787,6 +1080,7 @@ class DBAPI(DbGeneric):
         """
         Return an iterator over raw data in the database.
         """
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT handle, blob_data FROM %s" % table
         with self.dbapi.cursor() as cursor:
@@ -794,13 +1088,14 @@ class DBAPI(DbGeneric):
             rows = cursor.fetchmany()
             while rows:
                 for row in rows:
-                    yield (row[0], pickle.loads(row[1]))
+                    yield (row[0], decode(row[1]))
                 rows = cursor.fetchmany()
 
     def _iter_raw_place_tree_data(self):
         """
         Return an iterator over raw data in the place hierarchy.
         """
+        self._flush_batch()
         to_do = ['']
         sql = 'SELECT handle, blob_data FROM place WHERE enclosed_by = ?'
         while to_do:
@@ -809,20 +1104,24 @@ class DBAPI(DbGeneric):
             rows = self.dbapi.fetchall()
             for row in rows:
                 to_do.append(row[0])
-                yield (row[0], pickle.loads(row[1]))
+                yield (row[0], decode(row[1]))
 
     def reindex_reference_map(self, callback):
         """
         Reindex all primary records in the database.
+
+        The references are inserted in chunks, with the index on the
+        referenced handles dropped until they are all in.
         """
-        self._txn_begin()
-        self.dbapi.execute("DELETE FROM reference")
         total = 0
         for tbl in ('people', 'families', 'events', 'places', 'sources',
                     'citations', 'media', 'repositories', 'notes', 'tags'):
             total += self.method("get_number_of_%s", tbl)()
         UpdateCallback.__init__(self, callback)
         self.set_total(total)
+        self._txn_begin()
+        self.dbapi.execute("DELETE FROM reference")
+        self._drop_deferred_indexes(("reference",))
         primary_table = (
             (self.get_person_cursor, Person),
             (self.get_family_cursor, Family),
@@ -835,25 +1134,29 @@ class DBAPI(DbGeneric):
             (self.get_note_cursor, Note),
             (self.get_tag_cursor, Tag),
         )
+        sql = ("INSERT INTO reference "
+               "(obj_handle, obj_class, ref_handle, ref_class) "
+               "VALUES (?, ?, ?, ?)")
         # Now we use the functions and classes defined above
         # to loop through each of the primary object tables.
         for cursor_func, class_func in primary_table:
             logging.info("Rebuilding %s reference map", class_func.__name__)
+            class_name = class_func.__name__
+            references = []
             with cursor_func() as cursor:
                 for found_handle, val in cursor:
                     obj = class_func.create(val)
-                    references = set(obj.get_referenced_handles_recursively())
-                    # handle addition of new references
-                    for (ref_class_name, ref_handle) in references:
-                        self.dbapi.execute(
-                            "INSERT INTO reference "
-                            "(obj_handle, obj_class, ref_handle, ref_class) "
-                            "VALUES (?, ?, ?, ?)",
-                            [obj.handle,
-                             obj.__class__.__name__,
-                             ref_handle,
-                             ref_class_name])
+                    references.extend(
+                        [obj.handle, class_name, ref_handle, ref_class_name]
+                        for (ref_class_name, ref_handle)
+                        in set(obj.get_referenced_handles_recursively()))
+                    if len(references) >= BATCHSIZE:
+                        self.dbapi.executemany(sql, references)
+                        references = []
                     self.update()
+            if references:
+                self.dbapi.executemany(sql, references)
+        self._create_deferred_indexes()
         self._txn_commit()
 
     def rebuild_secondary(self, callback=None):
@@ -870,14 +1173,30 @@ class DBAPI(DbGeneric):
         UpdateCallback.__init__(self, callback)
         self.set_total(total)
 
-        # First, expand blob to individual fields:
+        # First, expand blob to individual fields.  The values of a table
+        # are collected before they are written, so the table is not changed
+        # while the cursor reads it.  They are written in chunks, with the
+        # indexes on the secondary columns dropped.
         self._txn_begin()
+        self._drop_deferred_indexes(tuple(KEY_TO_NAME_MAP.values()))
         for obj_type in ('Person', 'Family', 'Event', 'Place', 'Repository',
                          'Source', 'Citation', 'Media', 'Note', 'Tag'):
-            for handle in self.method('get_%s_handles', obj_type)():
-                obj = self.method('get_%s_from_handle', obj_type)(handle)
-                self._update_secondary_values(obj)
-                self.update()
+            class_func = self._get_table_func(obj_type, "class_func")
+            columns = self._get_secondary_columns(class_func)
+            sql = ("UPDATE %s SET %s WHERE handle = ?"
+                   % (obj_type.lower(),
+                      ", ".join(["%s = ?" % column for column in columns])))
+            updates = []
+            with self.method('get_%s_cursor', obj_type)() as cursor:
+                for handle, data in cursor:
+                    if columns:
+                        obj = class_func.create(data)
+                        updates.append(
+                            self._get_secondary_values(obj) + [handle])
+                    self.update()
+            for start in range(0, len(updates), BATCHSIZE):
+                self.dbapi.executemany(sql, updates[start:start + BATCHSIZE])
+        self._create_deferred_indexes()
         self._txn_commit()
 
         # Next, rebuild stats:
@@ -885,6 +1204,10 @@ class DBAPI(DbGeneric):
         self.genderStats = GenderStats(gstats)
 
     def _has_handle(self, obj_key, handle):
+        if self._batch_row(obj_key, handle) is not None:
+            return True
+        if (obj_key, handle) in self._cache:
+            return True
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT 1 FROM %s WHERE handle = ?" % table
         self.dbapi.execute(sql, [handle])
@@ -892,32 +1215,68 @@ class DBAPI(DbGeneric):
 
     def _has_gramps_id(self, obj_key, gramps_id):
         table = KEY_TO_NAME_MAP[obj_key]
+        pending = self._batch_pending.get(obj_key)
+        if pending:
+            if gramps_id in self._batch_ids[obj_key]:
+                return True
+            # Ignore rows whose buffered version has a different ID.
+            sql = "SELECT handle FROM %s WHERE gramps_id = ?" % table
+            self.dbapi.execute(sql, [gramps_id])
+            return any(row[0] not in pending for row in self.dbapi.fetchall())
         sql = "SELECT 1 FROM %s WHERE gramps_id = ?" % table
         self.dbapi.execute(sql, [gramps_id])
         return self.dbapi.fetchone() != None
 
     def _get_gramps_ids(self, obj_key):
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
         sql = "SELECT gramps_id FROM %s" % table
         self.dbapi.execute(sql)
         rows = self.dbapi.fetchall()
         return [row[0] for row in rows]
 
-    def _get_raw_data(self, obj_key, handle):
+    def _get_gramps_id_pairs(self, obj_key):
+        self._flush_batch()
         table = KEY_TO_NAME_MAP[obj_key]
-        sql = "SELECT blob_data FROM %s WHERE handle = ?" % table
-        self.dbapi.execute(sql, [handle])
-        row = self.dbapi.fetchone()
-        if row:
-            return pickle.loads(row[0])
+        sql = "SELECT handle, gramps_id FROM %s" % table
+        self.dbapi.execute(sql)
+        return self.dbapi.fetchall()
+
+    def _get_raw_data(self, obj_key, handle):
+        row = self._batch_row(obj_key, handle)
+        if row is not None:
+            return decode(row[1])
+        blob = self._cache_get(obj_key, handle)
+        if blob is None:
+            table = KEY_TO_NAME_MAP[obj_key]
+            sql = "SELECT blob_data FROM %s WHERE handle = ?" % table
+            self.dbapi.execute(sql, [handle])
+            row = self.dbapi.fetchone()
+            if not row:
+                return None
+            blob = row[0]
+            self._cache_set(obj_key, handle, blob)
+        return decode(blob)
 
     def _get_raw_from_id_data(self, obj_key, gramps_id):
         table = KEY_TO_NAME_MAP[obj_key]
+        pending = self._batch_pending.get(obj_key)
+        if pending:
+            handle = self._batch_ids[obj_key].get(gramps_id)
+            if handle is not None:
+                return decode(pending[handle][1])
+            sql = ("SELECT handle, blob_data FROM %s WHERE gramps_id = ?"
+                   % table)
+            self.dbapi.execute(sql, [gramps_id])
+            for row in self.dbapi.fetchall():
+                if row[0] not in pending:
+                    return decode(row[1])
+            return None
         sql = "SELECT blob_data FROM %s WHERE gramps_id = ?" % table
         self.dbapi.execute(sql, [gramps_id])
         row = self.dbapi.fetchone()
         if row:
-            return pickle.loads(row[0])
+            return decode(row[0])
 
     def get_gender_stats(self):
         """
@@ -965,13 +1324,19 @@ class DBAPI(DbGeneric):
         if data is None:
             sql = "DELETE FROM %s WHERE handle = ?" % table
             self.dbapi.execute(sql, [handle])
+            self._cache_remove(obj_key, handle)
+            self._update_id_index(obj_key, handle)
         else:
+            if obj_key != TAG_KEY:
+                self._update_id_index(obj_key, handle, data[1])
+            blob = self._codec.encode(data)
             if self._has_handle(obj_key, handle):
                 sql = "UPDATE %s SET blob_data = ? WHERE handle = ?" % table
-                self.dbapi.execute(sql, [pickle.dumps(data), handle])
+                self.dbapi.execute(sql, [blob, handle])
             else:
                 sql = "INSERT INTO %s (handle, blob_data) VALUES (?, ?)" % table
-                self.dbapi.execute(sql, [handle, pickle.dumps(data)])
+                self.dbapi.execute(sql, [handle, blob])
+            self._cache_set(obj_key, handle, blob)
             obj = self._get_table_func(cls)["class_func"].create(data)
             self._update_secondary_values(obj)
 
@@ -979,6 +1344,13 @@ class DBAPI(DbGeneric):
         """
         Return the list of locale-sorted surnames contained in the database.
         """
+        return self._get_surname_list()
+
+    def _get_surname_list(self):
+        """
+        Read the list of locale-sorted surnames contained in the database.
+        """
+        self._flush_batch()
         self.dbapi.execute("SELECT DISTINCT surname "
                            "FROM person "
                            "ORDER BY surname")
@@ -1018,38 +1390,53 @@ class DBAPI(DbGeneric):
                     self.dbapi.execute("ALTER TABLE %s ADD COLUMN %s %s"
                                        % (table_name, field, sql_type))
 
-    def _update_secondary_values(self, obj):
+    def _get_secondary_columns(self, cls):
         """
-        Given a primary object update its secondary field values
-        in the database.
-        Does not commit.
+        Return the names of the secondary columns of a primary object class,
+        including the derived columns.
+        """
+        columns = [field[0] for field in cls.get_secondary_fields()
+                   if field[0] != 'handle']
+        if cls.__name__ == 'Person':
+            columns += ['given_name', 'surname']
+        if cls.__name__ == 'Place':
+            columns.append('enclosed_by')
+        return columns
+
+    def _get_secondary_values(self, obj):
+        """
+        Given a primary object return its secondary field values, in the
+        order of the columns returned by _get_secondary_columns.
         """
         table = obj.__class__.__name__
-        fields = [field[0] for field in obj.get_secondary_fields()]
-        sets = []
-        values = []
-        for field in fields:
-            sets.append("%s = ?" % field)
-            values.append(getattr(obj, field))
+        values = [getattr(obj, field[0])
+                  for field in obj.get_secondary_fields()
+                  if field[0] != 'handle']
 
         # Derived fields
         if table == 'Person':
             given_name, surname = self._get_person_data(obj)
-            sets.append("given_name = ?")
-            values.append(given_name)
-            sets.append("surname = ?")
-            values.append(surname)
+            values += [given_name, surname]
         if table == 'Place':
-            handle = self._get_place_data(obj)
-            sets.append("enclosed_by = ?")
-            values.append(handle)
+            values.append(self._get_place_data(obj))
+        return self._sql_cast_list(values)
+
+    def _update_secondary_values(self, obj):
+        """
+        Given a primary object update its secondary field values
+        in the database.
+        Does not commit.
+        """
+        columns = self._get_secondary_columns(obj.__class__)
+        values = self._get_secondary_values(obj)
 
         if len(values) > 0:
-            table_name = table.lower()
+            table_name = obj.__class__.__name__.lower()
             self.dbapi.execute("UPDATE %s SET %s where handle = ?"
-                               % (table_name, ", ".join(sets)),
-                               self._sql_cast_list(values)
-                               + [obj.handle])
+                               % (table_name,
+                                  ", ".join(["%s = ?" % column
+                                             for column in columns])),
+                               values + [obj.handle])
 
     def _sql_cast_list(self, values):
         """
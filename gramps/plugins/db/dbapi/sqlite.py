@@ -52,17 +52,15 @@ sqlite3.paramstyle = 'qmark'
 #-------------------------------------------------------------------------
 class SQLite(DBAPI):
 
-    def get_summary(self):
+    def get_backend_summary(self):
         """
         Return a dictionary of information about this database backend.
         """
-        summary = super().get_summary()
-        summary.update({
+        return {
             _("Database version"): sqlite3.sqlite_version,
             _("Database module version"): sqlite3.version,
             _("Database module location"): sqlite3.__file__,
-        })
-        return summary
+        }
 
     def _initialize(self, directory, username, password):
         if directory == ':memory:':
@@ -71,6 +69,19 @@ class SQLite(DBAPI):
             path_to_db = os.path.join(directory, 'sqlite.db')
         self.dbapi = Connection(path_to_db)
 
+    def reconnect(self):
+        """
+        Open a new connection to the database.
+
+        A process forked while the database is open must not use the
+        connection of its parent, so it calls this before reading.  The
+        inherited connection is kept, as closing it could disturb the parent.
+        """
+        if self._directory == ':memory:':
+            return
+        self._parent_dbapi = self.dbapi
+        self._initialize(self._directory, None, None)
+
 
 #-------------------------------------------------------------------------
 #
@@ -132,6 +143,18 @@ class Connection:
         self.log.debug(args)
         self.__cursor.execute(*args, **kwargs)
 
+    def executemany(self, sql, seq_of_params):
+        """
+        Executes an SQL statement once for each set of parameters.
+
+        :param sql: the SQL statement to execute
+        :type sql: str
+        :param seq_of_params: a sequence of parameter lists
+        :type seq_of_params: iterable
+        """
+        self.log.debug(sql)
+        self.__cursor.executemany(sql, seq_of_params)
+
     def fetchone(self):
         """
         Fetches the next row of a query result set, returning a single sequence,
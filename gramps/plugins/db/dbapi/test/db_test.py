@@ -23,17 +23,30 @@
 # Standard python modules
 #
 #-------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
 import unittest
+from unittest.mock import patch
 
 #-------------------------------------------------------------------------
 #
 # Gramps modules
 #
 #-------------------------------------------------------------------------
-from gramps.gen.db import DbTxn
-from gramps.gen.db.utils import make_database
+from gramps.gen.config import config
+from gramps.gen.db import DbTxn, DBUNDOFN
+from gramps.gen.db.utils import make_database, read_summary_file
+from gramps.gen.db.vitals import EMPTY_DATE, make_date
+from gramps.gen.display.place import displayer as place_displayer
+from gramps.gen.relationship import RelationshipCalculator
+from gramps.gen.utils.location import get_location_list
 from gramps.gen.lib import (Person, Family, Event, Place, Repository, Source,
-                            Citation, Media, Note, Tag, Researcher, Surname)
+                            Citation, Media, Note, Tag, Researcher, Surname,
+                            ChildRef, ChildRefType, EventRef, EventType, Date,
+                            PlaceRef, PlaceName)
+from gramps.gen.proxy import LivingProxyDb
+from gramps.plugins.db.dbapi.codec import CODECS
 
 #-------------------------------------------------------------------------
 #
@@ -866,5 +879,1016 @@ class DbPersonTest(unittest.TestCase):
         self.assertEqual(saved['Mary'], (1, 3, 1))
 
 
+#-------------------------------------------------------------------------
+#
+# DbBatchTest class
+#
+#-------------------------------------------------------------------------
+class DbBatchTest(unittest.TestCase):
+    '''
+    Tests with batch transactions.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+
+    def tearDown(self):
+        self.db.close()
+
+    def __add_family(self, trans):
+        father = Person()
+        father.gender = Person.MALE
+        father.primary_name.first_name = 'John'
+        mother = Person()
+        mother.gender = Person.FEMALE
+        mother.primary_name.first_name = 'Mary'
+        family = Family()
+        self.db.add_person(father, trans)
+        self.db.add_person(mother, trans)
+        family.set_father_handle(father.handle)
+        family.set_mother_handle(mother.handle)
+        self.db.add_family(family, trans)
+        father.add_family_handle(family.handle)
+        mother.add_family_handle(family.handle)
+        self.db.commit_person(father, trans)
+        self.db.commit_person(mother, trans)
+        return family
+
+    def test_batch_add(self):
+        with DbTxn('Batch import', self.db, batch=True) as trans:
+            families = [self.__add_family(trans) for i in range(20)]
+            # buffered rows are visible inside the transaction
+            family = families[0]
+            self.assertTrue(self.db.has_family_handle(family.handle))
+            self.assertTrue(self.db.has_family_gramps_id(family.gramps_id))
+            self.assertEqual(
+                self.db.get_family_from_gramps_id(family.gramps_id).handle,
+                family.handle)
+        self.assertEqual(self.db.get_number_of_people(), 40)
+        self.assertEqual(self.db.get_number_of_families(), 20)
+        for family in families:
+            backlinks = list(self.db.find_backlink_handles(
+                family.get_father_handle()))
+            self.assertEqual(backlinks, [('Family', family.handle)])
+        stats = self.db.genderStats
+        self.assertEqual(stats.name_stats('John'), (20, 0, 0))
+        self.assertEqual(stats.name_stats('Mary'), (0, 20, 0))
+
+    def test_batch_update(self):
+        with DbTxn('Add family', self.db) as trans:
+            family = self.__add_family(trans)
+        mother_handle = family.get_mother_handle()
+        with DbTxn('Batch update', self.db, batch=True) as trans:
+            family.set_mother_handle(None)
+            family.gramps_id = 'F9999'
+            self.db.commit_family(family, trans)
+            self.assertFalse(self.db.has_family_gramps_id('F0000'))
+            self.assertTrue(self.db.has_family_gramps_id('F9999'))
+        self.assertEqual(self.db.get_number_of_families(), 1)
+        family = self.db.get_family_from_handle(family.handle)
+        self.assertEqual(family.gramps_id, 'F9999')
+        self.assertEqual(len(list(self.db.find_backlink_handles(
+            family.get_father_handle()))), 1)
+        self.assertEqual(list(self.db.find_backlink_handles(mother_handle)),
+                         [])
+
+    def test_batch_deferred_indexes(self):
+        with DbTxn('Batch import', self.db, batch=True) as trans:
+            self.__add_family(trans)
+        self.db.dbapi.execute("SELECT name FROM sqlite_master "
+                              "WHERE type = 'index'")
+        indexes = [row[0] for row in self.db.dbapi.fetchall()]
+        self.assertIn('person_surname', indexes)
+        self.assertIn('reference_ref_handle', indexes)
+
+#-------------------------------------------------------------------------
+#
+# DbCodecTest class
+#
+#-------------------------------------------------------------------------
+class DbCodecTest(unittest.TestCase):
+    '''
+    Tests for the storage format of objects.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.text = 'Lorem ipsum dolor sit amet. ' * 100
+        with DbTxn('Add test objects', self.db) as trans:
+            note = Note(self.text)
+            self.note_handle = self.db.add_note(note, trans)
+            person = Person()
+            person.primary_name.first_name = 'John'
+            self.person_handle = self.db.add_person(person, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __get_blob(self, table, handle):
+        self.db.dbapi.execute("SELECT blob_data FROM %s WHERE handle = ?"
+                              % table, [handle])
+        return self.db.dbapi.fetchone()[0]
+
+    def test_default_codec(self):
+        self.assertEqual(self.db.get_blob_codec(), 'pickle')
+
+    def test_change_codec(self):
+        plain = self.__get_blob('note', self.note_handle)
+        self.db.set_blob_codec('compact')
+        self.assertEqual(self.db.get_blob_codec(), 'compact')
+        self.assertEqual(self.db._get_metadata('blob_codec'), 'compact')
+        compact = self.__get_blob('note', self.note_handle)
+        self.assertLess(len(compact), len(plain))
+        note = self.db.get_note_from_handle(self.note_handle)
+        self.assertEqual(note.get(), self.text)
+        person = self.db.get_person_from_handle(self.person_handle)
+        self.assertEqual(person.primary_name.first_name, 'John')
+
+        self.db.set_blob_codec('pickle')
+        self.assertEqual(self.__get_blob('note', self.note_handle), plain)
+
+    def test_mixed_codecs(self):
+        self.db.set_blob_codec('compact')
+        # Write new objects uncompressed without converting the others.
+        self.db._codec = CODECS['pickle']
+        with DbTxn('Add test objects', self.db) as trans:
+            handle = self.db.add_note(Note(self.text), trans)
+        self.assertNotEqual(self.__get_blob('note', handle),
+                            self.__get_blob('note', self.note_handle))
+        self.assertEqual([note.get() for note in self.db.iter_notes()],
+                         [self.text] * 2)
+        self.assertEqual(self.db.get_note_from_handle(handle).get(),
+                         self.text)
+
+#-------------------------------------------------------------------------
+#
+# DbCacheTest class
+#
+#-------------------------------------------------------------------------
+class DbCacheTest(unittest.TestCase):
+    '''
+    Tests for the handle lookup cache.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        with DbTxn('Add test objects', self.db) as trans:
+            person = Person()
+            person.primary_name.first_name = 'John'
+            self.handle = self.db.add_person(person, trans)
+        self.db.clear_cache()
+
+    def tearDown(self):
+        self.db.close()
+
+    def __rename(self, first_name):
+        person = self.db.get_person_from_handle(self.handle)
+        person.primary_name.first_name = first_name
+        with DbTxn('Rename person', self.db) as trans:
+            self.db.commit_person(person, trans)
+
+    def __first_name(self):
+        person = self.db.get_person_from_handle(self.handle)
+        return person.primary_name.first_name
+
+    def test_stats(self):
+        self.db.get_person_from_handle(self.handle)
+        self.db.get_person_from_handle(self.handle)
+        self.db.get_raw_person_data(self.handle)
+        self.assertEqual(self.db.get_cache_stats(),
+                         {'hits': 2, 'misses': 1, 'size': 1})
+
+    def test_cached_copy(self):
+        person = self.db.get_person_from_handle(self.handle)
+        person.primary_name.first_name = 'Jack'
+        person.add_family_handle('F1')
+        person = self.db.get_person_from_handle(self.handle)
+        self.assertEqual(person.primary_name.first_name, 'John')
+        self.assertEqual(person.get_family_handle_list(), [])
+
+    def test_commit(self):
+        self.assertEqual(self.__first_name(), 'John')
+        self.__rename('Jack')
+        self.assertEqual(self.__first_name(), 'Jack')
+
+    def test_undo_redo(self):
+        self.__rename('Jack')
+        self.db.undo()
+        self.assertEqual(self.__first_name(), 'John')
+        self.db.redo()
+        self.assertEqual(self.__first_name(), 'Jack')
+
+    def test_remove(self):
+        self.assertEqual(self.__first_name(), 'John')
+        with DbTxn('Remove person', self.db) as trans:
+            self.db.remove_person(self.handle, trans)
+        self.assertIsNone(self.db.get_raw_person_data(self.handle))
+        self.assertFalse(self.db.has_person_handle(self.handle))
+
+    def test_batch(self):
+        self.assertEqual(self.__first_name(), 'John')
+        person = self.db.get_person_from_handle(self.handle)
+        person.primary_name.first_name = 'Jack'
+        with DbTxn('Batch rename', self.db, batch=True) as trans:
+            self.db.commit_person(person, trans)
+        self.assertEqual(self.__first_name(), 'Jack')
+
+#-------------------------------------------------------------------------
+#
+# DbPedigreeTest class
+#
+#-------------------------------------------------------------------------
+class DbPedigreeTest(unittest.TestCase):
+    '''
+    Tests for the pedigree index.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.index = self.db.get_pedigree_index()
+        with DbTxn('Add test objects', self.db) as trans:
+            self.grandfather = self.__add_person(trans)
+            self.father = self.__add_child(self.grandfather, trans)
+            self.child = self.__add_child(self.father, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __add_person(self, trans):
+        person = Person()
+        person.gender = Person.MALE
+        self.db.add_person(person, trans)
+        return person
+
+    def __add_child(self, father, trans):
+        child = self.__add_person(trans)
+        family = Family()
+        family.set_father_handle(father.handle)
+        child_ref = ChildRef()
+        child_ref.set_reference_handle(child.handle)
+        family.add_child_ref(child_ref)
+        self.db.add_family(family, trans)
+        father.add_family_handle(family.handle)
+        self.db.commit_person(father, trans)
+        child.add_parent_family_handle(family.handle)
+        self.db.commit_person(child, trans)
+        return child
+
+    def test_queries(self):
+        self.assertEqual(
+            self.index.get_ancestors([self.child.handle]),
+            {self.child.handle, self.father.handle, self.grandfather.handle})
+        self.assertEqual(
+            self.index.get_ancestors([self.child.handle], generations=2,
+                                     inclusive=False),
+            {self.father.handle})
+        self.assertEqual(
+            self.index.get_descendants([self.grandfather.handle],
+                                       inclusive=False),
+            {self.father.handle, self.child.handle})
+        self.assertTrue(self.index.has_common_ancestor(self.child.handle,
+                                                       self.father.handle))
+
+    def test_update(self):
+        with DbTxn('Add test objects', self.db) as trans:
+            other = self.__add_person(trans)
+        self.assertFalse(self.index.has_common_ancestor(self.child.handle,
+                                                        other.handle))
+        with DbTxn('Add test objects', self.db) as trans:
+            grandchild = self.__add_child(self.child, trans)
+        self.assertIn(grandchild.handle, self.index.get_descendants(
+            [self.grandfather.handle]))
+        self.db.undo()
+        self.assertNotIn(grandchild.handle, self.index.get_descendants(
+            [self.grandfather.handle]))
+
+    def test_batch(self):
+        self.index.get_ancestors([self.child.handle])
+        with DbTxn('Add test objects', self.db, batch=True) as trans:
+            grandchild = self.__add_child(self.child, trans)
+        self.assertEqual(
+            self.index.get_common_ancestry([grandchild.handle]),
+            {self.grandfather.handle, self.father.handle, self.child.handle,
+             grandchild.handle})
+
+    def test_unsignalled(self):
+        self.index.get_ancestors([self.child.handle])
+        with patch.object(self.index, '_build',
+                          wraps=self.index._build) as build:
+            with DbTxn('Add test objects', self.db) as trans:
+                self.db.add_note(Note('text'), trans)
+                self.__add_person(trans)
+            self.index.get_ancestors([self.child.handle])
+            build.assert_not_called()
+            self.db.disable_signals()
+            with DbTxn('Add test objects', self.db) as trans:
+                grandchild = self.__add_child(self.child, trans)
+            self.db.enable_signals()
+            self.assertIn(grandchild.handle, self.index.get_descendants(
+                [self.grandfather.handle]))
+            build.assert_called_once_with()
+
+    def test_ancestors_within(self):
+        handles = [self.child.handle]
+        self.assertTrue(self.index.ancestors_within(handles, 3))
+        self.assertFalse(self.index.ancestors_within(handles, 2))
+        with DbTxn('Add test objects', self.db) as trans:
+            # a loop: the grandfather is a child of the child
+            family = Family()
+            family.set_father_handle(self.child.handle)
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(self.grandfather.handle)
+            family.add_child_ref(child_ref)
+            self.db.add_family(family, trans)
+            self.grandfather.add_parent_family_handle(family.handle)
+            self.db.commit_person(self.grandfather, trans)
+        self.assertFalse(self.index.ancestors_within(handles, 100))
+
+    def test_parentless_family(self):
+        with DbTxn('Add test objects', self.db) as trans:
+            family = Family()
+            self.db.add_family(family, trans)
+            siblings = []
+            for dummy in range(2):
+                person = self.__add_person(trans)
+                child_ref = ChildRef()
+                child_ref.set_reference_handle(person.handle)
+                family.add_child_ref(child_ref)
+                person.add_parent_family_handle(family.handle)
+                self.db.commit_person(person, trans)
+                siblings.append(person.handle)
+            self.db.commit_family(family, trans)
+        self.assertTrue(self.index.has_common_ancestor(*siblings))
+        self.assertFalse(self.index.has_common_ancestor(siblings[0],
+                                                        self.child.handle))
+
+    def test_relationship_depth(self):
+        with DbTxn('Add test objects', self.db) as trans:
+            other = self.__add_person(trans)
+        calc = RelationshipCalculator()
+        calc.set_depth(5)
+        result, msg = calc.get_relationship_distance_new(
+            self.db, self.child, other)
+        self.assertEqual(result[0], -1)
+        self.assertEqual(msg, [])
+        calc.set_depth(2)
+        result, msg = calc.get_relationship_distance_new(
+            self.db, self.child, other)
+        self.assertEqual(result[0], -1)
+        self.assertEqual(len(msg), 1)
+
+
+class DbTreeStatsTest(unittest.TestCase):
+    '''
+    Tests for the tree statistics.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.stats = self.db.get_tree_statistics()
+        with DbTxn('Add test objects', self.db) as trans:
+            self.father = self.__add_person('Smith', 1900, trans)
+            self.child = self.__add_person('Smith', 1930, trans)
+            family = Family()
+            family.set_father_handle(self.father.handle)
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(self.child.handle)
+            family.add_child_ref(child_ref)
+            self.db.add_family(family, trans)
+            self.father.add_family_handle(family.handle)
+            self.db.commit_person(self.father, trans)
+            self.child.add_parent_family_handle(family.handle)
+            self.db.commit_person(self.child, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __add_person(self, surname, year, trans):
+        person = Person()
+        person.gender = Person.MALE
+        name = person.get_primary_name()
+        name.set_first_name('John')
+        name.get_primary_surname().set_surname(surname)
+        event = Event()
+        event.set_type(EventType.BIRTH)
+        event.set_date_object(Date(year, 1, 1))
+        self.db.add_event(event, trans)
+        ref = EventRef()
+        ref.set_reference_handle(event.handle)
+        person.add_event_ref(ref)
+        person.set_birth_ref(ref)
+        self.db.add_person(person, trans)
+        return person
+
+    def test_queries(self):
+        counts = self.stats.get_person_counts()
+        self.assertEqual(counts['people'], 2)
+        self.assertEqual(counts['males'], 2)
+        self.assertEqual(counts['missing_birth'], 0)
+        self.assertEqual(counts['disconnected'], 0)
+        self.assertEqual([group[:2] for group in
+                          self.stats.get_surname_groups()], [(2, 'Smith')])
+        ages, mothers, fathers = self.stats.get_age_statistics()
+        self.assertEqual(dict(fathers[0]), {30: 1})
+        self.assertEqual(dict(fathers[1]), {30: [self.father.handle]})
+
+    def test_update(self):
+        self.stats.get_person_counts()
+        with DbTxn('Edit test objects', self.db) as trans:
+            other = self.__add_person('Jones', 1950, trans)
+            event = self.db.get_event_from_handle(
+                self.father.get_birth_ref().ref)
+            event.set_date_object(Date(1910, 1, 1))
+            self.db.commit_event(event, trans)
+        self.assertEqual(self.stats.get_person_counts()['disconnected'], 1)
+        self.assertEqual([group[:2] for group in
+                          self.stats.get_surname_groups()],
+                         [(2, 'Smith'), (1, 'Jones')])
+        self.assertEqual(self.stats.get_number_of_surnames(), 2)
+        self.assertEqual(dict(self.stats.get_age_statistics()[2][0]),
+                         {20: 1})
+        with DbTxn('Remove test objects', self.db) as trans:
+            self.db.remove_person(other.handle, trans)
+        self.assertEqual(self.stats.get_person_counts()['people'], 2)
+        self.assertEqual(self.stats.get_number_of_surnames(), 1)
+
+    def test_batch(self):
+        self.stats.get_person_counts()
+        with DbTxn('Add test objects', self.db, batch=True) as trans:
+            self.__add_person('Jones', 1950, trans)
+        self.assertEqual(self.stats.get_person_counts()['people'], 3)
+
+    def test_unrelated_commit(self):
+        self.stats.get_person_counts()
+        with patch.object(self.stats, '_build',
+                          wraps=self.stats._build) as build:
+            with DbTxn('Add test objects', self.db) as trans:
+                self.db.add_note(Note('text'), trans)
+            with DbTxn('Add test objects', self.db) as trans:
+                self.__add_person('Jones', 1950, trans)
+            self.assertEqual(self.stats.get_person_counts()['people'], 3)
+            build.assert_not_called()
+
+
+class DbPlaceCacheTest(unittest.TestCase):
+    '''
+    Tests for the place cache.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        with DbTxn('Add test objects', self.db) as trans:
+            self.country = self.__add_place('England', None, trans)
+            self.county = self.__add_place('Kent', self.country, trans)
+            self.town = self.__add_place('Dover', self.county, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __add_place(self, name, parent, trans):
+        place = Place()
+        place.set_name(PlaceName(value=name))
+        if parent is not None:
+            placeref = PlaceRef()
+            placeref.set_reference_handle(parent.handle)
+            place.add_placeref(placeref)
+        self.db.add_place(place, trans)
+        return place
+
+    def __names(self, place):
+        return [name for name, dummy_type
+                in get_location_list(self.db, place)]
+
+    def test_location_list(self):
+        self.assertEqual(self.__names(self.town), ['Dover', 'Kent', 'England'])
+        self.town.set_name(PlaceName(value='Deal'))
+        self.assertEqual(self.__names(self.town), ['Deal', 'Kent', 'England'])
+
+    def test_update(self):
+        self.assertEqual(self.__names(self.town), ['Dover', 'Kent', 'England'])
+        with DbTxn('Edit test objects', self.db) as trans:
+            self.country.set_name(PlaceName(value='United Kingdom'))
+            self.db.commit_place(self.country, trans)
+        self.assertEqual(self.__names(self.town),
+                         ['Dover', 'Kent', 'United Kingdom'])
+
+    def test_batch(self):
+        """
+        The places renamed by a batch transaction, which emits no signals,
+        are read again.
+        """
+        event = Event()
+        event.set_place_handle(self.town.handle)
+        self.assertEqual(place_displayer.display_event(self.db, event),
+                         'Dover, Kent, England')
+        with DbTxn('Edit test objects', self.db, batch=True) as trans:
+            self.county.set_name(PlaceName(value='Sussex'))
+            self.db.commit_place(self.county, trans)
+        self.assertEqual(self.__names(self.town),
+                         ['Dover', 'Sussex', 'England'])
+        self.assertEqual(place_displayer.display_event(self.db, event),
+                         'Dover, Sussex, England')
+        self.assertEqual(place_displayer.display(self.db, self.town),
+                         'Dover, Sussex, England')
+
+    def test_proxy(self):
+        proxy = LivingProxyDb(self.db, LivingProxyDb.MODE_INCLUDE_ALL)
+        self.assertEqual(get_location_list(proxy, self.town)[1][0], 'Kent')
+        with DbTxn('Edit test objects', self.db) as trans:
+            self.county.set_name(PlaceName(value='Sussex'))
+            self.db.commit_place(self.county, trans)
+        self.assertEqual(get_location_list(proxy, self.town)[1][0], 'Sussex')
+
+
+#-------------------------------------------------------------------------
+#
+# DbRebuildTest class
+#
+#-------------------------------------------------------------------------
+class DbRebuildTest(unittest.TestCase):
+    '''
+    Tests for the rebuild of the reference map and secondary columns.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        with DbTxn('Add test objects', self.db) as trans:
+            for index in range(3):
+                event = Event()
+                event.set_description('Event %d' % index)
+                self.db.add_event(event, trans)
+                person = Person()
+                surname = Surname()
+                surname.set_surname('Smith')
+                person.primary_name.add_surname(surname)
+                ref = EventRef()
+                ref.set_reference_handle(event.handle)
+                person.add_event_ref(ref)
+                self.db.add_person(person, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __rows(self, table):
+        self.db.dbapi.execute("SELECT * FROM %s" % table)
+        return sorted(self.db.dbapi.fetchall())
+
+    def __execute(self, sql):
+        self.db.dbapi.execute(sql)
+        self.db.dbapi.commit()
+
+    def test_reference_map(self):
+        references = self.__rows('reference')
+        self.assertEqual(len(references), 3)
+        self.__execute("DELETE FROM reference")
+        self.db.reindex_reference_map(None)
+        self.assertEqual(self.__rows('reference'), references)
+
+    def test_secondary(self):
+        people = self.__rows('person')
+        self.__execute("UPDATE person SET surname = NULL")
+        self.db.rebuild_secondary()
+        self.assertEqual(self.__rows('person'), people)
+        self.assertEqual(self.db.get_number_of_people(), 3)
+
+    def test_chunks(self):
+        references = self.__rows('reference')
+        people = self.__rows('person')
+        self.__execute("DELETE FROM reference")
+        self.__execute("UPDATE person SET surname = NULL")
+        with patch('gramps.plugins.db.dbapi.dbapi.BATCHSIZE', 2):
+            self.db.reindex_reference_map(None)
+            self.db.rebuild_secondary()
+        self.assertEqual(self.__rows('reference'), references)
+        self.assertEqual(self.__rows('person'), people)
+
+    def test_secondary_cursor(self):
+        """
+        A table is not updated while a cursor reads it.
+        """
+        get_cursor = self.db.get_person_cursor
+        executemany = self.db.dbapi.executemany
+        reading = []
+        updates = []
+        class RecordCursor:
+            def __enter__(self):
+                self.cursor = get_cursor().__enter__()
+                reading.append(True)
+                return self.cursor
+            def __exit__(self, *args):
+                reading.pop()
+                return self.cursor.__exit__(*args)
+        def record(sql, *args):
+            if sql.startswith("UPDATE person"):
+                updates.append(bool(reading))
+            return executemany(sql, *args)
+        people = self.__rows('person')
+        self.__execute("UPDATE person SET surname = NULL")
+        with patch('gramps.plugins.db.dbapi.dbapi.BATCHSIZE', 2), \
+                patch.object(self.db, 'get_person_cursor', RecordCursor), \
+                patch.object(self.db.dbapi, 'executemany', record):
+            self.db.rebuild_secondary()
+        self.assertEqual(updates, [False, False])
+        self.assertEqual(self.__rows('person'), people)
+
+    def test_reference_indexes(self):
+        execute = self.db.dbapi.execute
+        dropped = []
+        def record(sql, *args):
+            if sql.startswith("DROP INDEX"):
+                dropped.append(sql.split()[-1])
+            return execute(sql, *args)
+        with patch.object(self.db.dbapi, 'execute', record):
+            self.db.reindex_reference_map(None)
+        self.assertEqual(dropped, ['reference_ref_handle'])
+
+#-------------------------------------------------------------------------
+#
+# DbGrampsIdTest class
+#
+#-------------------------------------------------------------------------
+class DbGrampsIdTest(unittest.TestCase):
+    '''
+    Tests for the allocation of Gramps IDs.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+
+    def tearDown(self):
+        self.db.close()
+
+    def __add_note(self, gramps_id, trans):
+        note = Note()
+        note.set_gramps_id(gramps_id)
+        self.db.add_note(note, trans)
+        return note
+
+    def test_sparse(self):
+        with DbTxn('Add test objects', self.db) as trans:
+            for gramps_id in ('N0000', 'N0001', 'N0003', 'N0100'):
+                self.__add_note(gramps_id, trans)
+            self.assertEqual(self.__add_note(None, trans).gramps_id, 'N0002')
+            self.assertEqual(self.__add_note(None, trans).gramps_id, 'N0004')
+        self.db.nmap_index = 100
+        with DbTxn('Add test objects', self.db) as trans:
+            self.assertEqual(self.__add_note(None, trans).gramps_id, 'N0101')
+
+    def test_renumber(self):
+        with DbTxn('Add test objects', self.db) as trans:
+            notes = [self.__add_note('N%04d' % number, trans)
+                     for number in (5, 3)]
+        self.db.nmap_index = 0
+        with DbTxn('Reorder test objects', self.db, batch=True) as trans:
+            for note in notes:
+                note.set_gramps_id(self.db.find_next_note_gramps_id())
+                self.db.commit_note(note, trans)
+        self.assertEqual([note.gramps_id for note in notes],
+                         ['N0000', 'N0001'])
+        with DbTxn('Remove test objects', self.db) as trans:
+            self.db.remove_note(notes[0].handle, trans)
+        self.db.nmap_index = 0
+        self.assertEqual(self.db.find_next_note_gramps_id(), 'N0000')
+
+    def test_prefix(self):
+        with DbTxn('Add test objects', self.db) as trans:
+            self.__add_note('N0000', trans)
+            self.db.set_note_id_prefix('X%d-%%')
+            self.__add_note('X0-%', trans)
+            self.assertEqual(self.__add_note(None, trans).gramps_id, 'X1-%')
+
+
+#-------------------------------------------------------------------------
+#
+# DbSummaryTest class
+#
+#-------------------------------------------------------------------------
+class DbSummaryTest(unittest.TestCase):
+    '''
+    Tests for the summary file written on close.
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def __add_people(self, count):
+        db = make_database("sqlite")
+        db.load(self.directory)
+        with DbTxn('Add test objects', db) as trans:
+            for index in range(count):
+                db.add_person(Person(), trans)
+        db.close()
+
+    def test_summary(self):
+        self.assertIsNone(read_summary_file(self.directory))
+        self.__add_people(2)
+        counts = read_summary_file(self.directory)
+        self.assertEqual(counts['people'], 2)
+        self.assertEqual(counts['notes'], 0)
+        self.__add_people(1)
+        self.assertEqual(read_summary_file(self.directory)['people'], 3)
+
+    def test_stale(self):
+        self.__add_people(1)
+        with open(os.path.join(self.directory, "sqlite.db"), "ab") as dbfile:
+            dbfile.write(b"\0")
+        self.assertIsNone(read_summary_file(self.directory))
+
+
+#-------------------------------------------------------------------------
+#
+# DbUndoLogTest class
+#
+#-------------------------------------------------------------------------
+class DbUndoLogTest(unittest.TestCase):
+    '''
+    Tests for the undo log kept under the tree directory.
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.undolog = os.path.join(self.directory, DBUNDOFN)
+        self.depth = config.get('database.undo-depth')
+        self.db = self.__open()
+        with DbTxn('Add test objects', self.db) as trans:
+            person = Person()
+            person.primary_name.first_name = 'John'
+            self.handle = self.db.add_person(person, trans)
+
+    def tearDown(self):
+        config.set('database.undo-depth', self.depth)
+        self.db.close()
+        shutil.rmtree(self.directory)
+
+    def __open(self):
+        db = make_database("sqlite")
+        db.load(self.directory)
+        return db
+
+    def __rename(self, first_name):
+        person = self.db.get_person_from_handle(self.handle)
+        person.primary_name.first_name = first_name
+        with DbTxn('Rename person', self.db) as trans:
+            self.db.commit_person(person, trans)
+
+    def __first_name(self):
+        person = self.db.get_person_from_handle(self.handle)
+        return person.primary_name.first_name
+
+    def __crash(self):
+        """
+        Reopen the tree with the undo log as left by a session which did not
+        close.
+        """
+        with open(self.undolog, "rb") as undo_file:
+            data = undo_file.read()
+        self.db.close()
+        self.assertFalse(os.path.exists(self.undolog))
+        with open(self.undolog, "wb") as undo_file:
+            undo_file.write(data)
+        self.db = self.__open()
+
+    def test_undo_redo(self):
+        self.__rename('Jack')
+        self.__rename('Jim')
+        self.assertTrue(os.path.exists(self.undolog))
+        self.assertTrue(self.db.undo())
+        self.assertEqual(self.__first_name(), 'Jack')
+        self.assertTrue(self.db.undo())
+        self.assertEqual(self.__first_name(), 'John')
+        self.assertTrue(self.db.redo())
+        self.assertEqual(self.__first_name(), 'Jack')
+        self.db.close()
+        self.assertFalse(os.path.exists(self.undolog))
+        self.db = self.__open()
+        self.assertEqual(self.db.undodb.undo_count, 0)
+
+    def test_recover(self):
+        self.__rename('Jack')
+        self.__rename('Jim')
+        self.db.undo()
+        self.__crash()
+        self.assertEqual(self.db.undodb.undo_count, 2)
+        self.assertEqual(self.db.undodb.redo_count, 1)
+        self.assertFalse(self.db.abort_possible)
+        self.assertTrue(self.db.redo())
+        self.assertEqual(self.__first_name(), 'Jim')
+        self.assertTrue(self.db.undo())
+        self.assertTrue(self.db.undo())
+        self.assertEqual(self.__first_name(), 'John')
+
+    def test_damaged(self):
+        self.__rename('Jack')
+        with open(self.undolog, "ab") as undo_file:
+            undo_file.write(b"\0\1")
+        self.__crash()
+        self.assertEqual(self.db.undodb.undo_count, 2)
+        self.__rename('Jim')
+        self.assertTrue(self.db.undo())
+        self.assertEqual(self.__first_name(), 'Jack')
+
+    def test_depth(self):
+        config.set('database.undo-depth', 2)
+        self.db.close()
+        self.db = self.__open()
+        for first_name in ('Jack', 'Jim', 'Joe'):
+            self.__rename(first_name)
+        self.assertEqual(self.db.undodb.undo_count, 2)
+        self.assertFalse(self.db.abort_possible)
+        self.assertGreater(self.db.undodb.undodb.first, 0)
+        self.assertTrue(self.db.undo())
+        self.assertTrue(self.db.undo())
+        self.assertFalse(self.db.undo())
+        self.assertEqual(self.__first_name(), 'Jack')
+
+
+#-------------------------------------------------------------------------
+#
+# DbMetadataTest class
+#
+#-------------------------------------------------------------------------
+class DbMetadataTest(unittest.TestCase):
+    '''
+    Tests for the metadata read on first use and written on close.
+    '''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db = self.__open()
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.directory)
+
+    def __open(self):
+        db = make_database("sqlite")
+        db.load(self.directory)
+        return db
+
+    def __reopen(self):
+        self.db.close()
+        self.db = self.__open()
+
+    def test_saved(self):
+        person = Person()
+        person.primary_name.first_name = 'John'
+        person.primary_name.get_primary_surname().set_surname('Smith')
+        person.gender = Person.MALE
+        with DbTxn('Add test objects', self.db) as trans:
+            self.db.add_person(person, trans)
+        self.db.bookmarks.append(person.handle)
+        self.db.event_names.add('Custom')
+        self.__reopen()
+        self.assertEqual(self.db.bookmarks.get(), [person.handle])
+        self.assertEqual(self.db.event_names, {'Custom'})
+        self.assertEqual(self.db.pmap_index, 1)
+        self.assertEqual(self.db.genderStats.name_stats('John'), (1, 0, 0))
+        self.assertEqual(self.db.surname_list, ['Smith'])
+
+    def test_lazy(self):
+        self.assertIsNone(self.db._surname_list)
+        self.assertIsNone(self.db._gender_stats)
+        with DbTxn('Add test objects', self.db) as trans:
+            self.db.add_note(Note('text'), trans)
+        self.assertNotIn('bookmarks', self.db._metadata)
+        with patch.object(self.db, '_set_metadata',
+                          wraps=self.db._set_metadata) as set_metadata:
+            self.db.get_researcher()
+            self.db.get_event_types()
+            self.__reopen()
+        set_metadata.assert_called_once_with('nmap_index', 1)
+
+    def test_change_serial(self):
+        """
+        The serial number changes with the data, even in a session which
+        did not read it.
+        """
+        serial = self.db.get_change_serial()
+        self.__reopen()
+        self.assertEqual(self.db.get_change_serial(), serial)
+        self.__reopen()
+        with DbTxn('Add test objects', self.db) as trans:
+            self.db.add_note(Note('text'), trans)
+        self.__reopen()
+        self.assertNotEqual(self.db.get_change_serial(), serial)
+
+
+class DbVitalIndexTest(unittest.TestCase):
+    '''
+    Tests for the vital index.
+    '''
+
+    def setUp(self):
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.index = self.db.get_vital_index()
+        with DbTxn('Add test objects', self.db) as trans:
+            self.father = self.__add_person(trans)
+            self.__add_event(self.father, EventType.BIRTH, Date(1900, 1, 1),
+                             trans)
+            self.child = self.__add_person(trans)
+            self.__add_event(self.child, EventType.BAPTISM, Date(1930, 2, 1),
+                             trans)
+            self.family = Family()
+            self.family.set_father_handle(self.father.handle)
+            child_ref = ChildRef()
+            child_ref.set_reference_handle(self.child.handle)
+            child_ref.set_mother_relation(ChildRefType.ADOPTED)
+            self.family.add_child_ref(child_ref)
+            self.marriage = self.__add_event(self.family, EventType.MARRIAGE,
+                                             Date(1925, 6, 1), trans)
+            self.db.add_family(self.family, trans)
+            self.father.add_family_handle(self.family.handle)
+            self.db.commit_person(self.father, trans)
+            self.child.add_parent_family_handle(self.family.handle)
+            self.db.commit_person(self.child, trans)
+
+    def tearDown(self):
+        self.db.close()
+
+    def __add_person(self, trans):
+        person = Person()
+        person.gender = Person.MALE
+        self.db.add_person(person, trans)
+        return person
+
+    def __add_event(self, obj, event_type, date, trans):
+        event = Event()
+        event.set_type(event_type)
+        if date is not None:
+            event.set_date_object(date)
+        self.db.add_event(event, trans)
+        ref = EventRef()
+        ref.set_reference_handle(event.handle)
+        obj.add_event_ref(ref)
+        if event_type == EventType.BIRTH:
+            obj.set_birth_ref(ref)
+        elif event_type == EventType.DEATH:
+            obj.set_death_ref(ref)
+        return event
+
+    def test_queries(self):
+        father = self.index.get_person(self.father.handle)
+        self.assertEqual(father.gender, Person.MALE)
+        self.assertEqual(make_date(father.birth), Date(1900, 1, 1))
+        self.assertIsNone(father.death)
+        self.assertEqual(father.families, (self.family.handle,))
+        child = self.index.get_person(self.child.handle)
+        self.assertIsNone(child.birth)
+        self.assertEqual(make_date(child.birth_fallback), Date(1930, 2, 1))
+        family = self.index.get_family(self.family.handle)
+        self.assertEqual(family.father, self.father.handle)
+        self.assertEqual(make_date(family.marriage), Date(1925, 6, 1))
+        self.assertIsNone(family.divorce)
+        self.assertEqual(family.children, ((self.child.handle,
+                                            ChildRefType.BIRTH,
+                                            ChildRefType.ADOPTED),))
+        self.assertEqual(self.index.get_family_handles(),
+                         [self.family.handle])
+
+    def test_update(self):
+        self.index.get_person(self.father.handle)
+        with DbTxn('Edit test objects', self.db) as trans:
+            self.marriage.set_date_object(Date(1926, 6, 1))
+            self.db.commit_event(self.marriage, trans)
+            self.__add_event(self.father, EventType.DEATH, None, trans)
+            self.db.commit_person(self.father, trans)
+        self.assertTrue(self.index._is_current())
+        family = self.index.get_family(self.family.handle)
+        self.assertEqual(make_date(family.marriage), Date(1926, 6, 1))
+        father = self.index.get_person(self.father.handle)
+        self.assertEqual(father.death, EMPTY_DATE)
+        self.assertFalse(make_date(father.death).is_valid())
+        with DbTxn('Remove test objects', self.db) as trans:
+            self.db.remove_family(self.family.handle, trans)
+        self.assertIsNone(self.index.get_family(self.family.handle))
+
+    def test_batch(self):
+        self.index.get_person(self.father.handle)
+        with DbTxn('Add test objects', self.db, batch=True) as trans:
+            other = self.__add_person(trans)
+        self.assertIsNotNone(self.index.get_person(other.handle))
+
+    def test_unrelated_commit(self):
+        self.index.get_person(self.father.handle)
+        with patch.object(self.index, '_build',
+                          wraps=self.index._build) as build:
+            with DbTxn('Add test objects', self.db) as trans:
+                self.db.add_note(Note('text'), trans)
+            self.index.get_person(self.father.handle)
+            build.assert_not_called()
+
+
 if __name__ == "__main__":
     unittest.main()
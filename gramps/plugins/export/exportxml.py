@@ -38,7 +38,9 @@ Gramps' XML file format.
 import time
 import shutil
 import os
-import codecs
+import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from xml.sax.saxutils import escape
 
 # ------------------------------------------------------------------------
@@ -59,6 +61,7 @@ from gramps.gen.const import GRAMPS_LOCALE as glocale
 
 _ = glocale.translation.gettext
 from gramps.gen.const import URL_HOMEPAGE
+from gramps.gen.config import config
 from gramps.gen.lib import Date, Person
 from gramps.gen.updatecallback import UpdateCallback
 from gramps.gen.db.exceptions import DbWriteFailure
@@ -84,6 +87,10 @@ except:
 strip_dict = dict.fromkeys(list(range(9)) + list(range(11, 13)) + list(range(14, 32)))
 
 
+# size of the parts compressed in parallel
+GZIP_CHUNK_SIZE = 1 << 20
+
+
 def escxml(d):
     return (
         escape(
@@ -99,6 +106,71 @@ def escxml(d):
     )
 
 
+# -------------------------------------------------------------------------
+#
+# ParallelGzipFile
+#
+# -------------------------------------------------------------------------
+class ParallelGzipFile(io.BufferedIOBase):
+    """
+    A write-only gzip file, compressed by several threads.
+
+    The data is cut in parts of GZIP_CHUNK_SIZE bytes, each compressed as a
+    separate gzip member, which gzip readers read as one stream.  zlib does
+    not hold the interpreter lock while compressing, so the parts are
+    compressed at the same time, while the caller produces the next ones.
+    """
+
+    def __init__(self, fileobj, compresslevel, threads):
+        """
+        fileobj - the binary file written to, which is not closed
+        compresslevel - the gzip compression level
+        threads - the number of parts compressed at the same time
+        """
+        io.BufferedIOBase.__init__(self)
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(threads)
+        self.pending = deque()
+        self.buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= GZIP_CHUNK_SIZE:
+            self._submit()
+        return len(data)
+
+    def _submit(self):
+        """
+        Compress the buffered data, and write the parts compressed so far,
+        in order.
+        """
+        if self.buffer:
+            self.pending.append(
+                self.executor.submit(
+                    gzip.compress, bytes(self.buffer), self.compresslevel
+                )
+            )
+            self.buffer = bytearray()
+        while len(self.pending) > self.threads:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self._submit()
+            while self.pending:
+                self.fileobj.write(self.pending.popleft().result())
+        finally:
+            self.executor.shutdown()
+            io.BufferedIOBase.close(self)
+
+
 # -------------------------------------------------------------------------
 #
 #
@@ -119,12 +191,17 @@ class GrampsXmlWriter(UpdateCallback):
         >              1: remove everything expect the filename (eg gpkg)
         >              2: remove leading slash (quick write)
         compress - attempt to compress the database
+
+        The compression level and the number of threads compressing are read
+        from the export.compress-level and export.compress-threads settings.
         """
         UpdateCallback.__init__(self, user.callback)
         self.user = user
         self.compress = compress
         if not _gzip_ok:
             self.compress = False
+        self.compresslevel = config.get("export.compress-level")
+        self.compress_threads = config.get("export.compress-threads")
         self.db = db
         self.strip_photos = strip_photos
         self.version = version
@@ -184,41 +261,56 @@ class GrampsXmlWriter(UpdateCallback):
 
             self.fileroot = os.path.dirname(filename)
             try:
-                if self.compress and _gzip_ok:
-                    try:
-                        g = gzip.open(filename, "wb")
-                    except:
-                        g = open(filename, "wb")
-                else:
-                    g = open(filename, "wb")
+                g = open(filename, "wb")
             except IOError as msg:
                 LOG.warning(str(msg))
                 raise DbWriteFailure(_("Failure writing %s") % filename, str(msg))
                 return 0
 
-        self.g = codecs.getwriter("utf8")(g)
-
-        self.write_xml_data()
+        if self.compress and _gzip_ok:
+            output = self.open_compressed(g)
+        else:
+            output = g
+        self.write_output(output)
+        if output is not g:
+            output.close()
         if filename != "-":
             g.close()
         return 1
 
+    def open_compressed(self, handle):
+        """
+        Return a binary file compressing the data written to the file
+        handle, which is not closed with it.
+        """
+        if self.compress_threads > 1:
+            return ParallelGzipFile(handle, self.compresslevel, self.compress_threads)
+        return gzip.GzipFile(mode="wb", fileobj=handle, compresslevel=self.compresslevel)
+
+    def write_output(self, output):
+        """
+        Write the XML data, encoded in UTF-8, to the binary file output. The
+        text is encoded and passed to the file in large blocks.
+        """
+        self.g = io.TextIOWrapper(output, encoding="utf8", newline="")
+        try:
+            self.write_xml_data()
+            self.g.flush()
+        finally:
+            # leave the file open
+            self.g.detach()
+
     def write_handle(self, handle):
         """
         Write the database to the specified file handle.
         """
 
         if self.compress and _gzip_ok:
-            try:
-                g = gzip.GzipFile(mode="wb", fileobj=handle)
-            except:
-                g = handle
+            g = self.open_compressed(handle)
         else:
             g = handle
 
-        self.g = codecs.getwriter("utf8")(g)
-
-        self.write_xml_data()
+        self.write_output(g)
         g.close()
         return 1
 
@@ -0,0 +1,130 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest for the compression of the Gramps XML export
+"""
+import gzip
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from gramps.gen.config import config
+from gramps.gen.const import DATA_DIR
+from gramps.gen.db.utils import import_as_dict
+from gramps.gen.user import User
+from ..exportxml import GZIP_CHUNK_SIZE, ParallelGzipFile, XmlWriter
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+EXAMPLE = os.path.join(TEST_DIR, "example.gramps")
+
+
+class ParallelGzipTest(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(0)
+        words = [bytes(rand.choices(b"abcdefghij", k=rand.randint(1, 12)))
+                 for dummy in range(1000)]
+        # a few parts, the last one partly filled
+        self.data = b" ".join(rand.choices(words, k=GZIP_CHUNK_SIZE // 2))
+
+    def compress(self, data, level, threads, write_size):
+        """
+        Compress the data, written in blocks of write_size bytes, and return
+        the gzip file.
+        """
+        fileobj = io.BytesIO()
+        output = ParallelGzipFile(fileobj, level, threads)
+        for start in range(0, len(data), write_size):
+            output.write(data[start:start + write_size])
+        output.close()
+        self.assertFalse(fileobj.closed)
+        return fileobj.getvalue()
+
+    def test_round_trip(self):
+        self.assertGreater(len(self.data), 2 * GZIP_CHUNK_SIZE)
+        for threads in (2, 3, 8):
+            for level in (1, 6, 9):
+                with self.subTest(threads=threads, level=level):
+                    compressed = self.compress(self.data, level, threads,
+                                               65536)
+                    with gzip.open(io.BytesIO(compressed)) as gz_file:
+                        self.assertEqual(gz_file.read(), self.data)
+
+    def test_write_sizes(self):
+        for write_size in (1000, GZIP_CHUNK_SIZE, 3 * GZIP_CHUNK_SIZE):
+            with self.subTest(write_size=write_size):
+                compressed = self.compress(self.data, 6, 4, write_size)
+                self.assertEqual(gzip.decompress(compressed), self.data)
+
+    def test_empty(self):
+        self.assertEqual(gzip.decompress(self.compress(b"", 6, 2, 1)), b"")
+        fileobj = io.BytesIO()
+        output = ParallelGzipFile(fileobj, 6, 2)
+        output.write(b"data")
+        output.close()
+        output.close()
+        self.assertEqual(gzip.decompress(fileobj.getvalue()), b"data")
+
+
+class XmlCompressionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = import_as_dict(EXAMPLE, User())
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.settings = (config.get("export.compress-level"),
+                         config.get("export.compress-threads"))
+
+    def tearDown(self):
+        config.set("export.compress-level", self.settings[0])
+        config.set("export.compress-threads", self.settings[1])
+        shutil.rmtree(self.tmp_dir)
+
+    def export(self, name, compress, level=6, threads=1):
+        """
+        Export the example database, with the given compression settings,
+        and return the bytes written.
+        """
+        filename = os.path.join(self.tmp_dir, name)
+        config.set("export.compress-level", level)
+        config.set("export.compress-threads", threads)
+        XmlWriter(self.db, User(), 0, compress).write(filename)
+        with open(filename, "rb") as xml_file:
+            return xml_file.read()
+
+    def test_settings(self):
+        xml = self.export("plain.gramps", 0)
+        self.assertTrue(xml.startswith(b"<?xml"))
+        for level, threads in ((1, 1), (9, 1), (1, 2), (6, 4), (9, 3)):
+            with self.subTest(level=level, threads=threads):
+                compressed = self.export("%d_%d.gramps" % (level, threads),
+                                         1, level, threads)
+                with gzip.open(io.BytesIO(compressed)) as gz_file:
+                    self.assertEqual(gz_file.read(), xml)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,33 +16,15 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
-#------------------------------------------------------------------------
-#
-# Python modules
-#
-#------------------------------------------------------------------------
-import os
-
 #------------------------------------------------------------------------
 #
 # Gramps modules
 #
 #------------------------------------------------------------------------
 from gramps.gen.plug import Gramplet
-from gramps.gen.utils.file import media_path_full
-from gramps.gen.datehandler import get_date
-from gramps.gen.lib import Person
 from gramps.gen.const import COLON, GRAMPS_LOCALE as glocale
 _ = glocale.translation.sgettext
 
-#------------------------------------------------------------------------
-#
-# Constants
-#
-#------------------------------------------------------------------------
-
-_YIELD_INTERVAL = 200
-
 #------------------------------------------------------------------------
 #
 # StatsGramplet class
@@ -66,79 +48,36 @@ class StatsGramplet(Gramplet):
         self.connect(self.dbstate.db, 'family-delete', self.update)
         self.connect(self.dbstate.db, 'person-rebuild', self.update)
         self.connect(self.dbstate.db, 'family-rebuild', self.update)
+        self.connect(self.dbstate.db, 'event-update', self.update)
+        self.connect(self.dbstate.db, 'media-add', self.update)
+        self.connect(self.dbstate.db, 'media-update', self.update)
+        self.connect(self.dbstate.db, 'media-delete', self.update)
 
     def main(self):
         self.set_text(_("Processing..."))
         database = self.dbstate.db
-        personList = database.iter_people()
-
-        with_media = 0
-        total_media = 0
-        incomp_names = 0
-        disconnected = 0
-        missing_bday = 0
-        males = 0
-        females = 0
-        others = 0
-        unknowns = 0
-        bytes_cnt = 0
-        notfound = []
+        stats = database.get_tree_statistics()
+        if stats is None:
+            self.set_text(_("No Family Tree loaded."))
+            return
+        yield True
+        counts = stats.get_person_counts()
+        with_media = counts['with_media']
+        total_media = counts['media_refs']
+        incomp_names = counts['incomplete_names']
+        disconnected = counts['disconnected']
+        missing_bday = counts['missing_birth']
+        males = counts['males']
+        females = counts['females']
+        others = counts['others']
+        unknowns = counts['unknowns']
 
         mobjects = database.get_number_of_media()
-        mbytes = "0"
-        for media in database.iter_media():
-            fullname = media_path_full(database, media.get_path())
-            try:
-                bytes_cnt += os.path.getsize(fullname)
-                length = len(str(bytes_cnt))
-                if bytes_cnt <= 999999:
-                    mbytes = _("less than 1")
-                else:
-                    mbytes = str(bytes_cnt)[:(length - 6)]
-            except OSError:
-                notfound.append(media.get_path())
-
-        for cnt, person in enumerate(personList):
-            length = len(person.get_media_list())
-            if length > 0:
-                with_media += 1
-                total_media += length
-
-            for name in ([person.get_primary_name()] +
-                         person.get_alternate_names()):
-
-                if name.get_first_name().strip() == "":
-                    incomp_names += 1
-                else:
-                    if name.get_surname_list():
-                        for surname in name.get_surname_list():
-                            if surname.get_surname().strip() == "":
-                                incomp_names += 1
-                    else:
-                        incomp_names += 1
-
-            if (not person.get_main_parents_family_handle() and
-                    not person.get_family_handle_list()):
-                disconnected += 1
-
-            birth_ref = person.get_birth_ref()
-            if birth_ref:
-                birth = database.get_event_from_handle(birth_ref.ref)
-                if not get_date(birth):
-                    missing_bday += 1
-            else:
-                missing_bday += 1
-
-            if person.get_gender() == Person.FEMALE:
-                females += 1
-            elif person.get_gender() == Person.MALE:
-                males += 1
-            elif person.get_gender() == Person.OTHER:
-                others += 1
-            else:
-                unknowns += 1
-            if not cnt % _YIELD_INTERVAL:
-                yield True
+        bytes_cnt, notfound = stats.get_media_sizes()
+        if bytes_cnt <= 999999:
+            mbytes = _("less than 1") if bytes_cnt else "0"
+        else:
+            mbytes = str(bytes_cnt)[:-6]
         self.clear_text()
         self.append_text(_("Individuals") + "\n")
         self.append_text("----------------------------\n")
@@ -33,14 +33,6 @@ from gramps.gen.config import config
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.sgettext
 
-#------------------------------------------------------------------------
-#
-# Constants
-#
-#------------------------------------------------------------------------
-
-_YIELD_INTERVAL = 350
-
 #------------------------------------------------------------------------
 #
 # Local functions
@@ -91,41 +83,17 @@ class SurnameCloudGramplet(Gramplet):
 
     def main(self):
         self.set_text(_("Processing...") + "\n")
+        stats = self.dbstate.db.get_tree_statistics()
+        if stats is None:
+            self.set_text(_("No Family Tree loaded."))
+            return
         yield True
-        surnames = defaultdict(int)
+        total_people = stats.get_person_counts()['people']
         representative_handle = {}
-
-        cnt = 0
-        namelist = []
-        for person in self.dbstate.db.iter_people():
-            allnames = [person.get_primary_name()] + person.get_alternate_names()
-            allnames = set([name.get_group_name().strip() for name in allnames])
-            for surname in allnames:
-                surnames[surname] += 1
-                representative_handle[surname] = person.handle
-            cnt += 1
-            if not cnt % _YIELD_INTERVAL:
-                yield True
-            # Count unique surnames
-            for name in [person.get_primary_name()] + person.get_alternate_names():
-                if not name.get_surname().strip() in namelist \
-                    and not name.get_surname().strip() == "":
-                    namelist.append(name.get_surname().strip())
-
-        total_people = cnt
-        surname_sort = []
-        total = cnt = 0
-        for surname in surnames:
-            surname_sort.append((surnames[surname], surname))
-            total += surnames[surname]
-            cnt += 1
-            if not cnt % _YIELD_INTERVAL:
-                yield True
-
-        surname_sort.sort(reverse=True)
         cloud_names = []
         cloud_values = []
-        for (count, surname) in surname_sort:
+        for (count, surname, handle) in stats.get_surname_groups():
+            representative_handle[surname] = handle
             cloud_names.append((count, surname))
             cloud_values.append(count)
 
@@ -172,7 +140,7 @@ class SurnameCloudGramplet(Gramplet):
                 self.append_text(" ")
                 showing += 1
         self.append_text(("\n\n" + _("Total unique surnames") + ": %d\n") %
-                         len(namelist))
+                         stats.get_number_of_surnames())
         self.append_text((_("Total surnames showing") + ": %d\n") % showing)
         self.append_text((_("Total people") + ": %d") % total_people, "begin")
 
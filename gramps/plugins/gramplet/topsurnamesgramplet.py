@@ -16,13 +16,6 @@
 # along with this program; if not, write to the Free Software
 # Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 
-#------------------------------------------------------------------------
-#
-# Python modules
-#
-#------------------------------------------------------------------------
-from collections import defaultdict
-
 #------------------------------------------------------------------------
 #
 # Gramps modules
@@ -33,13 +26,6 @@ from gramps.gen.config import config
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.sgettext
 
-#------------------------------------------------------------------------
-#
-# Constants
-#
-#------------------------------------------------------------------------
-_YIELD_INTERVAL = 350
-
 #------------------------------------------------------------------------
 #
 # TopSurnamesGramplet class
@@ -68,43 +54,24 @@ class TopSurnamesGramplet(Gramplet):
 
     def main(self):
         self.set_text(_("Processing...") + "\n")
-        surnames = defaultdict(int)
-        representative_handle = {}
-
-        cnt = 0
-        for person in self.dbstate.db.iter_people():
-            allnames = [person.get_primary_name()] + person.get_alternate_names()
-            allnames = set([name.get_group_name().strip() for name in allnames])
-            for surname in allnames:
-                surnames[surname] += 1
-                representative_handle[surname] = person.handle
-            cnt += 1
-            if not cnt % _YIELD_INTERVAL:
-                yield True
-
-        total_people = cnt
-        surname_sort = []
-        total = 0
-
-        cnt = 0
-        for surname in surnames:
-            surname_sort.append((surnames[surname], surname))
-            total += surnames[surname]
-            cnt += 1
-            if not cnt % _YIELD_INTERVAL:
-                yield True
-
-        total_surnames = cnt
-        surname_sort.sort(reverse=True)
+        stats = self.dbstate.db.get_tree_statistics()
+        if stats is None:
+            self.set_text(_("No Family Tree loaded."))
+            return
+        yield True
+        surname_sort = stats.get_surname_groups()
+        total_people = stats.get_person_counts()['people']
+        total_surnames = len(surname_sort)
+        total = sum(count for count, surname, handle in surname_sort)
         line = 0
         ### All done!
         self.set_text("")
         nosurname = config.get('preferences.no-surname-text')
-        for (count, surname) in surname_sort:
+        for (count, surname, handle) in surname_sort:
             text = "%s, " % (surname if surname else nosurname)
             text += "%d%% (%d)\n" % (int((float(count)/total) * 100), count)
             self.append_text(" %d. " % (line + 1))
-            self.link(text, 'Surname', representative_handle[surname])
+            self.link(text, 'Surname', handle)
             line += 1
             if line >= self.top_size:
                 break
@@ -31,6 +31,9 @@
 import os
 import sys
 import time
+import threading
+import queue
+import zlib
 from xml.parsers.expat import ExpatError, ParserCreate
 from xml.sax.saxutils import escape
 from gramps.gen.const import URL_WIKISTRING
@@ -135,7 +138,8 @@ try:
 except:
     GZIP_OK = False
 
-PERSON_RE = re.compile(r"\s*\<person\s(.*)$")
+# size of the parts read and decompressed ahead of the parser
+CHUNK_SIZE = 1 << 16
 
 CHILD_REL_MAP = {
     "Birth": ChildRefType(ChildRefType.BIRTH),
@@ -166,8 +170,7 @@ def importData(database, filename, user):
     database.smap = {}
     database.pmap = {}
     database.fmap = {}
-    line_cnt = 1
-    person_cnt = 0
+    size = 0
 
     with ImportOpenFileContextManager(filename, user) as xml_file:
         if xml_file is None:
@@ -192,19 +195,18 @@ def importData(database, filename, user):
             )
 
         if filename != "-":
-            linecounter = LineParser(filename)
-            line_cnt = linecounter.get_count()
-            person_cnt = linecounter.get_person_count()
+            size = os.path.getsize(filename)
 
         read_only = database.readonly
         database.readonly = False
 
         try:
-            info = parser.parse(xml_file, line_cnt, person_cnt)
+            info = parser.parse(xml_file, size)
         except GrampsImportError as err:  # version error
             user.notify_error(*err.messages())
             return
-        except IOError as msg:
+        except (IOError, EOFError, zlib.error) as msg:
+            # a truncated or corrupt gzip file
             user.notify_error(_("Error reading %s") % filename, str(msg))
             import traceback
 
@@ -402,62 +404,6 @@ class ImportInfo:
         return txt
 
 
-class LineParser:
-    def __init__(self, filename):
-
-        self.count = 0
-        self.person_count = 0
-
-        if GZIP_OK:
-            use_gzip = 1
-            try:
-                with gzip.open(filename, "r") as f:
-                    f.read(1)
-            except IOError as msg:
-                use_gzip = 0
-            except ValueError as msg:
-                use_gzip = 1
-        else:
-            use_gzip = 0
-
-        try:
-            if use_gzip:
-                import io
-
-                # Bug 6255. TextIOWrapper is required for python3 to
-                #           present file contents as text, otherwise they
-                #           are read as binary. However due to a missing
-                #           method (read1) in early python3 versions this
-                #           try block will fail.
-                #           Gramps will still import XML files using python
-                #           versions < 3.3.0 but the file progress meter
-                #           will not work properly, going immediately to
-                #           100%.
-                #           It should work correctly from version 3.3.
-                ofile = io.TextIOWrapper(
-                    gzip.open(filename, "rb"), encoding="utf8", errors="replace"
-                )
-            else:
-                ofile = open(filename, "r", encoding="utf8", errors="replace")
-
-            for line in ofile:
-                self.count += 1
-                if PERSON_RE.match(line):
-                    self.person_count += 1
-        except:
-            self.count = 0
-            self.person_count = 0
-        finally:
-            # Ensure the file handle is always closed
-            ofile.close()
-
-    def get_count(self):
-        return self.count
-
-    def get_person_count(self):
-        return self.person_count
-
-
 # -------------------------------------------------------------------------
 #
 # ImportOpenFileContextManager
@@ -1036,14 +982,16 @@ class GrampsParser(UpdateCallback):
                 gramps_ids[id_] = gramps_id
         return gramps_ids[id_]
 
-    def parse(self, ifile, linecount=1, personcount=0):
+    def parse(self, ifile, size=0):
         """
         Parse the xml file
         :param ifile: must be a file handle that is already open, with position
                       at the start of the file
+        :param size: the size of the file as stored, which may be compressed,
+                     used for the progress
         """
         with DbTxn(_("Gramps XML import"), self.db, batch=True) as self.trans:
-            self.set_total(linecount)
+            self.set_total(size or 1)
 
             self.db.disable_signals()
 
@@ -1054,7 +1002,7 @@ class GrampsParser(UpdateCallback):
             self.p.StartElementHandler = self.startElement
             self.p.EndElementHandler = self.endElement
             self.p.CharacterDataHandler = self.characters
-            self.p.ParseFile(ifile)
+            self.parse_chunks(ifile, size)
 
             if len(self.name_formats) > 0:
                 # add new name formats to the existing table
@@ -1102,6 +1050,54 @@ class GrampsParser(UpdateCallback):
         self.db.request_rebuild()
         return self.info
 
+    def parse_chunks(self, ifile, size):
+        """
+        Parse the file, read and decompressed by another thread while the
+        parser builds and commits the objects. The progress is the position
+        in the file as stored, so it is also right for a compressed file.
+        """
+        # a gzip file keeps the compressed file as fileobj
+        rawfile = getattr(ifile, "fileobj", None) or ifile
+        chunks = queue.Queue(maxsize=8)
+        stop = threading.Event()
+
+        def read():
+            try:
+                while not stop.is_set():
+                    data = ifile.read(CHUNK_SIZE)
+                    try:
+                        position = rawfile.tell() if size else None
+                    except (OSError, ValueError):
+                        position = None
+                    chunks.put((data, position))
+                    if not data:
+                        break
+            except Exception as err:
+                chunks.put((err, None))
+
+        reader = threading.Thread(target=read, name="XML import reader")
+        reader.daemon = True
+        reader.start()
+        try:
+            while True:
+                data, position = chunks.get()
+                if isinstance(data, Exception):
+                    raise data
+                if not data:
+                    break
+                self.p.Parse(data, False)
+                if position is not None:
+                    self.update(position)
+            self.p.Parse(b"", True)
+        finally:
+            # let the reader finish if the parser stopped early
+            stop.set()
+            while reader.is_alive():
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    reader.join(0.01)
+
     def start_database(self, attrs):
         """
         Get the xml version of the file.
@@ -1284,7 +1280,6 @@ class GrampsParser(UpdateCallback):
         # Gramps LEGACY: title in the placeobj tag
         self.placeobj.title = attrs.get("title", "")
         self.locations = 0
-        self.update(self.p.CurrentLineNumber)
         if self.default_tag:
             self.placeobj.add_tag(self.default_tag.handle)
         return self.placeobj
@@ -1395,7 +1390,6 @@ class GrampsParser(UpdateCallback):
             self.info.add("new-object", EVENT_KEY, self.event)
         else:
             # This is new event, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
             self.event = Event()
             if "handle" in attrs:
                 orig_handle = attrs["handle"].replace("_", "")
@@ -1618,7 +1612,6 @@ class GrampsParser(UpdateCallback):
         Add a person to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
         self.person = Person()
         if "handle" in attrs:
             orig_handle = attrs["handle"].replace("_", "")
@@ -1754,7 +1747,6 @@ class GrampsParser(UpdateCallback):
         Add a family object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
         self.family = Family()
         if "handle" in attrs:
             orig_handle = attrs["handle"].replace("_", "")
@@ -2042,7 +2034,6 @@ class GrampsParser(UpdateCallback):
         self.in_note = 0
         if "handle" in attrs:
             # This is new note, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
             self.note = Note()
             if "handle" in attrs:
                 orig_handle = attrs["handle"].replace("_", "")
@@ -2245,7 +2236,6 @@ class GrampsParser(UpdateCallback):
         Add a citation object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
         self.citation = Citation()
         orig_handle = attrs["handle"].replace("_", "")
         is_merge_candidate = self.replace_import_handle and self.db.has_citation_handle(
@@ -2304,7 +2294,6 @@ class GrampsParser(UpdateCallback):
         Add a source object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
         self.source = Source()
         if "handle" in attrs:
             orig_handle = attrs["handle"].replace("_", "")
@@ -2464,7 +2453,7 @@ class GrampsParser(UpdateCallback):
         pass
 
     def stop_database(self, *tag):
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.total)
 
     def stop_media(self, *tag):
         self.db.commit_media(self.object, self.trans, self.object.get_change_time())
@@ -0,0 +1,153 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Unittest of the import of Gramps XML files
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from gramps.gen.const import DATA_DIR
+from gramps.gen.db.utils import make_database
+from gramps.gen.user import User
+from ..importxml import (CHUNK_SIZE, GrampsParser,
+                         ImportOpenFileContextManager, importData)
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+DATA = os.path.join(TEST_DIR, "data.gramps")
+
+
+class ErrorUser(User):
+    """
+    A user keeping the errors notified.
+    """
+
+    def __init__(self):
+        User.__init__(self)
+        self.errors = []
+
+    def notify_error(self, title, error=""):
+        self.errors.append((title, error))
+
+
+class ImportXmlTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(DATA, "rb") as xml_file:
+            cls.xml = xml_file.read()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.user = ErrorUser()
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, data):
+        """
+        Write a file to import, and return its name.
+        """
+        filename = os.path.join(self.tmp_dir, name)
+        with open(filename, "wb") as xml_file:
+            xml_file.write(data)
+        return filename
+
+    def counts(self):
+        """
+        Return the numbers of the main objects imported.
+        """
+        return (self.db.get_number_of_people(),
+                self.db.get_number_of_families(),
+                self.db.get_number_of_events(),
+                self.db.get_number_of_places(),
+                self.db.get_number_of_sources(),
+                self.db.get_number_of_notes())
+
+    def assert_reader_stopped(self):
+        self.assertNotIn("XML import reader",
+                         [thread.name for thread in threading.enumerate()])
+
+    def test_import(self):
+        self.assertGreater(len(self.xml), CHUNK_SIZE)
+        self.assertIsNotNone(importData(self.db, DATA, self.user))
+        self.assertEqual(self.user.errors, [])
+        counts = self.counts()
+        self.assertGreater(counts[0], 0)
+        self.assert_reader_stopped()
+
+        # the same file, compressed
+        self.db.close()
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        filename = self.write("data.gramps", gzip.compress(self.xml))
+        self.assertIsNotNone(importData(self.db, filename, self.user))
+        self.assertEqual(self.user.errors, [])
+        self.assertEqual(self.counts(), counts)
+        self.assert_reader_stopped()
+
+    def test_progress(self):
+        """
+        The progress is the position in the file as stored.
+        """
+        filename = self.write("data.gramps", gzip.compress(self.xml))
+        size = os.path.getsize(filename)
+        parser = GrampsParser(self.db, self.user, 0)
+        positions = []
+        parser.update = positions.append
+        with ImportOpenFileContextManager(filename, self.user) as xml_file:
+            parser.parse(xml_file, size)
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(positions[-1], size)
+        self.assertGreater(self.db.get_number_of_people(), 0)
+
+    def test_truncated(self):
+        for name, data in (
+                ("data.gramps", self.xml[:len(self.xml) // 2]),
+                ("data.gramps.gz", gzip.compress(self.xml)[:10000])):
+            with self.subTest(name=name):
+                del self.user.errors[:]
+                filename = self.write(name, data)
+                self.assertIsNone(importData(self.db, filename, self.user))
+                self.assertEqual(len(self.user.errors), 1)
+                self.assert_reader_stopped()
+
+    def test_corrupt(self):
+        compressed = bytearray(gzip.compress(self.xml))
+        compressed[5000:5100] = bytes(range(100))
+        for name, data in (("data.gramps", b"<database>\x00</database>"),
+                           ("data.gramps.gz", bytes(compressed))):
+            with self.subTest(name=name):
+                del self.user.errors[:]
+                filename = self.write(name, data)
+                self.assertIsNone(importData(self.db, filename, self.user))
+                self.assertEqual(len(self.user.errors), 1)
+                self.assert_reader_stopped()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -96,6 +96,8 @@ import time
 from collections import defaultdict, OrderedDict
 import string
 import mimetypes
+import queue
+import threading
 from io import StringIO, TextIOWrapper
 from urllib.parse import urlparse
 
@@ -177,6 +179,9 @@ from gramps.gen.utils.grampslocale import GrampsLocale
 # constants
 #
 # -------------------------------------------------------------------------
+LEXER_CHUNK_SIZE = 1000  # lines passed on at once by the reading thread
+LEXER_QUEUE_SIZE = 64  # chunks read ahead of the parser
+
 TOKEN_UNKNOWN = 0
 TOKEN_ABBR = 1
 TOKEN_ADDR = 2
@@ -927,7 +932,15 @@ class GedcomDateParser(DateParser):
 #
 # -------------------------------------------------------------------------
 class Lexer:
-    """low level line reading and early parsing"""
+    """
+    Low level line reading and early parsing.
+
+    The lines are read, decoded and tokenized by a background thread, which
+    passes them on in chunks, so that reading the file overlaps with parsing
+    it.  The lines are merged and the problems found in them reported as
+    they are taken from the chunks, at the same point of the parsing as if
+    the file was read directly.
+    """
 
     def __init__(self, ifile, __add_msg):
         self.ifile = ifile
@@ -941,6 +954,10 @@ class Lexer:
             TOKEN_CONC: self.__fix_token_conc,
         }
         self.__add_msg = __add_msg
+        self.__chunk = []
+        self.__queue = None
+        self.__thread = None
+        self.__stop = False
 
     def readline(self):
         """read a line from file with possibility of putting it back"""
@@ -974,61 +991,15 @@ class Lexer:
 
     def __readahead(self):
         while len(self.current_list) < 5:
-            line = self.ifile.readline()
-            self.index += 1
-            if not line:
+            data = self.__next_item()
+            if data is None:
                 self.eof = True
                 return
-
-            original_line = line
-            try:
-                # According to the GEDCOM 5.5 standard,
-                # Chapter 1 subsection Grammar "leading whitespace preceeding
-                # a GEDCOM line should be ignored"
-                # We will also strip the terminator which is any combination
-                # of carriage_return and line_feed
-                line = line.lstrip(" ").rstrip("\n\r")
-                # split into level+delim+rest
-                line = line.partition(" ")
-                level = int(line[0])
-                # there should only be one space after the level,
-                # but we can ignore more,
-                line = line[2].lstrip(" ")
-                # then split into tag+delim+line_value
-                # or xfef_id+delim+rest
-                # the xref_id can have spaces in it
-                if line.startswith("@"):
-                    line = line.split("@", 2)
-                    # line is now [None, alphanum+pointer_string, rest]
-                    tag = "@" + line[1] + "@"
-                    line_value = line[2].lstrip()
-                    # Ignore meaningless @IDENT@ on CONT or CONC line
-                    # as noted at http://www.tamurajones.net/IdentCONT.xhtml
-                    if line_value.lstrip().startswith(
-                        "CONT "
-                    ) or line_value.lstrip().startswith("CONC "):
-                        line = line_value.lstrip().partition(" ")
-                        tag = line[0]
-                        line_value = line[2]
-                else:
-                    line = line.partition(" ")
-                    tag = line[0]
-                    line_value = line[2]
-            except:
-                problem = _("Line ignored ")
-                text = original_line.rstrip("\n\r")
-                prob_width = 66
-                problem = problem.ljust(prob_width)[0 : (prob_width - 1)]
-                text = text.replace("\n", "\n".ljust(prob_width + 22))
-                message = "%s              %s" % (problem, text)
-                self.__add_msg(message)
+            if isinstance(data, str):
+                # a problem found in a line by the reading thread
+                self.__add_msg(data)
                 continue
 
-            # Need to un-double '@' See Gedcom 5.5 spec 'any_char'
-            line_value = line_value.replace("@@", "@")
-            token = TOKENS.get(tag, TOKEN_UNKNOWN)
-            data = (level, token, line_value, tag, self.index)
-
             func = self.func_map.get(data[1])
             if func:
                 func(data)
@@ -1042,11 +1013,117 @@ class Lexer:
                 data = data[:2] + (data[2].lstrip(),) + data[3:]
                 self.current_list.insert(0, data)
 
+    def __next_item(self):
+        """
+        Return the next tokenized line or problem from the reading thread,
+        or None at the end of the file.
+        """
+        if not self.__chunk:
+            if self.__thread is None:
+                self.__queue = queue.Queue(LEXER_QUEUE_SIZE)
+                self.__thread = threading.Thread(target=self.__read_file,
+                                                 daemon=True)
+                self.__thread.start()
+            chunk = self.__queue.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if chunk is None:
+                return None
+            chunk.reverse()
+            self.__chunk = chunk
+        return self.__chunk.pop()
+
+    def __read_file(self):
+        """tokenize the file, and queue the lines in chunks"""
+        try:
+            chunk = []
+            while not self.__stop:
+                line = self.ifile.readline()
+                if not line:
+                    break
+                self.index += 1
+                chunk.append(self.__tokenize(line))
+                if len(chunk) >= LEXER_CHUNK_SIZE:
+                    self.__queue.put(chunk)
+                    chunk = []
+            if chunk:
+                self.__queue.put(chunk)
+            self.__queue.put(None)
+        except Exception as err:
+            self.__queue.put(err)
+
+    def __tokenize(self, line):
+        """
+        Return the tokenized line, or the message reporting it if it cannot
+        be read.
+        """
+        original_line = line
+        try:
+            # According to the GEDCOM 5.5 standard,
+            # Chapter 1 subsection Grammar "leading whitespace preceeding
+            # a GEDCOM line should be ignored"
+            # We will also strip the terminator which is any combination
+            # of carriage_return and line_feed
+            line = line.lstrip(" ").rstrip("\n\r")
+            # split into level+delim+rest
+            line = line.partition(" ")
+            level = int(line[0])
+            # there should only be one space after the level,
+            # but we can ignore more,
+            line = line[2].lstrip(" ")
+            # then split into tag+delim+line_value
+            # or xfef_id+delim+rest
+            # the xref_id can have spaces in it
+            if line.startswith("@"):
+                line = line.split("@", 2)
+                # line is now [None, alphanum+pointer_string, rest]
+                tag = "@" + line[1] + "@"
+                line_value = line[2].lstrip()
+                # Ignore meaningless @IDENT@ on CONT or CONC line
+                # as noted at http://www.tamurajones.net/IdentCONT.xhtml
+                if line_value.lstrip().startswith(
+                    "CONT "
+                ) or line_value.lstrip().startswith("CONC "):
+                    line = line_value.lstrip().partition(" ")
+                    tag = line[0]
+                    line_value = line[2]
+            else:
+                line = line.partition(" ")
+                tag = line[0]
+                line_value = line[2]
+        except:
+            problem = _("Line ignored ")
+            text = original_line.rstrip("\n\r")
+            prob_width = 66
+            problem = problem.ljust(prob_width)[0 : (prob_width - 1)]
+            text = text.replace("\n", "\n".ljust(prob_width + 22))
+            return "%s              %s" % (problem, text)
+
+        # Need to un-double '@' See Gedcom 5.5 spec 'any_char'
+        line_value = line_value.replace("@@", "@")
+        token = TOKENS.get(tag, TOKEN_UNKNOWN)
+        return (level, token, line_value, tag, self.index)
+
+    def stop(self):
+        """
+        Stop the reading thread, if it is running.
+        """
+        if self.__thread is not None:
+            self.__stop = True
+            # unblock the thread if it is waiting for room in the queue
+            while self.__thread.is_alive():
+                try:
+                    self.__queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self.__thread = None
+
     def clean_up(self):
         """
-        Break circular references to parsing methods stored in dictionaries
-        to aid garbage collection
+        Stop the reading thread, and break circular references to parsing
+        methods stored in dictionaries to aid garbage collection
         """
+        self.stop()
         for key in list(self.func_map.keys()):
             del self.func_map[key]
         del self.func_map
@@ -3069,15 +3146,15 @@ class GedcomParser(UpdateCallback):
         enc = stage_one.get_encoding()
 
         if enc == "ANSEL":
-            rdr = AnselReader(ifile, self.__add_msg)
+            rdr = AnselReader(ifile, self.__add_lexer_msg)
         elif enc in ("UTF-8", "UTF8", "UTF_8_SIG"):
-            rdr = UTF8Reader(ifile, self.__add_msg, enc)
+            rdr = UTF8Reader(ifile, self.__add_lexer_msg, enc)
         elif enc in ("UTF-16LE", "UTF-16BE", "UTF16", "UNICODE"):
-            rdr = UTF16Reader(ifile, self.__add_msg)
+            rdr = UTF16Reader(ifile, self.__add_lexer_msg)
         elif enc in ("CP1252", "WINDOWS-1252"):
-            rdr = CP1252Reader(ifile, self.__add_msg)
+            rdr = CP1252Reader(ifile, self.__add_lexer_msg)
         else:
-            rdr = AnsiReader(ifile, self.__add_msg)
+            rdr = AnsiReader(ifile, self.__add_lexer_msg)
 
         self.lexer = Lexer(rdr, self.__add_msg)
         self.filename = filename
@@ -3106,16 +3183,20 @@ class GedcomParser(UpdateCallback):
         with DbTxn(_("GEDCOM import"), self.dbase, not use_trans) as self.trans:
 
             self.dbase.disable_signals()
-            self.__parse_header_head()
-            self.want_parse_warnings = False
-            self.__parse_header()
-            self.want_parse_warnings = True
-            if self.use_def_src:
-                self.dbase.add_source(self.def_src, self.trans)
-            if self.default_tag and self.default_tag.handle is None:
-                self.dbase.add_tag(self.default_tag, self.trans)
-            self.__parse_record()
-            self.__parse_trailer()
+            try:
+                self.__parse_header_head()
+                self.want_parse_warnings = False
+                self.__parse_header()
+                self.want_parse_warnings = True
+                if self.use_def_src:
+                    self.dbase.add_source(self.def_src, self.trans)
+                if self.default_tag and self.default_tag.handle is None:
+                    self.dbase.add_tag(self.default_tag, self.trans)
+                self.__parse_record()
+                self.__parse_trailer()
+            finally:
+                # the reading thread holds the file, also after an error
+                self.lexer.stop()
             for title, handle in self.inline_srcs.items():
                 src = Source()
                 src.set_handle(handle)
@@ -3535,6 +3616,14 @@ class GedcomParser(UpdateCallback):
             self._backup()
         return done
 
+    def __add_lexer_msg(self, message):
+        """
+        Report a problem found while reading the file.  The file is read
+        ahead by the lexer, so the message is reported along with the lines
+        read with it.
+        """
+        self.lexer.add_msg(message)
+
     def __add_msg(self, problem, line=None, state=None):
         if problem != "":
             self.number_of_errors += 1
@@ -27,6 +27,7 @@
 #
 #------------------------------------------------------------------------
 import datetime
+from collections import namedtuple
 
 #------------------------------------------------------------------------
 #
@@ -35,8 +36,9 @@ import datetime
 #------------------------------------------------------------------------
 from gramps.gen.const import GRAMPS_LOCALE as glocale
 _ = glocale.translation.sgettext
-from gramps.gen.lib import (ChildRefType, Date, Span, Name, StyledText,
-                            StyledTextTag, StyledTextTagType)
+from gramps.gen.lib import (ChildRefType, Date, Span, Name, Person,
+                            StyledText, StyledTextTag, StyledTextTagType)
+from gramps.gen.db.vitals import make_date
 from gramps.gen.display.name import displayer as name_displayer
 from gramps.gen.utils.alive import probably_alive
 from gramps.gen.proxy import LivingProxyDb
@@ -97,6 +99,123 @@ def _find_death_date(db, person):
                 return event.get_date_object()
     return None
 
+#------------------------------------------------------------------------
+#
+# Vital facts of the people and families
+#
+#------------------------------------------------------------------------
+
+# The facts used by the records, with Date objects, or None if there is no
+# such event.  divorce is an empty Date for a divorce without a date.
+_PersonFacts = namedtuple('_PersonFacts', ('gender', 'birth', 'death',
+                                           'families'))
+_FamilyFacts = namedtuple('_FamilyFacts', ('father', 'mother', 'marriage',
+                                           'divorce', 'children'))
+
+class _ObjectFacts:
+    """
+    The facts of the people and families, read from their objects, for the
+    proxies which hide or change objects.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def get_person(self, handle):
+        db = self.db
+        person = db.get_person_from_handle(handle)
+        if person is None:
+            return None
+        birth_ref = person.get_birth_ref()
+        birth = None
+        if birth_ref:
+            birth = db.get_event_from_handle(birth_ref.ref).get_date_object()
+        return _PersonFacts(person.get_gender(), birth,
+                            _find_death_date(db, person),
+                            person.get_family_handle_list())
+
+    def get_family(self, handle):
+        db = self.db
+        family = db.get_family_from_handle(handle)
+        marriage_date = None
+        divorce_date = None
+        for event_ref in family.get_event_ref_list():
+            event = db.get_event_from_handle(event_ref.ref)
+            if (event.get_type().is_marriage() and
+                (event_ref.get_role().is_family() or
+                 event_ref.get_role().is_primary())):
+                marriage_date = event.get_date_object()
+            elif (event.get_type().is_divorce() and
+                  (event_ref.get_role().is_family() or
+                   event_ref.get_role().is_primary())):
+                divorce_date = event.get_date_object()
+        return _FamilyFacts(family.get_father_handle(),
+                            family.get_mother_handle(),
+                            marriage_date, divorce_date,
+                            [(child_ref.ref, child_ref.get_father_relation(),
+                              child_ref.get_mother_relation())
+                             for child_ref in family.get_child_ref_list()])
+
+    def iter_family_handles(self):
+        return self.db.iter_family_handles()
+
+class _IndexFacts:
+    """
+    The facts of the people and families, read from the
+    :class:`.VitalIndex` of the database, without creating any object.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def get_person(self, handle):
+        vitals = self.index.get_person(handle)
+        if vitals is None:
+            return None
+        if vitals.death is not None:
+            death = vitals.death
+        else:
+            death = vitals.death_fallback
+        return _PersonFacts(vitals.gender, make_date(vitals.birth),
+                            make_date(death), vitals.families)
+
+    def get_family(self, handle):
+        vitals = self.index.get_family(handle)
+        return _FamilyFacts(vitals.father, vitals.mother,
+                            make_date(vitals.marriage),
+                            make_date(vitals.divorce), vitals.children)
+
+    def iter_family_handles(self):
+        return self.index.get_family_handles()
+
+def _get_facts(db):
+    """
+    Return the facts of the database, from its vital index if it has one.
+    """
+    index = db.get_vital_index()
+    if index is None:
+        return _ObjectFacts(db)
+    return _IndexFacts(index)
+
+def _get_birth_children(facts, person_facts):
+    """
+    Return the handles of the birth children of a person.
+    """
+    if person_facts.gender == Person.MALE:
+        relation_index = 1
+    elif person_facts.gender == Person.FEMALE:
+        relation_index = 2
+    else:
+        return [] # no records are kept for unknown-sex parents
+    children = []
+    for family_handle in person_facts.families:
+        for child in facts.get_family(family_handle).children:
+            if child[relation_index] != ChildRefType.BIRTH:
+                continue # only count birth children
+            if child[0] not in children:
+                children.append(child[0])
+    return children
+
 def find_records(db, filter, top_size, callname,
                  trans_text=glocale.translation.sgettext, name_format=None,
                  living_mode=LivingProxyDb.MODE_INCLUDE_ALL, user=None):
@@ -116,6 +235,26 @@ def find_records(db, filter, top_size, callname,
         else: # we are in the proxy so get the person before proxy changes
             return db.get_unfiltered_person(person_handle)
 
+    def is_alive(person_handle):
+        return probably_alive(get_unfiltered_person_from_handle(person_handle),
+                              db)
+
+    def get_name(person_handle):
+        # the names are only formatted for the people kept in the records
+        def name():
+            return _get_styled_primary_name(
+                db.get_person_from_handle(person_handle), callname,
+                trans_text=trans_text, name_format=name_format)
+        return name
+
+    def get_family_name(father_handle, mother_handle):
+        def name():
+            text = StyledText(trans_text("%(father)s and %(mother)s"))
+            text = text.replace('%(father)s', get_name(father_handle)())
+            return text.replace('%(mother)s', get_name(mother_handle)())
+        return name
+
+    facts = _get_facts(db)
     today = datetime.date.today()
     today_date = Date(today.year, today.month, today.day)
 
@@ -150,33 +289,22 @@ def find_records(db, filter, top_size, callname,
         person_handle_list = filter.apply(db, person_handle_list, user=user)
 
     for person_handle in person_handle_list:
-        person = db.get_person_from_handle(person_handle)
-        unfil_person = get_unfiltered_person_from_handle(person_handle)
+        person = facts.get_person(person_handle)
         if person is None:
             continue
 
         # FIXME this should check for a "fallback" birth also/instead
-        birth_ref = person.get_birth_ref()
-
-        if not birth_ref:
-            # No birth event, so we can't calculate any age.
-            continue
-
-        birth = db.get_event_from_handle(birth_ref.ref)
-        birth_date = birth.get_date_object()
-
-        death_date = _find_death_date(db, person)
+        birth_date = person.birth
+        death_date = person.death
 
         if not _good_date(birth_date):
             # Birth date unknown or incomplete, so we can't calculate any age.
             continue
 
-        name = _get_styled_primary_name(person, callname,
-                                        trans_text=trans_text,
-                                        name_format=name_format)
+        name = get_name(person_handle)
 
         if death_date is None:
-            if probably_alive(unfil_person, db):
+            if is_alive(person_handle):
                 # Still living, look for age records
                 _record(person_youngestliving, person_oldestliving,
                         today_date - birth_date, name, 'Person', person_handle,
@@ -187,21 +315,11 @@ def find_records(db, filter, top_size, callname,
                     death_date - birth_date, name, 'Person', person_handle,
                     top_size)
 
-        for family_handle in person.get_family_handle_list():
-            family = db.get_family_from_handle(family_handle)
-
-            marriage_date = None
-            divorce_date = None
-            for event_ref in family.get_event_ref_list():
-                event = db.get_event_from_handle(event_ref.ref)
-                if (event.get_type().is_marriage() and
-                    (event_ref.get_role().is_family() or
-                     event_ref.get_role().is_primary())):
-                    marriage_date = event.get_date_object()
-                elif (event.get_type().is_divorce() and
-                      (event_ref.get_role().is_family() or
-                       event_ref.get_role().is_primary())):
-                    divorce_date = event.get_date_object()
+        for family_handle in person.families:
+            family = facts.get_family(family_handle)
+
+            marriage_date = family.marriage
+            divorce_date = family.divorce
 
             if _good_date(marriage_date):
                 _record(person_youngestmarried, person_oldestmarried,
@@ -213,68 +331,69 @@ def find_records(db, filter, top_size, callname,
                         divorce_date - birth_date,
                         name, 'Person', person_handle, top_size)
 
-            for child_ref in family.get_child_ref_list():
-                if person.get_gender() == person.MALE:
-                    relation = child_ref.get_father_relation()
-                elif person.get_gender() == person.FEMALE:
-                    relation = child_ref.get_mother_relation()
+            for child_handle, father_rel, mother_rel in family.children:
+                if person.gender == Person.MALE:
+                    relation = father_rel
+                elif person.gender == Person.FEMALE:
+                    relation = mother_rel
                 else:
                     continue
                 if relation != ChildRefType.BIRTH:
                     continue
 
-                child = db.get_person_from_handle(child_ref.ref)
-
                 # FIXME this should check for a "fallback" birth also/instead
-                child_birth_ref = child.get_birth_ref()
-                if not child_birth_ref:
-                    continue
-
-                child_birth = db.get_event_from_handle(child_birth_ref.ref)
-                child_birth_date = child_birth.get_date_object()
+                child = facts.get_person(child_handle)
+                child_birth_date = child and child.birth
 
                 if not _good_date(child_birth_date):
                     continue
 
-                if person.get_gender() == person.MALE:
+                if person.gender == Person.MALE:
                     _record(person_youngestfather, person_oldestfather,
                             child_birth_date - birth_date,
                             name, 'Person', person_handle, top_size)
-                elif person.get_gender() == person.FEMALE:
+                elif person.gender == Person.FEMALE:
                     _record(person_youngestmother, person_oldestmother,
                             child_birth_date - birth_date,
                             name, 'Person', person_handle, top_size)
 
+    birth_children = {}         # handle -> handles of the birth children
+    def get_birth_children_handles(person_handle):
+        children = birth_children.get(person_handle)
+        if children is None:
+            person = facts.get_person(person_handle)
+            children = _get_birth_children(facts, person) if person else []
+            birth_children[person_handle] = children
+        return children
+
     for person_handle in person_handle_list:
         # this "person loop" doesn't care about a person's birth or death
-        person = db.get_person_from_handle(person_handle)
+        person = facts.get_person(person_handle)
         if person is None:
             continue
 
-        name = _get_styled_primary_name(person, callname,
-                                        trans_text=trans_text,
-                                        name_format=name_format)
+        name = get_name(person_handle)
 
-        person_child_list = get_birth_children(db, person)
-        if person.get_gender() == person.MALE:
+        person_child_list = get_birth_children_handles(person_handle)
+        if person.gender == Person.MALE:
             _record(None, person_mostkidsfather,
                     len(person_child_list),
                     name, 'Person', person_handle, top_size)
-        elif person.get_gender() == person.FEMALE:
+        elif person.gender == Person.FEMALE:
             _record(None, person_mostkidsmother,
                     len(person_child_list),
                     name, 'Person', person_handle, top_size)
 
-        person_grandchild_list = []
-        for child in person_child_list:
-            person_grandchild_list += get_birth_children(db, child)
-        if person.get_gender() == person.MALE:
+        number_of_grandchildren = sum(
+            len(get_birth_children_handles(child_handle))
+            for child_handle in person_child_list)
+        if person.gender == Person.MALE:
             _record(None, person_mostgrandkidsfather,
-                    len(person_grandchild_list),
+                    number_of_grandchildren,
                     name, 'Person', person_handle, top_size)
-        elif person.get_gender() == person.FEMALE:
+        elif person.gender == Person.FEMALE:
             _record(None, person_mostgrandkidsmother,
-                    len(person_grandchild_list),
+                    number_of_grandchildren,
                     name, 'Person', person_handle, top_size)
 
     # Family records
@@ -286,16 +405,13 @@ def find_records(db, filter, top_size, callname,
     family_smallestagediff = []
     family_biggestagediff = []
 
-    for family in db.iter_families():
-        #family = db.get_family_from_handle(family_handle)
-        if living_mode != LivingProxyDb.MODE_INCLUDE_ALL:
-            # FIXME no iter_families method in LivingProxyDb so do it this way
-            family = db.get_family_from_handle(family.get_handle())
+    for family_handle in facts.iter_family_handles():
+        family = facts.get_family(family_handle)
 
-        father_handle = family.get_father_handle()
+        father_handle = family.father
         if not father_handle:
             continue
-        mother_handle = family.get_mother_handle()
+        mother_handle = family.mother
         if not mother_handle:
             continue
 
@@ -305,88 +421,55 @@ def find_records(db, filter, top_size, callname,
             if not filter.apply(db, [father_handle, mother_handle]):
                 continue
 
-        father = db.get_person_from_handle(father_handle)
-        unfil_father = get_unfiltered_person_from_handle(father_handle)
+        father = facts.get_person(father_handle)
         if father is None:
             continue
-        mother = db.get_person_from_handle(mother_handle)
-        unfil_mother = get_unfiltered_person_from_handle(mother_handle)
+        mother = facts.get_person(mother_handle)
         if mother is None:
             continue
 
-        father_name = _get_styled_primary_name(father, callname,
-                                               trans_text=trans_text,
-                                               name_format=name_format)
-        mother_name = _get_styled_primary_name(mother, callname,
-                                               trans_text=trans_text,
-                                               name_format=name_format)
-
-        name = StyledText(trans_text("%(father)s and %(mother)s"))
-        name = name.replace('%(father)s', father_name)
-        name = name.replace('%(mother)s', mother_name)
+        name = get_family_name(father_handle, mother_handle)
 
         if (living_mode == LivingProxyDb.MODE_INCLUDE_ALL
-            or (not probably_alive(unfil_father, db) and
-                not probably_alive(unfil_mother, db))):
+            or (not is_alive(father_handle) and
+                not is_alive(mother_handle))):
             _record(None, family_mostchildren,
-                    len(family.get_child_ref_list()),
-                    name, 'Family', family.handle, top_size)
-
-        father_birth_ref = father.get_birth_ref()
-        if father_birth_ref:
-            father_birth_date = db.get_event_from_handle(father_birth_ref.ref).get_date_object()
-        else:
-            father_birth_date = None
+                    len(family.children),
+                    name, 'Family', family_handle, top_size)
 
-        mother_birth_ref = mother.get_birth_ref()
-        if mother_birth_ref:
-            mother_birth_date = db.get_event_from_handle(mother_birth_ref.ref).get_date_object()
-        else:
-            mother_birth_date = None
+        father_birth_date = father.birth
+        mother_birth_date = mother.birth
 
         if _good_date(father_birth_date) and _good_date(mother_birth_date):
             if father_birth_date >> mother_birth_date:
                 _record(family_smallestagediff, family_biggestagediff,
                         father_birth_date - mother_birth_date,
-                        name, 'Family', family.handle, top_size)
+                        name, 'Family', family_handle, top_size)
             elif mother_birth_date >> father_birth_date:
                 _record(family_smallestagediff, family_biggestagediff,
                         mother_birth_date - father_birth_date,
-                        name, 'Family', family.handle, top_size)
+                        name, 'Family', family_handle, top_size)
 
-        marriage_date = None
-        divorce = None
-        divorce_date = None
-        for event_ref in family.get_event_ref_list():
-            event = db.get_event_from_handle(event_ref.ref)
-            if (event.get_type().is_marriage() and
-                (event_ref.get_role().is_family() or
-                 event_ref.get_role().is_primary())):
-                marriage_date = event.get_date_object()
-            if (event and event.get_type().is_divorce() and
-                (event_ref.get_role().is_family() or
-                 event_ref.get_role().is_primary())):
-                divorce = event
-                divorce_date = event.get_date_object()
-
-        father_death_date = _find_death_date(db, father)
-        mother_death_date = _find_death_date(db, mother)
+        marriage_date = family.marriage
+        divorce_date = family.divorce
+        father_death_date = father.death
+        mother_death_date = mother.death
 
         if not _good_date(marriage_date):
             # Not married or marriage date unknown
             continue
 
-        if divorce is not None and not _good_date(divorce_date):
+        if divorce_date is not None and not _good_date(divorce_date):
             # Divorced but date unknown or inexact
             continue
 
-        if (not probably_alive(unfil_father, db)
-                and not _good_date(father_death_date)):
+        father_alive = is_alive(father_handle)
+        if not father_alive and not _good_date(father_death_date):
             # Father died but death date unknown or inexact
             continue
 
-        if (not probably_alive(unfil_mother, db)
-                and not _good_date(mother_death_date)):
+        mother_alive = is_alive(mother_handle)
+        if not mother_alive and not _good_date(mother_death_date):
             # Mother died but death date unknown or inexact
             continue
 
@@ -394,11 +477,10 @@ def find_records(db, filter, top_size, callname,
             and father_death_date is None
             and mother_death_date is None):
             # Still married and alive
-            if (probably_alive(unfil_father, db)
-                    and probably_alive(unfil_mother, db)):
+            if father_alive and mother_alive:
                 _record(family_youngestmarried, family_oldestmarried,
                         today_date - marriage_date,
-                        name, 'Family', family.handle, top_size)
+                        name, 'Family', family_handle, top_size)
         elif (_good_date(divorce_date) or
               _good_date(father_death_date) or
               _good_date(mother_death_date)):
@@ -417,13 +499,18 @@ def find_records(db, filter, top_size, callname,
             duration = end - marriage_date
 
             _record(family_shortest, family_longest,
-                    duration, name, 'Family', family.handle, top_size)
+                    duration, name, 'Family', family_handle, top_size)
     #python 3 workaround: assign locals to tmp so we work with runtime version
     tmp = locals()
     return [(trans_text(text), varname, tmp[varname])
                 for (text, varname, default) in RECORDS]
 
 def _record(lowest, highest, value, text, handle_type, handle, top_size):
+    """
+    Add a value to the lists of the lowest and highest values, if it is in
+    their top_size first values.  text may be a function returning the text,
+    which is only called if the value is added.
+    """
 
     if value < 0: # ignore erroneous data
         return # (since the data-verification tool already finds it)
@@ -435,6 +522,18 @@ def _record(lowest, highest, value, text, handle_type, handle, top_size):
         low_value = value
         high_value = value
 
+    # A value beyond the last one kept would be removed again
+    if (lowest is not None and len(lowest) >= top_size
+            and high_value > lowest[top_size-1][0]):
+        lowest = None
+    if (highest is not None and len(highest) >= top_size
+            and low_value < highest[top_size-1][0]):
+        highest = None
+    if lowest is None and highest is None:
+        return
+    if callable(text):
+        text = text()
+
     if lowest is not None:
         lowest.append((high_value, value, text, handle_type, handle))
         lowest.sort(key=lambda a: a[0])   # FIXME: Ist das lambda notwendig?
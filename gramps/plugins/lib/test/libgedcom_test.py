@@ -0,0 +1,137 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the GEDCOM lexer of libgedcom.py """
+
+import io
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from gramps.gen.const import DATA_DIR
+from gramps.plugins.lib import libgedcom
+from gramps.plugins.lib.libgedcom import Lexer
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+
+GEDCOM = """0 HEAD
+1 CHAR UTF-8
+0 @N1@ NOTE First
+1 CONC  part
+1 CONT second line
+not a line
+0 @I1@ INDI
+1 NAME John /Smith/
+x bad level
+1 NOTE @N1@
+0 TRLR
+"""
+
+
+class _SerialThread:
+    """
+    A thread running its target when started, so that the whole file is
+    read before the first line is parsed.
+    """
+    def __init__(self, target, daemon):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+    def is_alive(self):
+        return False
+
+
+def read_all(text):
+    """
+    Return the lines read from a GEDCOM text, with the messages reported
+    in between.
+    """
+    events = []
+    lexer = Lexer(io.StringIO(text), events.append)
+    while True:
+        line = lexer.readline()
+        if line is None:
+            break
+        # some values are converted to objects, like dates and events
+        data = line.data
+        if hasattr(data, "serialize"):
+            data = data.serialize()
+        events.append((line.line, line.level, line.token_text, data))
+    lexer.clean_up()
+    return events
+
+
+def message_positions(events):
+    """
+    Return the positions of the messages among the lines read.
+    """
+    return [index for index, event in enumerate(events)
+            if isinstance(event, str)]
+
+
+def read_serial(text):
+    """
+    Return the lines and messages of read_all, read without a thread.
+    """
+    with patch.object(libgedcom.threading, "Thread", _SerialThread), \
+            patch.object(libgedcom, "LEXER_QUEUE_SIZE", 0):
+        return read_all(text)
+
+
+class LexerTest(unittest.TestCase):
+
+    def test_lines(self):
+        events = read_all(GEDCOM)
+        lines = [event for event in events if isinstance(event, tuple)]
+        self.assertEqual([line[0] for line in lines], [1, 2, 3, 7, 8, 10, 11])
+        self.assertEqual(lines[2][3], "NOTE First part\nsecond line")
+        # the messages come when their lines are read, five lines ahead
+        self.assertEqual(message_positions(events), [0, 5])
+
+    def test_serial(self):
+        for chunk_size in (1, 2, 1000):
+            with patch.object(libgedcom, "LEXER_CHUNK_SIZE", chunk_size):
+                self.assertEqual(read_all(GEDCOM), read_serial(GEDCOM))
+
+    def test_sample(self):
+        with open(os.path.join(TEST_DIR, "imp_sample.ged"),
+                  encoding="utf-8") as ifile:
+            text = ifile.read()
+        events = read_all(text)
+        self.assertEqual(events, read_serial(text))
+        self.assertEqual(message_positions(events), [1092, 1093])
+
+    def test_stop(self):
+        with patch.object(libgedcom, "LEXER_CHUNK_SIZE", 1), \
+                patch.object(libgedcom, "LEXER_QUEUE_SIZE", 1):
+            before = set(threading.enumerate())
+            lexer = Lexer(io.StringIO(GEDCOM * 100), lambda message: None)
+            lexer.readline()
+            threads = set(threading.enumerate()) - before
+            self.assertEqual(len(threads), 1)
+            lexer.stop()
+            self.assertFalse(threads.pop().is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
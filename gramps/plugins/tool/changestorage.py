@@ -0,0 +1,132 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"Change the format used to store objects in a Family Tree"
+
+#-------------------------------------------------------------------------
+#
+# python modules
+#
+#-------------------------------------------------------------------------
+from gramps.gen.const import GRAMPS_LOCALE as glocale
+_ = glocale.translation.gettext
+
+#-------------------------------------------------------------------------
+#
+# Gramps modules
+#
+#-------------------------------------------------------------------------
+from gramps.gui.plug import tool
+from gramps.gui.dialog import OkDialog, QuestionDialog2
+
+#-------------------------------------------------------------------------
+#
+# ChangeStorage
+#
+#-------------------------------------------------------------------------
+class ChangeStorage(tool.Tool):
+    """
+    Convert all objects in the Family Tree to another storage format.
+
+    Only the DB-API backends support more than one format.
+    """
+
+    def __init__(self, dbstate, user, options_class, name, callback=None):
+        uistate = user.uistate
+
+        tool.Tool.__init__(self, dbstate, options_class, name)
+
+        if self.db.readonly:
+            return
+
+        if not hasattr(self.db, 'set_blob_codec'):
+            msg = _("This Family Tree backend only supports one "
+                    "storage format.")
+            if uistate:
+                OkDialog(_("Storage format not changed"), msg,
+                         parent=uistate.window)
+            else:
+                print(msg)
+            return
+
+        if uistate:
+            if self.db.get_blob_codec() == 'compact':
+                codec = 'pickle'
+                question = QuestionDialog2(
+                    _("Use the standard storage format?"),
+                    _("All objects will be stored uncompressed, in the "
+                      "format used by previous versions of Gramps."),
+                    _("Convert"), _("Cancel"), parent=uistate.window)
+            else:
+                codec = 'compact'
+                question = QuestionDialog2(
+                    _("Use the compact storage format?"),
+                    _("Large objects will be stored compressed, which "
+                      "makes the Family Tree smaller. Previous versions "
+                      "of Gramps will not be able to open it."),
+                    _("Convert"), _("Cancel"), parent=uistate.window)
+            if not question.run():
+                return
+        else:
+            codec = self.options.handler.options_dict['codec']
+
+        self.db.disable_signals()
+        if uistate:
+            self.callback = uistate.pulse_progressbar
+            uistate.set_busy_cursor(True)
+            uistate.progress.show()
+            uistate.push_message(dbstate, _("Converting storage format..."))
+        else:
+            self.callback = None
+            print(_("Converting storage format..."))
+
+        self.db.set_blob_codec(codec, self.callback)
+
+        if uistate:
+            uistate.set_busy_cursor(False)
+            uistate.progress.hide()
+            OkDialog(_("Storage format changed"),
+                     _('All objects have been converted.'),
+                     parent=uistate.window)
+        else:
+            print(_("All objects have been converted."))
+        self.db.enable_signals()
+
+#------------------------------------------------------------------------
+#
+#
+#
+#------------------------------------------------------------------------
+class ChangeStorageOptions(tool.ToolOptions):
+    """
+    Defines options and provides handling interface.
+    """
+
+    def __init__(self, name, person_id=None):
+        tool.ToolOptions.__init__(self, name, person_id)
+
+        # Options specific for this tool
+        self.options_dict = {
+            'codec' : 'compact',
+        }
+        self.options_help = {
+            'codec' : ("=str", "Storage format to convert to",
+                       ["pickle", "compact"], False),
+        }
@@ -298,6 +298,29 @@ optionclass = 'RebuildRefMapOptions',
 tool_modes = [TOOL_MODE_GUI, TOOL_MODE_CLI]
   )
 
+#------------------------------------------------------------------------
+#
+# Change Storage Format
+#
+#------------------------------------------------------------------------
+
+register(TOOL,
+id = 'changestorage',
+name = _("Change Storage Format"),
+description = _("Converts all objects in the Family Tree to the standard "
+                "or the compact storage format"),
+version = '1.0',
+gramps_target_version = MODULE_VERSION,
+status = STABLE,
+fname = 'changestorage.py',
+authors = ["The Gramps project"],
+authors_email = ["http://gramps-project.org"],
+category = TOOL_DBPROC,
+toolclass = 'ChangeStorage',
+optionclass = 'ChangeStorageOptions',
+tool_modes = [TOOL_MODE_GUI, TOOL_MODE_CLI]
+  )
+
 #------------------------------------------------------------------------
 #
 # Rebuild Gender Statistics
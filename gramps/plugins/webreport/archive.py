@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Archives the Narrative Web site can be written to instead of a directory.
+
+The archive is written sequentially, so the target never needs to be read
+back or seeked.  The names written so far are kept in a set, so a page or
+file which was already written is skipped without scanning the archive.
+"""
+
+#------------------------------------------------
+# python modules
+#------------------------------------------------
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from io import BufferedIOBase, BytesIO, TextIOWrapper
+from tempfile import TemporaryFile
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+#------------------------------------------------
+# Gramps module
+#------------------------------------------------
+from gramps.gen.constfunc import win
+
+#------------------------------------------------
+# constants
+#------------------------------------------------
+# Pages larger than this are buffered in a temporary file instead of memory
+PAGE_SPOOL_SIZE = 1024 * 1024
+
+# Archive formats and the extension of their file
+ARCHIVE_TGZ = "tar.gz"
+ARCHIVE_ZIP = "zip"
+ARCHIVE_ZST = "tar.zst"
+ARCHIVE_EXT = {
+    ARCHIVE_TGZ : ".tar.gz",
+    ARCHIVE_ZIP : ".zip",
+    ARCHIVE_ZST : ".tar.zst",
+    }
+
+#------------------------------------------------
+# PageBuffer
+#------------------------------------------------
+class PageBuffer(BufferedIOBase):
+    """
+    A binary buffer held in memory until it grows larger than
+    PAGE_SPOOL_SIZE, then moved to a temporary file.
+    """
+
+    def __init__(self):
+        BufferedIOBase.__init__(self)
+        self._file = BytesIO()
+        self._spooled = False
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        count = self._file.write(data)
+        if not self._spooled and self._file.tell() > PAGE_SPOOL_SIZE:
+            temp_file = TemporaryFile()
+            temp_file.write(self._file.getvalue())
+            temp_file.seek(self._file.tell())
+            self._file = temp_file
+            self._spooled = True
+        return count
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def read1(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self.closed:
+            BufferedIOBase.close(self)
+            self._file.close()
+
+#------------------------------------------------
+# WebArchive
+#------------------------------------------------
+class WebArchive:
+    """
+    Base class of the archives a web site can be written to.
+    """
+
+    def __init__(self):
+        self.names = set()
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def create_page(self, encoding):
+        """
+        Return a text file to write a page to, and the binary buffer it
+        writes to.  The page is added to the archive by :meth:`add_page`.
+
+        @param: encoding -- The encoding of the page
+        """
+        buffer = PageBuffer()
+        output_file = TextIOWrapper(buffer, encoding=encoding,
+                                    errors='xmlcharrefreplace')
+        return output_file, buffer
+
+    def add_page(self, name, output_file, buffer, mtime):
+        """
+        Add a page written to a file returned by :meth:`create_page`, and
+        close the file.  Nothing is added if the name is already in the
+        archive.
+
+        @param: name        -- The name of the page in the archive
+        @param: output_file -- The text file the page was written to
+        @param: buffer      -- The binary buffer of the text file
+        @param: mtime       -- The modification time of the page
+        """
+        if name not in self.names:
+            self.names.add(name)
+            output_file.flush()
+            size = buffer.tell()
+            buffer.seek(0)
+            self._add_buffer(name, buffer, size, mtime)
+        output_file.close()
+
+    def add_file(self, fname, name, mtime=None):
+        """
+        Add a file to the archive, unless the name is already in it.
+
+        @param: fname -- The path of the file to add
+        @param: name  -- The name of the file in the archive
+        @param: mtime -- The modification time to set, if not the one of
+                         the file
+        """
+        if name not in self.names:
+            self.names.add(name)
+            self._add_file(fname, name, mtime)
+
+    def _add_buffer(self, name, buffer, size, mtime):
+        raise NotImplementedError
+
+    def _add_file(self, fname, name, mtime):
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Finish writing the archive.
+        """
+        raise NotImplementedError
+
+#------------------------------------------------
+# TarArchive
+#------------------------------------------------
+class TarArchive(WebArchive):
+    """
+    A tar archive, compressed with gzip or zstandard.
+    """
+
+    def __init__(self, path, compression=ARCHIVE_TGZ):
+        WebArchive.__init__(self)
+        self.target = None
+        if compression == ARCHIVE_ZST:
+            compressor = zstandard.ZstdCompressor()
+            self.target = compressor.stream_writer(open(path, "wb"))
+            self.tar = tarfile.open(fileobj=self.target, mode="w|")
+        else:
+            self.tar = tarfile.open(path, mode="w|gz")
+
+    def _add_buffer(self, name, buffer, size, mtime):
+        tarinfo = tarfile.TarInfo(name)
+        tarinfo.size = size
+        tarinfo.mtime = mtime if mtime else time.time()
+        if not win():
+            tarinfo.uid = os.getuid()
+            tarinfo.gid = os.getgid()
+        self.tar.addfile(tarinfo, buffer)
+
+    def _add_file(self, fname, name, mtime):
+        def set_mtime(tarinfo):
+            """
+            For each file, we set the last modification time.
+            """
+            if mtime is not None:
+                tarinfo.mtime = mtime
+            return tarinfo
+
+        self.tar.add(fname, name, filter=set_mtime)
+
+    def close(self):
+        self.tar.close()
+        if self.target is not None:
+            self.target.close()
+
+#------------------------------------------------
+# ZipArchive
+#------------------------------------------------
+class ZipArchive(WebArchive):
+    """
+    A zip archive.
+    """
+
+    def __init__(self, path):
+        WebArchive.__init__(self)
+        self.zip = zipfile.ZipFile(path, mode="w",
+                                   compression=zipfile.ZIP_DEFLATED)
+
+    @staticmethod
+    def _date_time(mtime):
+        # zip files cannot hold dates before 1980
+        return max(time.localtime(mtime)[:6], (1980, 1, 1, 0, 0, 0))
+
+    def _add_buffer(self, name, buffer, size, mtime):
+        zipinfo = zipfile.ZipInfo(name, self._date_time(
+            mtime if mtime else time.time()))
+        zipinfo.compress_type = zipfile.ZIP_DEFLATED
+        zipinfo.file_size = size
+        with self.zip.open(zipinfo, "w") as member:
+            shutil.copyfileobj(buffer, member)
+
+    def _add_file(self, fname, name, mtime):
+        zipinfo = zipfile.ZipInfo.from_file(fname, name)
+        zipinfo.compress_type = zipfile.ZIP_DEFLATED
+        if mtime is not None:
+            zipinfo.date_time = self._date_time(mtime)
+        with open(fname, "rb") as source:
+            with self.zip.open(zipinfo, "w") as member:
+                shutil.copyfileobj(source, member)
+
+    def close(self):
+        self.zip.close()
+
+#------------------------------------------------
+# Functions
+#------------------------------------------------
+def get_archive_formats():
+    """
+    Return the archive formats which can be written.
+    """
+    formats = [ARCHIVE_TGZ, ARCHIVE_ZIP]
+    if ZSTD_AVAILABLE:
+        formats.append(ARCHIVE_ZST)
+    return formats
+
+def open_archive(path, archive_format=ARCHIVE_TGZ):
+    """
+    Create an archive to write a web site to.
+
+    @param: path           -- The path of the archive file
+    @param: archive_format -- One of the formats of get_archive_formats()
+    """
+    if archive_format == ARCHIVE_ZIP:
+        return ZipArchive(path)
+    if archive_format == ARCHIVE_ZST and ZSTD_AVAILABLE:
+        return TarArchive(path, ARCHIVE_ZST)
+    return TarArchive(path, ARCHIVE_TGZ)
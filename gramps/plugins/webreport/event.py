@@ -118,11 +118,10 @@ class EventPages(BasePage):
         with self.r_user.progress(progress_title, message,
                                   len(event_handle_list) + 1
                                  ) as step:
-            index = 1
-            for event_handle in event_handle_list:
-                step()
-                index += 1
-                self.eventpage(self.report, the_lang, the_title, event_handle)
+            self.report.render_pages(
+                event_handle_list, step,
+                lambda event_handle: self.eventpage(
+                    self.report, the_lang, the_title, event_handle))
             step()
         self.eventlistpage(self.report, the_lang, the_title, event_types,
                            event_handle_list)
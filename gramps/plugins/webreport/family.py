@@ -109,15 +109,14 @@ class FamilyPages(BasePage):
             LOG.debug("    %s", str(item))
 
         message = _("Creating family pages...")
-        index = 1
         progress_title = self.report.pgrs_title(the_lang)
         with self.r_user.progress(progress_title, message,
                                   len(self.report.obj_dict[Family]) + 1
                                  ) as step:
-            for family_handle in self.report.obj_dict[Family]:
-                step()
-                index += 1
-                self.familypage(self.report, the_lang, the_title, family_handle)
+            self.report.render_pages(
+                self.report.obj_dict[Family], step,
+                lambda family_handle: self.familypage(
+                    self.report, the_lang, the_title, family_handle))
             step()
             self.familylistpage(self.report, the_lang, the_title,
                                 self.report.obj_dict[Family].keys())
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Incremental builds of the Narrative Web site.
+
+A manifest kept in the web site directory records, for each page of an
+object, the files written, the handles of all the objects read from the
+database while rendering them, the backlinks of the object and the family
+map links the pages added, which the pages rendered after them read.  A
+page is rendered again only if one of these objects changed, was deleted,
+or was added to or removed from the web site, or if its backlinks differ
+from the last build.
+"""
+
+#------------------------------------------------
+# python modules
+#------------------------------------------------
+import json
+import logging
+import os
+
+#------------------------------------------------
+# Gramps module
+#------------------------------------------------
+from gramps.gen.const import VERSION
+
+LOG = logging.getLogger(".NarrativeWeb")
+
+#------------------------------------------------
+# constants
+#------------------------------------------------
+MANIFEST_NAME = "navweb-manifest.json"
+MANIFEST_VERSION = 3
+
+# The position of the change time in the raw data of each table
+_CHANGE_POS = (("person", 17), ("family", 12), ("event", 10), ("place", 15),
+               ("source", 8), ("citation", 9), ("media", 9),
+               ("repository", 7), ("note", 5))
+
+#------------------------------------------------
+# DependencyRecorder
+#------------------------------------------------
+class DependencyRecorder:
+    """
+    A database wrapper recording the handles of the objects read through it.
+
+    Recording is active while the handles attribute is a set.
+    """
+    def __init__(self, database):
+        """
+        The database is called self.db for consistency with the proxies.
+        """
+        self.db = database
+        self.handles = None
+
+    def __getattr__(self, attr):
+        """
+        Use the self.db version of an attribute, recording the objects
+        returned by the get_*_from_handle and get_*_from_gramps_id methods.
+        """
+        method = getattr(self.db, attr)
+        if attr.startswith("get_") and attr.endswith("_from_handle"):
+            def get_from_handle(handle):
+                if self.handles is not None:
+                    self.handles.add(handle)
+                return method(handle)
+            setattr(self, attr, get_from_handle)
+            return get_from_handle
+        if attr.startswith("get_") and attr.endswith("_from_gramps_id"):
+            def get_from_gramps_id(gramps_id):
+                obj = method(gramps_id)
+                if obj is not None and self.handles is not None:
+                    self.handles.add(obj.handle)
+                return obj
+            setattr(self, attr, get_from_gramps_id)
+            return get_from_gramps_id
+        return method
+
+#------------------------------------------------
+# Manifest
+#------------------------------------------------
+class Manifest:
+    """
+    The pages of a web site, with the objects they were rendered from.
+    """
+    def __init__(self, html_dir, options_key):
+        """
+        Read the manifest of the web site in html_dir.  The pages recorded
+        in it are only used if they were built with the same options.
+
+        @param: html_dir    -- The directory of the web site
+        @param: options_key -- A string identifying the report options
+        """
+        self.path = os.path.join(html_dir, MANIFEST_NAME)
+        self.html_dir = html_dir
+        self.options_key = options_key
+        self.build_time = 0
+        self.included = set()
+        self.pages = {}
+        self.changed = None
+        self.seen = set()
+        try:
+            with open(self.path, encoding="utf-8") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return
+        if (data.get("manifest") != MANIFEST_VERSION or
+                data.get("gramps") != VERSION or
+                data.get("options") != options_key):
+            LOG.debug("web site manifest ignored: it was built differently")
+            return
+        self.build_time = data["build_time"]
+        self.included = set(data["included"])
+        self.pages = {key: (files, set(deps), bkrefs, links)
+                      for key, (files, deps, bkrefs, links)
+                      in data["pages"].items()}
+
+    def find_changes(self, database, included):
+        """
+        Find the objects which changed since the last build.
+
+        @param: database -- The database the web site is built from
+        @param: included -- The handles of all the objects of the web site
+        """
+        self.changed = set(self.included.symmetric_difference(included))
+        # the change times are read from the raw data of the database
+        # under the proxies
+        while hasattr(database, "db"):
+            database = database.db
+        existing = set()
+        for table, change_pos in _CHANGE_POS:
+            with database.method("get_%s_cursor", table)() as cursor:
+                for handle, data in cursor:
+                    existing.add(handle)
+                    if data[change_pos] >= self.build_time:
+                        self.changed.add(handle)
+        for page in self.pages.values():
+            self.changed.update(page[1] - existing)
+        self.included = set(included)
+
+    def needs_update(self, key, bkrefs):
+        """
+        Return True if a page has to be rendered.
+
+        @param: key    -- The key of the page
+        @param: bkrefs -- The backlinks of the object of the page
+        """
+        self.seen.add(key)
+        page = self.pages.get(key)
+        if page is None or self.changed is None or page[2] != bkrefs:
+            return True
+        return not page[1].isdisjoint(self.changed)
+
+    def get_links(self, key):
+        """
+        Return the family map links added by a page in the last build.
+        """
+        return self.pages[key][3]
+
+    def update(self, key, files, deps, bkrefs, links):
+        """
+        Record the files written for a page, the handles of the objects
+        read to render them, the backlinks of its object and the family map
+        links it added.
+        """
+        self.seen.add(key)
+        self.pages[key] = (files, set(deps), bkrefs, links)
+
+    def remove_stale(self):
+        """
+        Delete the pages of the objects which are no longer in the web site.
+        """
+        for key in set(self.pages) - self.seen:
+            files = self.pages.pop(key)[0]
+            for fname in files:
+                try:
+                    os.remove(os.path.join(self.html_dir, fname))
+                except OSError:
+                    pass
+
+    def save(self, build_time):
+        """
+        Write the manifest.
+
+        @param: build_time -- The time the build started
+        """
+        data = {
+            "manifest": MANIFEST_VERSION,
+            "gramps": VERSION,
+            "options": self.options_key,
+            "build_time": build_time,
+            "included": sorted(self.included),
+            "pages": {key: (files, sorted(deps), bkrefs, links)
+                      for key, (files, deps, bkrefs, links)
+                      in self.pages.items()},
+            }
+        with open(self.path, "w", encoding="utf-8") as manifest_file:
+            json.dump(data, manifest_file)
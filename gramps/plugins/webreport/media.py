@@ -692,9 +692,7 @@ class MediaPages(BasePage):
         try:
             mtime = os.stat(fullpath).st_mtime
             if self.report.archive:
-                if str(newpath) not in self.report.archive.getnames():
-                    # The current file not already archived.
-                    self.report.archive.add(fullpath, str(newpath))
+                self.report.archive.add_file(fullpath, str(newpath))
             else:
                 to_dir = os.path.join(self.html_dir, to_dir)
                 if not os.path.isdir(to_dir):
@@ -48,12 +48,12 @@ Classes:
 #------------------------------------------------
 import logging
 from functools import partial
+import multiprocessing
 import os
 import sys
 import time
 import shutil
-import tarfile
-from io import BytesIO, TextIOWrapper
+from io import StringIO
 from collections import defaultdict
 from decimal import getcontext
 
@@ -76,6 +76,7 @@ from gramps.gen.plug.report import utils
 from gramps.gen.plug.report import MenuReportOptions
 from gramps.gen.plug.report import stdoptions
 from gramps.gen.constfunc import win, get_curr_dir
+from gramps.gen.user import User
 from gramps.gen.config import config
 from gramps.gen.datehandler import displayer as _dd
 from gramps.gen.display.name import displayer as _nd
@@ -114,11 +115,61 @@ from gramps.plugins.webreport.common import (get_gendex_data,
                                              HTTP, HTTPS, _WEB_EXT, CSS,
                                              _NARRATIVESCREEN, _NARRATIVEPRINT,
                                              _WRONGMEDIAPATH, sort_people)
+from gramps.plugins.webreport.archive import (open_archive,
+                                              get_archive_formats,
+                                              ARCHIVE_TGZ, ARCHIVE_ZIP,
+                                              ARCHIVE_ZST, ARCHIVE_EXT)
+from gramps.plugins.webreport.incremental import DependencyRecorder, Manifest
 
 LOG = logging.getLogger(".NarrativeWeb")
 _ = glocale.translation.sgettext
 getcontext().prec = 8
 
+# Pages are rendered by worker processes in batches of this many objects
+PAGE_BATCH = 50
+_CAN_FORK = "fork" in multiprocessing.get_all_start_methods()
+
+# The report and the page rendering function used by the worker processes
+_WORKER_JOB = None
+
+#------------------------------------------------
+# Worker process support
+#------------------------------------------------
+def _render_batch(handles):
+    """
+    Render the pages of a batch of objects in a worker process.
+    """
+    report, render = _WORKER_JOB
+    return report.render_batch(render, handles)
+
+class _RecordingDict(dict):
+    """
+    A dictionary which records the items set in it, in each of the
+    dictionaries of its recorders list.
+    """
+    def __init__(self, *args):
+        dict.__init__(self, *args)
+        self.recorders = []
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        for changes in self.recorders:
+            changes[key] = value
+
+class _WorkerUser(User):
+    """
+    Keep the warnings of a worker process, to be shown by the main process.
+    """
+    def __init__(self):
+        User.__init__(self)
+        self.messages = []
+
+    def warn(self, title, warning=""):
+        self.messages.append((title, warning))
+
+    def notify_error(self, title, error=""):
+        self.messages.append((title, error))
+
 #------------------------------------------------
 # constants
 #------------------------------------------------
@@ -211,8 +262,17 @@ class NavWebReport(Report):
             self.dl_descr[count] = self.options[descrx]
 
         self.encoding = self.options['encoding']
+        self.workers = self.options['workers']
+        if getattr(user, 'uistate', None) is not None:
+            # forking the threads of the GUI is not safe
+            self.workers = 1
+        self._output = None        # Pages and files of a worker process
+        self.incremental = self.options['incremental']
+        self._manifest = None      # Pages of the last incremental build
+        self._written = []         # Files written for the manifest
 
         self.use_archive = self.options['archive']
+        self.archive_format = self.options['archive_format']
         self.use_intro = self.options['intronote'] or self.options['introimg']
         self.use_home = self.options['homenote'] or self.options['homeimg']
         self.use_contact = self.opts['contactnote'] or self.opts['contactimg']
@@ -303,6 +363,7 @@ class NavWebReport(Report):
         global _WRONGMEDIAPATH
 
         _WRONGMEDIAPATH = []
+        build_time = int(time.time())
         if not self.use_archive:
             dir_name = self.target_path
             if dir_name is None:
@@ -355,7 +416,8 @@ class NavWebReport(Report):
                     _('The archive file must be a file, not a directory'))
                 return
             try:
-                self.archive = tarfile.open(self.target_path, "w:gz")
+                self.archive = open_archive(self.target_path,
+                                            self.archive_format)
             except (OSError, IOError) as value:
                 self.user.notify_error(
                     _("Could not create %s") % self.target_path,
@@ -450,6 +512,9 @@ class NavWebReport(Report):
                 if media:
                     self._add_media(media.handle, Media, media.handle)
 
+        if self.incremental and self.html_dir:
+            self._start_incremental()
+
         #################################################
         #
         # Pass 2 Generate the web pages
@@ -542,6 +607,10 @@ class NavWebReport(Report):
         if self.archive:
             self.archive.close()
 
+        if self._manifest is not None:
+            self._manifest.remove_stale()
+            self._manifest.save(build_time)
+
         if _WRONGMEDIAPATH:
             error = '\n'.join([
                 _('ID=%(grampsid)s, path=%(dir)s') % {
@@ -556,6 +625,22 @@ class NavWebReport(Report):
         #pr.print_stats()
         # end print performance check
 
+    def _start_incremental(self):
+        """
+        Read the manifest of the last build, to render only the pages of the
+        objects which changed since then.
+        """
+        options_key = repr(sorted(
+            (name, value) for (name, value) in self.options.items()
+            if name not in ('incremental', 'workers')))
+        self._manifest = Manifest(self.html_dir, options_key)
+        included = set()
+        for obj_class in self.obj_dict:
+            included.update(self.obj_dict[obj_class])
+        self._manifest.find_changes(self._db, included)
+        self.database = self._db = DependencyRecorder(self.database)
+        self.fam_link = _RecordingDict(self.fam_link)
+
     def _build_obj_dict(self):
         """
         Construct the dictionaries of objects to be included in the reports.
@@ -1661,6 +1746,7 @@ class NavWebReport(Report):
         @param: subdir -- A subdir to be added to filename
         @param: ext    -- An extension to be added to filename
         """
+        args = (fname, subdir, ext)
         if ext is None:
             ext = self.ext
         if self.usecms and not subdir:
@@ -1688,10 +1774,11 @@ class NavWebReport(Report):
                     self.cur_fname = os.path.join(fname) + self.ext
                 else:
                     self.cur_fname = fname + ext
-        if self.archive:
-            string_io = BytesIO()
-            output_file = TextIOWrapper(string_io, encoding=self.encoding,
-                                        errors='xmlcharrefreplace')
+        if self._output is not None:
+            # In a worker process the page is written by the main process.
+            output_file, string_io = StringIO(), args
+        elif self.archive:
+            output_file, string_io = self.archive.create_page(self.encoding)
         else:
             string_io = None
             if subdir:
@@ -1725,29 +1812,192 @@ class NavWebReport(Report):
         will close any file passed to it
 
         @param: output_file -- The output file to flush
-        @param: string_io   -- The string IO used when we are in archive mode
+        @param: string_io   -- The buffer used when we are in archive mode,
+                               or the arguments of create_file in a worker
+                               process
         @param: date        -- The last modification date for this object
                                If we have "zero", we use the current time.
                                This is related to bug #8950 and very useful
                                when we use rsync.
         """
-        if self.archive:
-            if self.cur_fname not in self.archive.getnames():
-                # The current file not already archived.
-                output_file.flush()
-                tarinfo = tarfile.TarInfo(self.cur_fname)
-                tarinfo.size = len(string_io.getvalue())
-                tarinfo.mtime = date if date != 0 else time.time()
-                if not win():
-                    tarinfo.uid = os.getuid()
-                    tarinfo.gid = os.getgid()
-                string_io.seek(0)
-                self.archive.addfile(tarinfo, string_io)
+        if self._output is not None:
+            self._output.append((string_io, output_file.getvalue(), date))
             output_file.close()
+        elif self.archive:
+            self.archive.add_page(self.cur_fname, output_file, string_io,
+                                  date)
         else:
             output_file.close()
             if date is not None and date > 0:
                 os.utime(output_file.name, (date, date))
+            if self._manifest is not None:
+                self._written.append(os.path.relpath(output_file.name,
+                                                     self.html_dir))
+
+    def render_pages(self, handles, step, render):
+        """
+        Render the pages of a list of objects, in worker processes if the
+        report uses more than one.
+
+        The pages are independent once the object dictionary is built, so
+        batches of them are rendered in parallel by forked processes which
+        share the state of the report.  The main process writes the pages
+        and copies the files of each batch in the order of the handles, so
+        the output does not depend on the number of workers.
+
+        @param: handles -- The handles of the objects
+        @param: step    -- Called for each object, to show the progress
+        @param: render  -- Called with each handle to render its page
+        """
+        global _WORKER_JOB
+        handles = list(handles)
+        if self._manifest is not None:
+            todo = []
+            for handle in handles:
+                key = self._page_key(handle)
+                if self._manifest.needs_update(key,
+                                               self._page_bkrefs(handle)):
+                    todo.append(handle)
+                else:
+                    # the family pages read the links of the person pages
+                    self.fam_link.update(self._manifest.get_links(key))
+                    step()
+            handles = todo
+        workers = min(self.workers, len(handles) // PAGE_BATCH)
+        if workers < 2 or not _CAN_FORK or self._output is not None:
+            for handle in handles:
+                step()
+                mark = len(self._written)
+                page = self._render_page(render, handle)
+                if page is not None:
+                    self._update_manifest(handle, self._written[mark:],
+                                          *page)
+            return
+
+        batches = [handles[index:index + PAGE_BATCH]
+                   for index in range(0, len(handles), PAGE_BATCH)]
+        _WORKER_JOB = (self, render)
+        try:
+            context = multiprocessing.get_context("fork")
+            with context.Pool(workers) as pool:
+                for batch, output in zip(batches,
+                                         pool.imap(_render_batch, batches)):
+                    self._write_output(*output)
+                    for dummy_handle in batch:
+                        step()
+        finally:
+            _WORKER_JOB = None
+
+    def _page_key(self, handle):
+        """
+        Return the key of the pages of an object in the manifest.
+        """
+        return "%s:%s" % (self.the_lang or "", handle)
+
+    def _get_bkrefs(self, handle):
+        """
+        Return the backlinks of an object.
+        """
+        for bkrefs in self.bkref_dict.values():
+            if handle in bkrefs:
+                return bkrefs[handle]
+        return set()
+
+    def _page_bkrefs(self, handle):
+        """
+        Return the backlinks of an object, as they are kept in the manifest.
+        """
+        return sorted("%s:%s:%s" % (getattr(bkref_class, "__name__",
+                                            bkref_class), bkref_handle, role)
+                      for bkref_class, bkref_handle, role
+                      in self._get_bkrefs(handle))
+
+    def _update_manifest(self, handle, files, deps, links):
+        """
+        Record the pages of an object in the manifest.  The objects linking
+        to it are added to the objects read to render them, so their
+        changes update the backlinks of the pages.
+        """
+        deps = set(deps)
+        deps.update(bkref[1] for bkref in self._get_bkrefs(handle)
+                    if bkref[1])
+        self._manifest.update(self._page_key(handle), files, deps,
+                              self._page_bkrefs(handle), links)
+
+    def _render_page(self, render, handle):
+        """
+        Render the pages of an object.  For an incremental build, return the
+        handles of the objects read to render them and the family map links
+        they added, otherwise None.
+        """
+        if self._manifest is None:
+            render(handle)
+            return None
+        deps = self.database.handles = {handle}
+        links = {}
+        self.fam_link.recorders.append(links)
+        try:
+            render(handle)
+        finally:
+            self.database.handles = None
+            self.fam_link.recorders.pop()
+        return deps, links
+
+    def render_batch(self, render, handles):
+        """
+        Render the pages of a batch of objects in a worker process.
+
+        Return the pages and the files to copy, as a list of
+        (create_file arguments, text, date) and (copy_file arguments, None,
+        None) tuples, the warnings, the family map links added, and for
+        each object its handle, the number of pages and files in the list
+        and what _render_page returned for it.
+        """
+        if self._output is None:
+            self._start_worker()
+        self._output = []
+        self.user.messages = []
+        changes = {}
+        self.fam_link.recorders = [changes]
+        pages = []
+        for handle in handles:
+            mark = len(self._output)
+            page = self._render_page(render, handle)
+            pages.append((handle, len(self._output) - mark, page))
+        return self._output, self.user.messages, changes, pages
+
+    def _start_worker(self):
+        """
+        Prepare a forked worker process to render pages.
+        """
+        self.user = _WorkerUser()
+        self.fam_link = _RecordingDict(self.fam_link)
+        database = self.database
+        while hasattr(database, 'db'):
+            database = database.db
+        if hasattr(database, 'reconnect'):
+            database.reconnect()
+
+    def _write_output(self, output, messages, fam_link, pages):
+        """
+        Write the pages and copy the files rendered by a worker process.
+        """
+        output = iter(output)
+        for handle, count, page in pages:
+            mark = len(self._written)
+            for dummy_index in range(count):
+                args, text, date = next(output)
+                if text is None:
+                    self.copy_file(*args)
+                else:
+                    output_file, string_io = self.create_file(*args)
+                    output_file.write(text)
+                    self.close_file(output_file, string_io, date)
+            if page is not None:
+                self._update_manifest(handle, self._written[mark:], *page)
+        for title, message in messages:
+            self.user.warn(title, message)
+        self.fam_link.update(fam_link)
 
     def prepare_copy_media(self, photo):
         """
@@ -1777,27 +2027,17 @@ class NavWebReport(Report):
         @param: to_dir     -- Is the relative path name in the destination root.
                               It will be prepended before 'to_fname'.
         """
+        if self._output is not None:
+            # In a worker process the file is copied by the main process.
+            self._output.append(((from_fname, to_fname, to_dir), None, None))
+            return
         if self.usecms:
             to_dir = "/".join([self.target_uri, to_dir])
         LOG.debug("copying '%s' to '%s/%s'", from_fname, to_dir, to_fname)
         mtime = os.stat(from_fname).st_mtime
         if self.archive:
-            def set_mtime(tarinfo):
-                """
-                For each file, we set the last modification time.
-
-                We could also set uid, gid, uname, gname and mode
-                #tarinfo.uid = os.getuid()
-                #tarinfo.mode = 0660
-                #tarinfo.uname = tarinfo.gname = "www-data"
-                """
-                tarinfo.mtime = mtime
-                return tarinfo
-
             dest = os.path.join(to_dir, to_fname)
-            if dest not in self.archive.getnames():
-                # The current file not already archived.
-                self.archive.add(from_fname, dest, filter=set_mtime)
+            self.archive.add_file(from_fname, dest, mtime)
         else:
             dest = os.path.join(self.html_dir, to_dir, to_fname)
 
@@ -1862,6 +2102,7 @@ class NavWebOptions(MenuReportOptions):
         """
         self.__db = dbase
         self.__archive = None
+        self.__archive_format = None
         self.__target = None
         self.__target_uri = None
         self.__pid = None
@@ -1959,13 +2200,26 @@ class NavWebOptions(MenuReportOptions):
         category_name = _("Report Options")
         addopt = partial(menu.add_option, category_name)
 
-        self.__archive = BooleanOption(_('Store website in .tar.gz archive'),
+        self.__archive = BooleanOption(_('Store website in an archive'),
                                        False)
         self.__archive.set_help(_('Whether to store the website in an '
                                   'archive file'))
         addopt("archive", self.__archive)
         self.__archive.connect('value-changed', self.__archive_changed)
 
+        archive_labels = {ARCHIVE_TGZ : _('tar archive compressed with gzip'),
+                          ARCHIVE_ZIP : _('zip archive'),
+                          ARCHIVE_ZST : _('tar archive compressed with '
+                                          'zstandard')}
+        self.__archive_format = EnumeratedListOption(_('Archive format'),
+                                                     ARCHIVE_TGZ)
+        for archive_format in get_archive_formats():
+            self.__archive_format.add_item(archive_format,
+                                           archive_labels[archive_format])
+        self.__archive_format.set_help(_('The format of the archive file'))
+        addopt("archive_format", self.__archive_format)
+        self.__archive_format.connect('value-changed', self.__archive_changed)
+
         dbname = self.__db.get_dbname()
         default_dir = dbname + "_" + "NAVWEB"
         self.__target = DestinationOption(
@@ -2342,6 +2596,20 @@ class NavWebOptions(MenuReportOptions):
         category_name = _("Advanced Options")
         addopt = partial(menu.add_option, category_name)
 
+        incremental = BooleanOption(
+            _('Only update the pages which changed'), False)
+        incremental.set_help(
+            _('Whether to render again only the pages of the objects which '
+              'changed since the website was last built in the destination '
+              'directory. Not used for archives.'))
+        addopt("incremental", incremental)
+
+        workers = NumberOption(_('Worker processes'), 1, 1, 64)
+        workers.set_help(_('The number of processes rendering the pages of '
+                           'people, families, events and sources in '
+                           'parallel, when run from the command line'))
+        addopt("workers", workers)
+
         encoding = EnumeratedListOption(_('Character set encoding'),
                                         _CHARACTER_SETS[0][1])
         for eopt in _CHARACTER_SETS:
@@ -2725,10 +2993,13 @@ class NavWebOptions(MenuReportOptions):
         Update the change of storage: archive or directory
         """
         if self.__archive.get_value() is True:
-            self.__target.set_extension(".tar.gz")
+            self.__target.set_extension(
+                ARCHIVE_EXT[self.__archive_format.get_value()])
             self.__target.set_directory_entry(False)
+            self.__archive_format.set_available(True)
         else:
             self.__target.set_directory_entry(True)
+            self.__archive_format.set_available(False)
             # We don't use an archive. If usecms is True, set it to False
             if self.__usecms:
                 self.__usecms.set_value(False)
@@ -151,12 +151,11 @@ class PersonPages(BasePage):
         with self.r_user.progress(progress_title, message,
                                   len(self.report.obj_dict[Person]) + 1
                                  ) as step:
-            index = 1
-            for person_handle in sorted(self.report.obj_dict[Person]):
-                step()
-                index += 1
-                person = self.r_db.get_person_from_handle(person_handle)
-                self.individualpage(self.report, the_lang, the_title, person)
+            self.report.render_pages(
+                sorted(self.report.obj_dict[Person]), step,
+                lambda person_handle: self.individualpage(
+                    self.report, the_lang, the_title,
+                    self.r_db.get_person_from_handle(person_handle)))
             step()
             self.individuallistpage(self.report, the_lang, the_title,
                                     self.report.obj_dict[Person].keys())
@@ -110,11 +110,10 @@ class SourcePages(BasePage):
             self.sourcelistpage(self.report, the_lang, the_title,
                                 self.report.obj_dict[Source].keys())
 
-            index = 1
-            for source_handle in self.report.obj_dict[Source]:
-                step()
-                index += 1
-                self.sourcepage(self.report, the_lang, the_title, source_handle)
+            self.report.render_pages(
+                self.report.obj_dict[Source], step,
+                lambda source_handle: self.sourcepage(
+                    self.report, the_lang, the_title, source_handle))
 
     def sourcelistpage(self, report, the_lang, the_title, source_handles):
         """
@@ -0,0 +1,183 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the incremental builds of the Narrated Web Site report """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from gramps.gen.db import DbTxn
+from gramps.gen.db.utils import make_database
+from gramps.gen.lib import Person
+from gramps.plugins.webreport.incremental import (DependencyRecorder,
+                                                  Manifest)
+
+OPTIONS = "[('inc_families', True)]"
+BKREFS = ["Family:F1:1"]
+LINKS = {"F1": "../../../maps/f/1/F1.html"}
+
+
+class DependencyRecorderTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_database("sqlite")
+        cls.db.load(":memory:")
+        with DbTxn('Add test objects', cls.db) as trans:
+            for handle, gramps_id in (("A", "I0001"), ("B", "I0002")):
+                person = Person()
+                person.set_handle(handle)
+                person.set_gramps_id(gramps_id)
+                cls.db.add_person(person, trans)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+
+    def test_record(self):
+        database = DependencyRecorder(self.db)
+        database.get_person_from_handle("A")
+        deps = database.handles = set()
+        self.assertEqual(database.get_person_from_handle("A").handle, "A")
+        self.assertEqual(database.get_person_from_gramps_id("I0002").handle,
+                         "B")
+        self.assertIsNone(database.get_person_from_gramps_id("I0003"))
+        database.handles = None
+        database.get_person_from_gramps_id("I0001")
+        self.assertEqual(deps, {"A", "B"})
+
+    def test_other_methods(self):
+        database = DependencyRecorder(self.db)
+        database.handles = set()
+        self.assertEqual(database.get_number_of_people(), 2)
+        self.assertEqual(database.handles, set())
+
+
+class ManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.html_dir = tempfile.mkdtemp()
+        self.db = make_database("sqlite")
+        self.db.load(":memory:")
+        self.persons = {}
+        with DbTxn('Add test objects', self.db) as trans:
+            for handle in ("A", "B", "C"):
+                person = Person()
+                person.set_handle(handle)
+                self.db.add_person(person, trans)
+                self.persons[handle] = person
+        self.commit("A", 100)
+        self.commit("B", 100)
+        self.commit("C", 100)
+        # the first build, of the pages of A and B, read C for the page of A
+        manifest = self.build({"A", "B", "C"})
+        for key, deps in (("a", {"A", "C"}), ("b", {"B"})):
+            self.assertTrue(manifest.needs_update(key, []))
+            fname = key + ".html"
+            with open(os.path.join(self.html_dir, fname), "w") as page:
+                page.write(key)
+            manifest.update(key, [fname], deps, [], {})
+        manifest.remove_stale()
+        manifest.save(200)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.html_dir)
+
+    def commit(self, handle, change_time):
+        """
+        Change a person, at the given time.
+        """
+        with DbTxn('Change a person', self.db) as trans:
+            self.db.commit_person(self.persons[handle], trans, change_time)
+
+    def build(self, included, options=OPTIONS):
+        """
+        Return the manifest of a new build.
+        """
+        manifest = Manifest(self.html_dir, options)
+        manifest.find_changes(self.db, included)
+        return manifest
+
+    def test_unchanged(self):
+        manifest = self.build({"A", "B", "C"})
+        self.assertFalse(manifest.needs_update("a", []))
+        self.assertFalse(manifest.needs_update("b", []))
+
+    def test_changed(self):
+        self.commit("C", 300)
+        manifest = self.build({"A", "B", "C"})
+        self.assertTrue(manifest.needs_update("a", []))
+        self.assertFalse(manifest.needs_update("b", []))
+
+    def test_deleted(self):
+        with DbTxn('Remove a person', self.db) as trans:
+            self.db.remove_person("C", trans)
+        manifest = self.build({"A", "B", "C"})
+        self.assertTrue(manifest.needs_update("a", []))
+        self.assertFalse(manifest.needs_update("b", []))
+
+    def test_excluded(self):
+        manifest = self.build({"A", "B"})
+        self.assertTrue(manifest.needs_update("a", []))
+        self.assertFalse(manifest.needs_update("b", []))
+
+    def test_options(self):
+        manifest = self.build({"A", "B", "C"}, "[]")
+        self.assertTrue(manifest.needs_update("a", []))
+        self.assertTrue(manifest.needs_update("b", []))
+
+    def test_bkrefs(self):
+        """
+        A page is rendered again when the objects linking to it change.
+        """
+        manifest = self.build({"A", "B", "C"})
+        self.assertTrue(manifest.needs_update("b", BKREFS))
+        manifest.update("b", ["b.html"], {"B"}, BKREFS, {})
+        manifest.save(200)
+        manifest = self.build({"A", "B", "C"})
+        self.assertFalse(manifest.needs_update("b", BKREFS))
+        self.assertTrue(manifest.needs_update("b", []))
+
+    def test_links(self):
+        manifest = self.build({"A", "B", "C"})
+        self.assertEqual(manifest.get_links("a"), {})
+        manifest.update("a", ["a.html"], {"A"}, [], LINKS)
+        manifest.save(200)
+        manifest = self.build({"A", "B", "C"})
+        self.assertEqual(manifest.get_links("a"), LINKS)
+
+    def test_remove_stale(self):
+        manifest = self.build({"A", "C"})
+        self.assertFalse(manifest.needs_update("a", []))
+        manifest.remove_stale()
+        manifest.save(300)
+        self.assertTrue(os.path.exists(os.path.join(self.html_dir,
+                                                    "a.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.html_dir,
+                                                     "b.html")))
+        manifest = self.build({"A", "C"})
+        self.assertTrue(manifest.needs_update("b", []))
+
+
+if __name__ == "__main__":
+    unittest.main()
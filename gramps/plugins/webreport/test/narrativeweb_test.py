@@ -0,0 +1,152 @@
+#
+# Gramps - a GTK+/GNOME based genealogy program
+#
+# Copyright (C) 2023       Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the builds of the Narrated Web Site report """
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from gramps.cli.grampscli import CLIManager
+from gramps.cli.plug import run_report
+from gramps.cli.user import User
+from gramps.gen.const import DATA_DIR
+from gramps.gen.db import DbTxn
+from gramps.gen.db.utils import import_from_filename, make_database
+from gramps.gen.dbstate import DbState
+from gramps.gen import filters
+from gramps.gen.plug import BasePluginManager
+from gramps.plugins.webreport.incremental import MANIFEST_NAME
+
+TEST_DIR = os.path.abspath(os.path.join(DATA_DIR, "tests"))
+EXAMPLE = os.path.join(TEST_DIR, "data.gramps")
+
+
+def read_site(path):
+    """
+    Return the contents of the files of a web site, by path.
+    """
+    site = {}
+    for dirpath, dummy_dirs, filenames in os.walk(path):
+        for filename in filenames:
+            fname = os.path.join(dirpath, filename)
+            with open(fname, "rb") as site_file:
+                site[os.path.relpath(fname, path)] = site_file.read()
+    return site
+
+
+class NarrativeWebTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # keep the custom filters other tests added to
+        if filters.CustomFilters is None:
+            filters.reload_custom_filters()
+        dbstate = DbState()
+        CLIManager(dbstate, False, User()).do_reg_plugins(dbstate, None)
+        pmgr = BasePluginManager.get_instance()
+        cls.module = pmgr.load_plugin(pmgr.get_plugin("navwebpage"))
+        # the report needs a named tree
+        cls.treedir = tempfile.mkdtemp()
+        with open(os.path.join(cls.treedir, "name.txt"), "w") as name_file:
+            name_file.write("Example")
+        cls.db = make_database("sqlite")
+        cls.db.load(cls.treedir)
+        import_from_filename(cls.db, EXAMPLE, User())
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+        shutil.rmtree(cls.treedir)
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def build(self, name, **options):
+        """
+        Build the web site in a directory, and return its files.
+        """
+        target = os.path.join(self.tmpdir, name)
+        run_report(self.db, "navwebpage", target=target, **options)
+        return read_site(target)
+
+    def test_workers(self):
+        with patch.object(self.module, "PAGE_BATCH", 5):
+            serial = self.build("serial", workers="1")
+            with patch.object(self.module.multiprocessing, "get_context",
+                              wraps=self.module.multiprocessing.get_context
+                             ) as get_context:
+                parallel = self.build("parallel", workers="3")
+            get_context.assert_called_with("fork")
+        self.assertGreater(len(serial), 60)
+        self.assertEqual(sorted(parallel), sorted(serial))
+        for fname, data in serial.items():
+            self.assertEqual(parallel[fname], data, fname)
+
+    def test_incremental(self):
+        """
+        The family pages keep the family map links of the person pages,
+        which are rendered in other processes or were not rendered again.
+        """
+        options = {"incremental": "True", "inc_families": "True",
+                   "familymappages": "True", "gallery": "False"}
+        with DbTxn('Locate the places', self.db) as trans:
+            for place in self.db.iter_places():
+                place.set_latitude("50.5")
+                place.set_longitude("4.5")
+                self.db.commit_place(place, trans)
+        with patch.object(self.module, "PAGE_BATCH", 5):
+            serial = self.build("serial", workers="1", **options)
+            self.assertIn(b'class="family_map"',
+                          b"".join(data for fname, data in serial.items()
+                                   if fname.startswith("fam")))
+            for workers in ("1", "3"):
+                self.assert_site(self.build(workers, workers=workers,
+                                            **options), serial)
+                # forget the family pages, to render only them again
+                path = os.path.join(self.tmpdir, workers, MANIFEST_NAME)
+                with open(path) as manifest_file:
+                    manifest = json.load(manifest_file)
+                manifest["pages"] = {
+                    key: page for key, page in manifest["pages"].items()
+                    if not any(fname.startswith("fam")
+                               for fname in page[0])}
+                with open(path, "w") as manifest_file:
+                    json.dump(manifest, manifest_file)
+                self.assert_site(self.build(workers, workers=workers,
+                                            **options), serial)
+
+    def assert_site(self, site, expected):
+        """
+        Check that two builds of the web site have the same pages.
+        """
+        self.assertEqual(sorted(site), sorted(expected))
+        for fname, data in expected.items():
+            if fname != MANIFEST_NAME:
+                self.assertEqual(site[fname], data, fname)
+
+if __name__ == "__main__":
+    unittest.main()